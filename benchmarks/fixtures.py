@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+"""
+Fichier contenant la generation des fichiers de test des mesures de performance.
+Tous les fichiers sont synthetiques : aucun fichier du depot n'est necessaire.
+"""
+
+import numpy as np
+import os
+
+
+def write_stl(file: str, faces: int):
+    """
+    Ecrit un fichier STL binaire d'une surface ondulee d'environ faces triangles.
+    :param file: str: Chemin du fichier
+    :param faces: int: Nombre de triangles voulu
+    :return: None
+    """
+    side = max(2, int(np.ceil(np.sqrt(faces / 2)))) + 1  # Nombre de points par cote de la grille
+    x, y = np.meshgrid(np.linspace(0, 300, side), np.linspace(0, 300, side), indexing='ij')
+    z = 20 * np.sin(x / 30) * np.cos(y / 30) + 20
+    points = np.stack((x, y, z), axis=-1).astype(np.float32)
+
+    # Deux triangles par carre de la grille
+    a, b = points[:-1, :-1].reshape(-1, 3), points[1:, :-1].reshape(-1, 3)
+    c, d = points[:-1, 1:].reshape(-1, 3), points[1:, 1:].reshape(-1, 3)
+    triangles = np.concatenate((np.stack((a, b, d), axis=1), np.stack((a, d, c), axis=1)))
+
+    record = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+    data = np.zeros(len(triangles), dtype=record)
+    data['vertices'] = triangles
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    data['normal'] = normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    with open(file, 'wb') as f:
+        f.write(b'CrubsRunner benchmark'.ljust(80, b' '))
+        f.write(np.uint32(len(data)).tobytes())
+        f.write(data.tobytes())
+
+
+def write_vinyl(file: str, width: int, height: int):
+    """
+    Ecrit une image de tapis (degrade et quadrillage) de width x height pixels.
+    :param file: str: Chemin du fichier (.png ou .jpg)
+    :param width: int: Largeur en pixels
+    :param height: int: Hauteur en pixels
+    :return: None
+    """
+    from PIL import Image
+
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    image[:, :, 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    image[:, :, 2] = 128
+    image[::100, :] = 0  # Quadrillage
+    image[:, ::100] = 0
+    Image.fromarray(image).save(file)
+
+
+def write_gcrubs(file: str, commands: int, save_data):
+    """
+    Ecrit un fichier sequentiel de commands commandes : des lignes droites separees par des rotations.
+    :param file: str: Chemin du fichier
+    :param commands: int: Nombre de commandes
+    :param save_data: data.Save: Donnees de sauvegarde (format des commandes)
+    :return: None
+    """
+    init_data = save_data.get_init_data()
+    name = save_data.get_gcrubs('cmd_name')
+    rng = np.random.default_rng(0)
+
+    with open(file, 'w') as f:
+        f.write(init_data.get_main_robot('start_sequence_text').format(comment=name.get('Commentaire'),
+                                                                       x=250, y=250, angle=0))
+        for i in range(commands):
+            if i % 4 == 3:
+                f.write(name.get('Tourner a droite' if rng.random() < 0.5 else 'Tourner a gauche').format(angle=90))
+            elif i % 4 == 2:
+                f.write(name.get('Se deplacer en arriere').format(dist=int(rng.integers(10, 100))))
+            else:
+                f.write(name.get('Se deplacer en avant').format(dist=int(rng.integers(50, 300))))
+            f.write('\n')
+
+
+def write_project(window, file: str, board: str, vinyl: str, main_robot: str, gcrubs: str):
+    """
+    Ecrit un projet .crp qui utilise les fichiers donnes.
+    :param window: ui.MainWindow: Fenetre principale (ses donnees de sauvegarde sont modifiees)
+    :param file: str: Chemin du projet
+    :param board: str: Fichier 3D du plateau
+    :param vinyl: str: Image du tapis
+    :param main_robot: str: Fichier 3D du robot principal
+    :param gcrubs: str: Fichier sequentiel du robot principal
+    :return: None
+    """
+    save_data = window.save_data
+    save_data.set_window('project_file', file)
+    save_data.set_window('directory', os.path.dirname(file))
+    save_data.set_board('file', board)
+    save_data.set_vinyl('file', vinyl)
+    save_data.set_main_robot('file', main_robot)
+    save_data.set_main_robot('gcrubs_file', gcrubs)
+    window.write_file(file)
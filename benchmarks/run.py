@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+"""
+Suite de mesures des temps de lancement et de chargement de CrubsRunner.
+Les mesures tournent sans affichage (plateforme Qt offscreen) sur des fichiers synthetiques generes par fixtures.py.
+Les resultats sont enregistres en JSON dans benchmarks/results pour pouvoir comparer les versions entre elles.
+> python3 benchmarks/run.py [--repeat 5] [--quick] [--only show_mesh draw_track] [--output fichier.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # /.../CrubsRunner
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.chdir(ROOT)  # Les icones sont cherchees depuis la racine, comme dans CrubsRunner.py
+for folder in (ROOT, os.path.join(ROOT, 'src')):
+    if folder not in sys.path:
+        sys.path.append(folder)
+
+import fixtures  # noqa: E402 (benchmarks/ est le dossier du script)
+
+# Tailles des fichiers synthetiques (normal, --quick)
+MESH_FACES = ([1_000, 10_000, 100_000, 1_000_000], [1_000, 10_000])
+VINYL_SIZES = ([(1500, 1000), (6000, 4000), (12000, 8000)], [(1500, 1000)])
+COMMANDS = ([100, 500, 2000], [100, 500])
+
+# Lancement mesure dans un nouvel interpreteur : les imports ne sont pas deja en memoire
+STARTUP_CODE = """
+import json, sys
+from time import perf_counter
+begin = perf_counter()
+sys.path[:0] = {path!r}
+from PyQt5 import QtWidgets
+from src import ui
+imported = perf_counter()
+app = QtWidgets.QApplication([])
+window = ui.MainWindow()
+built = perf_counter()
+window.show()
+app.processEvents()
+shown = perf_counter()
+print(json.dumps({{'imports': imported - begin, 'main_window': built - imported, 'show': shown - built,
+                  'total': shown - begin}}))
+"""
+
+
+def stats(times: list) -> dict:
+    """
+    Resume une serie de mesures.
+    :param times: list: Durees en secondes
+    :return: dict: Durees et statistiques
+    """
+    return {'runs': times, 'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times)}
+
+
+def measure(function, repeat: int, setup=None) -> dict:
+    """
+    Mesure function repeat fois. setup est appelee avant chaque mesure, hors chronometre.
+    :param function: callable: Fonction a mesurer, recoit le resultat de setup
+    :param repeat: int: Nombre de mesures
+    :param setup: callable: Preparation de chaque mesure
+    :return: dict: Statistiques (voir stats)
+    """
+    times = list()
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        begin = perf_counter()
+        function(argument)
+        times.append(perf_counter() - begin)
+    return stats(times)
+
+
+class Suite:
+    """
+    Ensemble des mesures. Chaque methode bench_* est une mesure.
+    """
+
+    def __init__(self, folder: str, repeat: int, quick: bool):
+        """
+        Constructeur de Suite.
+        :param folder: str: Dossier des fichiers synthetiques
+        :param repeat: int: Nombre de repetitions de chaque mesure
+        :param quick: bool: Fichiers plus petits pour une mesure rapide
+        """
+        from PyQt5 import QtCore, QtWidgets
+
+        # Cache dans un dossier de test pour ne pas toucher au cache de l'utilisateur
+        QtCore.QStandardPaths.setTestModeEnabled(True)
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        self.folder = folder
+        self.repeat = repeat
+        self.size = 1 if quick else 0
+        self.results = list()
+
+    def add(self, name: str, params: dict, result: dict):
+        """
+        Enregistre et affiche un resultat.
+        :param name: str: Nom de la mesure
+        :param params: dict: Parametres de la mesure
+        :param result: dict: Statistiques
+        :return: None
+        """
+        self.results.append({'name': name, 'params': params, **result})
+        print("{name:<28} {params:<36} median {median:9.4f} s   min {min:9.4f} s".format(
+            name=name, params=json.dumps(params), median=result['median'], min=result['min']), flush=True)
+
+    def window(self):
+        """
+        Cree une fenetre principale.
+        :return: ui.MainWindow: Fenetre
+        """
+        from src import ui
+
+        window = ui.MainWindow()
+        self.app.processEvents()
+        return window
+
+    def wait(self, window):
+        """
+        Attend la fin des lectures en arriere-plan de la fenetre.
+        :param window: ui.MainWindow: Fenetre
+        :return: None
+        """
+        from PyQt5 import QtCore
+
+        while window.loader.is_loading():
+            self.app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+        self.app.processEvents()
+
+    @staticmethod
+    def clear_cache():
+        """
+        Vide le cache sur disque (mesures a froid).
+        :return: None
+        """
+        from src import functions
+
+        shutil.rmtree(functions.cache.directory(), ignore_errors=True)
+
+    def bench_startup(self):
+        """
+        Lancement complet dans un nouvel interpreteur : imports, creation et affichage de la fenetre.
+        """
+        code = STARTUP_CODE.format(path=[ROOT, os.path.join(ROOT, 'src')])
+        runs = [json.loads(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                          text=True, cwd=ROOT).stdout.strip().split('\n')[-1])
+                for _ in range(self.repeat)]
+        for step in runs[0]:
+            self.add('startup', {'step': step}, stats([run[step] for run in runs]))
+
+    def bench_main_window(self):
+        """
+        Construction de MainWindow dans un interpreteur ou les modules sont deja importes.
+        """
+        self.window().deleteLater()  # Premier appel hors mesure
+        self.add('main_window', {}, measure(lambda _: self.window().deleteLater(), self.repeat))
+
+    def bench_show_mesh(self):
+        """
+        Lecture et affichage d'un fichier STL selon le nombre de triangles.
+        """
+        from src import element
+        from src import functions
+
+        window = self.window()
+        for faces in MESH_FACES[self.size]:
+            file = os.path.join(self.folder, 'mesh_{faces}.stl'.format(faces=faces))
+            fixtures.write_stl(file, faces)
+
+            def setup():
+                board = element.Board(window.save_data, window)
+                board.set_file(file)
+                return board
+
+            self.add('show_mesh', {'faces': faces}, measure(functions.object.show_mesh, self.repeat, setup))
+
+    def bench_show_vinyl(self):
+        """
+        Lecture d'une image de tapis et creation des mipmaps, sans cache puis avec cache.
+        """
+        from src import element
+        from src import functions
+
+        window = self.window()
+        for width, height in VINYL_SIZES[self.size]:
+            file = os.path.join(self.folder, 'vinyl_{width}x{height}.png'.format(width=width, height=height))
+            fixtures.write_vinyl(file, width, height)
+
+            def setup(cold: bool):
+                if cold:
+                    self.clear_cache()
+                vinyl = element.Vinyl(window, window.save_data)
+                vinyl.set_file(file)
+                return vinyl
+
+            params = {'width': width, 'height': height}
+            self.add('show_vinyl', {**params, 'cache': 'cold'},
+                     measure(functions.object.show_vinyl, self.repeat, lambda: setup(True)))
+            self.add('show_vinyl', {**params, 'cache': 'warm'},
+                     measure(functions.object.show_vinyl, self.repeat, lambda: setup(False)))
+
+    def bench_open_project(self):
+        """
+        Ouverture d'un projet .crp (plateau, tapis, robot et sequence) jusqu'a la fin des lectures.
+        """
+        board = os.path.join(self.folder, 'project_board.stl')
+        robot = os.path.join(self.folder, 'project_robot.stl')
+        vinyl = os.path.join(self.folder, 'project_vinyl.png')
+        gcrubs = os.path.join(self.folder, 'project_robot.gcrubs')
+        project = os.path.join(self.folder, 'project.crp')
+        fixtures.write_stl(board, MESH_FACES[self.size][-1])
+        fixtures.write_stl(robot, MESH_FACES[self.size][1])
+        fixtures.write_vinyl(vinyl, *VINYL_SIZES[self.size][-1])
+        window = self.window()
+        fixtures.write_gcrubs(gcrubs, COMMANDS[self.size][1], window.save_data)
+        fixtures.write_project(window, project, board, vinyl, robot, gcrubs)
+
+        def open_project(window_):
+            window_.open_project(project)
+            self.wait(window_)
+
+        def setup(cold: bool):
+            if cold:
+                self.clear_cache()
+            return self.window()
+
+        self.add('open_project', {'cache': 'cold'}, measure(open_project, self.repeat, lambda: setup(True)))
+        self.add('open_project', {'cache': 'warm'}, measure(open_project, self.repeat, lambda: setup(False)))
+
+    def bench_draw_track(self):
+        """
+        Dessin de la trace d'un robot selon le nombre de commandes.
+        """
+        window = self.window()
+        robot_window = window.main_robot.get_window()
+        for commands in COMMANDS[self.size]:
+            file = os.path.join(self.folder, 'sequence_{commands}.gcrubs'.format(commands=commands))
+            fixtures.write_gcrubs(file, commands, window.save_data)
+            with open(file, 'r') as f:
+                sequence = f.read()
+
+            def setup():
+                for track in robot_window.track:
+                    window.viewer.removeItem(track)
+                robot_window.track = list()
+                return sequence
+
+            self.add('draw_track', {'commands': commands},
+                     measure(lambda seq: robot_window.draw_track(seq, True), self.repeat, setup))
+
+    def bench_theoretical_time(self):
+        """
+        Calcul du temps theorique d'une sequence selon le nombre de commandes.
+        """
+        from src import simulation
+
+        window = self.window()
+        for commands in COMMANDS[self.size]:
+            file = os.path.join(self.folder, 'sequence_{commands}.gcrubs'.format(commands=commands))
+            fixtures.write_gcrubs(file, commands, window.save_data)
+            with open(file, 'r') as f:
+                lines = f.readlines()
+
+            self.add('calculate_theoretical_time', {'commands': commands},
+                     measure(lambda _: simulation.Run.calculate_theoretical_time(window.main_robot, lines,
+                                                                                 window.save_data), self.repeat))
+
+
+def git_commit() -> str:
+    """
+    Renvoie le commit courant du depot.
+    :return: str: Hash du commit, "" si inconnu
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=ROOT,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    """
+    Lance les mesures demandees et enregistre les resultats.
+    :return: None
+    """
+    names = [name[len('bench_'):] for name in dir(Suite) if name.startswith('bench_')]
+    parser = argparse.ArgumentParser(description="Mesures de performance de CrubsRunner")
+    parser.add_argument('--repeat', type=int, default=5, help="nombre de repetitions de chaque mesure")
+    parser.add_argument('--quick', action='store_true', help="fichiers synthetiques plus petits")
+    parser.add_argument('--only', nargs='+', choices=names, default=names, help="mesures a lancer")
+    parser.add_argument('--output', help="fichier JSON des resultats (par defaut benchmarks/results/<date>.json)")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='crubsrunner_bench_')
+    try:
+        suite = Suite(folder, args.repeat, args.quick)
+        for name in args.only:
+            getattr(suite, 'bench_' + name)()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'date': datetime.now().isoformat(timespec='seconds'),
+                   'commit': git_commit(),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'repeat': args.repeat,
+                   'quick': args.quick,
+                   'results': suite.results}, f, indent=2)
+    print("Resultats enregistres dans", output)
+
+
+if __name__ == '__main__':
+    main()
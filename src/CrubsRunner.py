@@ -32,8 +32,6 @@ import sys
 import os
 from platform import system
 from pathlib import Path
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon
 
 path = Path(__file__).parent.resolve()
 os.chdir(path)
@@ -47,8 +45,17 @@ if os.getcwd() not in sys.path:  # /.../CrubsRunner
 if system() == "Linux":
     sys.path.append("/home/{user}/.CrubsRunner/".format(user=str(path).split('/')[1]))
 
+from src import startup
+startup.install()  # Mesure des imports, avant tout le reste
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QIcon, QSurfaceFormat
+
 from src import data
 from src import ui
+from src import functions
+from src import simulation
+startup.mark('imports')
 
 
 def set_app(application: QApplication):
@@ -72,13 +79,28 @@ def main():
     :return: None
     """
     app = QApplication(sys.argv)
-    init_data = data.Init()
+    init_data = data.Init()  # Instance partagee, aussi utilisee par set_app
     set_app(app)
 
+    surface_format = QSurfaceFormat.defaultFormat()  # Avant la creation des vues OpenGL
+    surface_format.setSwapInterval(init_data.get_view('swap_interval'))
+    QSurfaceFormat.setDefaultFormat(surface_format)
+
+    # Avant la creation de la fenetre, qui connecte les slots
+    functions.perf.install_profiling(((ui.MainWindow, None),
+                                      (simulation.Run, ('_time_move_mr', '_time_move_sr',
+                                                        'next_command_mr', 'next_command_sr')),
+                                      (ui.Robot, ('draw_track',)),
+                                      (functions.object, ('read_mesh', 'make_mesh', 'read_vinyl', 'make_mipmaps'))))
+
     init_data.get_window('window_title')
     window = ui.MainWindow()  # Cree la fenetre
+    startup.mark('main_window')
     window.resize(init_data.get_window('window_start_width'), init_data.get_window('window_start_height'))
     window.show()
+    startup.mark('show')
+    startup.watch_first_paint(app, window.viewer)
+    window.restore_autosave()  # Apres l'affichage : peut ouvrir une fenetre de dialogue
 
     sys.exit(app.exec())
 
@@ -24,13 +24,7 @@
 # and that you accept its terms.
 
 
-from . import CrubsRunner
-from . import element
-from . import data
-from . import functions
-from . import simulation
-from . import ui
-from . import widget
+from importlib import import_module
 
 __all__ = [
     'CrubsRunner',
@@ -39,9 +33,21 @@ __all__ = [
     'functions',
     'simulation',
     'ui',
-    'widget'
+    'widget',
+    'startup'
 ]
 
+
+def __getattr__(name: str):
+    """
+    Importe les sous-paquets a la premiere utilisation (PEP 562) pour ne pas tout charger au lancement.
+    :param name: str: Nom du sous-paquet
+    :return: module: Sous-paquet
+    """
+    if name in __all__:
+        return import_module('.' + name, __name__)
+    raise AttributeError("module {module!r} has no attribute {name!r}".format(module=__name__, name=name))
+
 __version__ = "1.1.0"
 
 __authors__ = "Membres du CRUBS : \n" \
@@ -26,8 +26,16 @@
 
 from .init import Init
 from .save import Save
+from .sequence import Sequence
+from .waypoints import Waypoints
+from . import project
+from . import program
 
 __all__ = [
     'Init',
-    'Save'
+    'Save',
+    'Sequence',
+    'Waypoints',
+    'project',
+    'program'
 ]
@@ -9,13 +9,33 @@ Ces valeurs ne changent pas pendant que l'application tourne.
 
 from PyQt5 import QtCore, QtWidgets, QtGui
 from platform import system
+from types import MappingProxyType
+from threading import Lock
 
 
 class Init:
     """
     Classe contenant toutes les valeurs utiles a CrubsRunner.
+    Une seule instance existe : Init() renvoie toujours la meme, construite au premier appel. Ses donnees sont en
+    lecture seule.
     """
-    def __init__(self):
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:  # Init() peut etre appele depuis un thread de functions.loader
+                if cls._instance is None:
+                    instance = super(Init, cls).__new__(cls)
+                    instance._build()
+                    cls._instance = instance
+        return cls._instance
+
+    def _build(self):
+        """
+        Construit les donnees. Appelee une seule fois par __new__.
+        :return: None
+        """
         self.window = {  # Donnees pour la fenetre principale
             'app_title': "CrubsRunner",
             'app_icon': "icon/icon_app.png",
@@ -27,6 +47,30 @@ class Init:
             'cursor_while_opening': QtCore.Qt.WaitCursor,
             'normal_cursor': QtCore.Qt.ArrowCursor,
 
+            'loading_title': "Chargement",
+            'loading_label': "Chargement des fichiers... ({done}/{total})",
+            'loading_cancel_btn_name': "Annuler",
+            'loading_modality': QtCore.Qt.WindowModal,
+            'loading_min_duration': 500,  # ms avant l'apparition de la fenetre de chargement
+            'loading_max_threads': QtCore.QThread.idealThreadCount(),
+
+            'cache_location': QtCore.QStandardPaths.CacheLocation,
+            'cache_folder': "cache",
+            'cache_hash_chunk': 1 << 20,  # Taille des morceaux lus pour le hash d'un fichier (octets)
+            'cache_hash_index': "hashes.json",  # Hash des fichiers deja lus, par chemin, taille et date
+            'cache_hash_index_size': 1000,  # Nombre maximal de fichiers dans l'index des hash
+            'cache_max_size': 1 << 30,  # Taille maximale des tableaux du cache (octets)
+
+            'autosave_interval': 60000,  # ms entre deux sauvegardes automatiques
+            'autosave_location': QtCore.QStandardPaths.AppDataLocation,
+            'autosave_folder': "autosave",
+            'autosave_name': "autosave.crp",
+            'autosave_restore_type': QtWidgets.QMessageBox.Question,
+            'autosave_restore_title': "Sauvegarde automatique",
+            'autosave_restore_message': "CrubsRunner ne s'est pas fermé correctement.\n"
+                                        "Voulez-vous restaurer la dernière sauvegarde automatique ?",
+            'autosave_restore_buttons': QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Yes,
+
             'new_project_name': "Nouveau",
             'new_project_status_tip': "Créer un nouveau projet",
             'new_project_shortcut': QtGui.QKeySequence.New,  # Ctrl + N
@@ -48,10 +92,20 @@ class Init:
             'save_as_project_status_tip': "Enregistrer sous le projet",
             'save_as_project_icon': "icon/icon_save_as.png",
             'save_as_project_dialog_title': "Enregistrer le projet",
-            'project_extension': "CrubsRunner project (*.crp)",
+            'project_extension': "CrubsRunner project (*.crp *.crz) ;; CrubsRunner project (*.crp) ;; "
+                                 "Archive CrubsRunner (*.crz)",
             'project_default_name': "SansNom",
 
-            'saving_file_first_line': "## Fichier de sauvegarde de projet CrubsRunner du {date}\n",
+            'project_version': 1,  # Version du format JSON des fichiers de projet
+            'project_sections': ('window', 'grid', 'board', 'main_robot', 'second_robot', 'gcrubs', 'vinyl'),
+            # Archive de projet (.crz) : fichiers copies dans l'archive (section, cle)
+            'bundle_assets': (('board', 'file'), ('vinyl', 'file'),
+                              ('main_robot', 'file'), ('main_robot', 'gcrubs_file'),
+                              ('second_robot', 'file'), ('second_robot', 'gcrubs_file')),
+            'bundle_project_name': "project.json",
+            'bundle_assets_folder': "assets",
+            'bundle_arrays_folder': "arrays",
+            'bundle_folder': "bundles",  # Dossier d'extraction dans le cache
             'window_first_line': "\n## Window\n",
             'grid_first_line': "\n## Grid\n",
             'board_first_line': "\n## Board\n",
@@ -118,6 +172,20 @@ class Init:
             'key_action_status_tip': "Choisir les touches",
             'key_action_icon': "icon/icon_key.png",
 
+            'perf_action_name': "Afficher les performances",
+            'perf_action_shortcut': QtGui.QKeySequence(QtCore.Qt.Key_F3),
+            'perf_action_status_tip': "Afficher les performances de la vue 3D",
+            'trace_action_name': "Enregistrer une trace des performances",
+            'trace_action_status_tip': "Enregistrer la duree de chaque image, a ouvrir dans chrome://tracing",
+            'trace_dialog_title': "Enregistrer la trace",
+            'trace_default_name': "trace.json",
+            'trace_extension': "Trace Chrome (*.json)",
+            'profile_action_name': "Profiler l'application",
+            'profile_action_status_tip': "Mesurer le temps passé dans chaque fonction avec cProfile",
+            'profile_dialog_title': "Enregistrer le profil",
+            'profile_default_name': "profile.prof",
+            'profile_extension': "Profil cProfile (*.prof)",
+
             'edit_action_icon': "icon/icon_edit_gcrubs.png",
             'del_btn_icon': "icon/icon_del.png",
             'key_btn_icon': 'icon/icon_key.png',
@@ -256,6 +324,10 @@ class Init:
             'remove_message_box_message': "Etes-vous sûr de vouloir supprimer le tapis ?\n"
                                           "Cette action est irréversible.",
             'remove_message_box_buttons': QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Yes,
+
+            'tile_size': 2048,  # Taille maximale d'une texture envoyee a la carte graphique (pixels)
+            'tiles_margin': 1.5,  # Marge autour de la zone visible dans laquelle les tuiles sont chargees
+            'pdf_texel_size': 0.5,  # Taille sur le plateau d'un pixel d'un tapis pdf rasterise (mm)
         }  # end self.vinyl
 
         # Contient toutes les donnees pour le robot principal et les donnees communes aux deux robots
@@ -353,9 +425,19 @@ class Init:
             # alors que le fichier gcrubs indique les deplacements a effectuer par le robot
             'convert_gcrubs_cb_name': "Convertir le gcrubs en ccrubs",
             'convert_gcrubs_checked': True,
-            'ccrubs_separator': ';;'
-
-
+            'ccrubs_separator': ';;',
+            # Fichier ccrubs binaire pour la carte du robot, ecrit en plus du texte
+            'ccrubs_binary': False,
+            'ccrubs_binary_header': b'CCRB',
+
+            # Programme binaire (.bcrubs) de la sequence, ecrit en plus du gcrubs : voir data.program
+            'program_binary': True,
+            'program_header': b'CRBP',
+            'program_version': 1,
+            'program_opcodes': {'Pause': 1, "Se deplacer en avant": 2, "Se deplacer en arriere": 3,
+                                "Tourner a droite": 4, "Tourner a gauche": 5},
+            'program_custom_opcode': 256,  # Code des autres commandes : 256 + position dans la liste des commandes
+            'program_comment': 'Commentaire',  # Commande qui n'est pas ecrite dans le programme
         }   # End self.main_robot
 
         self.second_robot = {  # Contient les donnees pour le robot secondaire
@@ -408,7 +490,22 @@ class Init:
             'coord_sys_z_color': (0., 0., 1., 1.),
 
             'min_zoom': 3000,
-            'max_zoom': 10000
+            'max_zoom': 10000,
+
+            'pan_margin': 40,  # Marge (pixels) que l'element de reference doit garder dans la vue lors du deplacement
+
+            'held_key_interval': 16,  # Periode (ms) des deplacements d'une touche maintenue, environ une image
+            'held_key_delay': 250,  # Delai (ms) avant qu'une touche maintenue ne deplace le robot en continu
+            'held_key_rate': 30,  # Nombre de pas par seconde d'une touche maintenue
+
+            'frame_interval': 16,  # Duree minimale (ms) entre deux dessins de la vue
+            'swap_interval': 1,  # Nombre de synchronisations verticales par image (0 : pas de synchronisation)
+
+            'perf_text': "FPS : {fps:.0f}\nDessin : {paint:.2f} ms\nSimulation : {tick:.2f} ms\n"
+                         "Éléments 3D : {items}\nTriangles : {triangles}",
+            'perf_style': "background-color: rgba(0, 0, 0, 150); color: white; padding: 4px;",
+            'perf_position': (10, 10),
+            'perf_refresh': 500  # Periode (ms) de mise a jour de l'affichage des performances
         }  # End self.view
 
         self.grid = {  # Contient les donnees de la grille dans le widget central
@@ -525,20 +622,66 @@ class Init:
             'time_for_refresh_estimation': 2,  # s
             # 15 parce que c'est ce qu'il fallait apres plusieurs tests, peut varier selon le pc
             # mais aucun lien direct trouve avec le reste donc bon...
-            'added_time_refresh_time': 15  # ms
+            'added_time_refresh_time': 15,  # ms
+
+            # Envoi de la sequence a la carte du robot, voir functions.stream
+            'stream_action_name': "Piloter le robot",
+            'stream_action_tip': "Envoyer la séquence du robot sélectionné à sa carte (TCP ou liaison série)",
+            'stream_dialog_title': "Piloter le robot",
+            'stream_dialog_label': "Adresse du robot (hôte:port ou port_série@débit) :",
+            'stream_address': "127.0.0.1:5000",  # Robot factice : python -m src.functions.stream
+            'stream_window': 2,  # Nombre maximal de commandes envoyees et non terminees
+            'stream_lead': 0.5,  # s d'avance maximale de l'envoi sur le debut prevu d'une commande
+            'stream_ack_timeout': 2.,  # s
+            'stream_status_message': "Robot : commande {number} / {total} terminée",
+            'stream_odometry_message': "Robot : x = {x:.0f} mm, y = {y:.0f} mm, angle = {angle:.1f}°",
+            'stream_odometry_color': (0.2, 0.6, 1., 1.),  # Chemin mesure par le robot pendant l'envoi
+            'stream_odometry_capacity': 1024,  # Positions reservees au depart, le tableau double ensuite
+            'stream_error_type': QtWidgets.QMessageBox.Warning,
+            'stream_error_title': "Erreur",
+            'stream_error_message': "La communication avec le robot s'est arrêtée : {error}",
+
+            # Comparaison d'un journal d'odometrie (t x y angle) avec la sequence, voir functions.odometry
+            'odometry_action_name': "Comparer l'odométrie",
+            'odometry_action_tip': "Afficher le chemin réel d'un essai sur le chemin prévu du robot sélectionné",
+            'odometry_dialog_title': "Ouvrir un journal d'odométrie",
+            'odometry_extension': "Journal (*.csv *.txt *.log);;Tous les fichiers (*)",
+            'odometry_height': 2,  # mm au-dessus du plateau, au-dessus des traces
+            'odometry_width': 3,  # pixels
+            'odometry_planned_color': (1., 1., 1., 0.8),
+            'odometry_colors': ((0., 0.8, 0., 1.), (1., 0.8, 0., 1.), (1., 0., 0., 1.)),  # Erreur nulle a maximale
+            'odometry_max_error': 50,  # mm, erreur de position qui prend la derniere couleur
+            'odometry_status_message': "Odométrie : erreur moyenne {mean:.0f} mm, maximale {max:.0f} mm, "
+                                       "cap {heading:.1f}°, commande la moins précise : {worst}"
         }  # End self.run
 
         self.extensions = {  # Contient toutes les extensions ouvrables par l'application
             'project': ".crp",
+            'bundle': ".crz",
             'board': ".crb",
             'robot': ".crr",
             'sequence': ".gcrubs",
             'coord_file': ".ccrubs",
+            'coord_binary_file': ".bccrubs",
+            'program': ".bcrubs",
 
             '3d_file': (".stl", ".obj", ".3mf"),
             'vinyl': (".png", ".pdf", ".jpg", ".jpeg")
         }  # End self.extensions
 
+        # Lecture seule : l'instance est partagee par toute l'application
+        for name in ('window', 'board', 'vinyl', 'main_robot', 'second_robot', 'view', 'grid', 'gcrubs', 'run',
+                     'extensions'):
+            setattr(self, name, MappingProxyType(getattr(self, name)))
+
+        # Valeurs utilisees a chaque pas de la simulation ou a chaque lecture de fichier, sans recherche dans un dict
+        self.speed_simulation_values = self.window['speed_simulation_btn_values']
+        self.timer_refresh = self.run['timer_refresh']
+        self.time_before_start = self.run['time_before_start']
+        self.position_text = self.main_robot['position_text']
+        self.invisible_coef = self.main_robot['invisible_coef']
+        self.grid_width = self.grid['width']
+
     def get_window(self, key: str):
         """
         Renvoie la donnee de la fenetre principale qui correspond a la cle.
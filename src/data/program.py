@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Programme binaire d'une sequence (.bcrubs), lu par la carte du robot et par le simulateur sans analyse de texte.
+
+Le fichier commence par un en-tete de taille fixe (HEADER) suivi d'un enregistrement de taille fixe (RECORD) par
+commande, en petit-boutiste. Chaque enregistrement contient le code de la commande, son argument (mm, degres ou
+secondes), sa duree attendue et la position du robot (repere du plateau) a la fin de la commande.
+Les codes des commandes de base sont donnes par 'program_opcodes' ; les autres commandes ont le code
+'program_custom_opcode' + leur position dans la liste des commandes.
+"""
+
+from math import cos, sin, radians
+
+import numpy as np
+
+from src import data
+
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u2'), ('record_size', '<u2'), ('count', '<u4'),
+                   ('speed', '<f4'), ('speed_rotation', '<f4'),  # mm/s et degres/s
+                   ('x', '<f4'), ('y', '<f4'), ('angle', '<f4')])  # Position de depart
+
+RECORD = np.dtype([('opcode', '<u2'), ('reserved', '<u2'), ('argument', '<f4'),
+                   ('duration', '<f4'), ('time', '<f4'),  # Duree de la commande et temps a sa fin (s)
+                   ('x', '<f4'), ('y', '<f4'), ('angle', '<f4')])  # Position a la fin de la commande
+
+
+def _commands(save_data) -> list:
+    """
+    Prepare l'analyse des lignes : pour chaque commande, son debut de texte, son code et son deplacement.
+    :param save_data: data.Save: Donnees de sauvegarde (commandes et touches)
+    :return: list: [(debut, code, (dx, dy, rz))], les debuts les plus longs en premier
+    """
+    init_data = data.Init()
+    opcodes = init_data.get_main_robot('program_opcodes')
+    keys = save_data.get_gcrubs('keys')
+    cmd_key = save_data.get_gcrubs('cmd_key')
+    # Deplacement dans le repere du robot pour chaque touche, comme dans simulation.Run.move
+    moves = {keys.get('go_up'): (0, 1, 0), keys.get('go_down'): (0, -1, 0), keys.get('go_right'): (1, 0, 0),
+             keys.get('go_left'): (-1, 0, 0), keys.get('turn_right'): (0, 0, -1), keys.get('turn_left'): (0, 0, 1)}
+
+    commands = list()
+    for index, (name, text) in enumerate(save_data.get_gcrubs('cmd_name').items()):
+        if name == init_data.get_main_robot('program_comment'):
+            continue
+        opcode = opcodes.get(name, init_data.get_main_robot('program_custom_opcode') + index)
+        move = moves.get(cmd_key.get(name), (0, 0, 0)) if cmd_key.get(name) is not None else (0, 0, 0)
+        commands.append((text.split('{')[0], opcode, move))
+    commands.sort(key=lambda command: len(command[0]), reverse=True)
+    return commands
+
+
+def moves(save_data) -> dict:
+    """
+    Renvoie le deplacement dans le repere du robot de chaque code de commande, pour rejouer un programme.
+    :param save_data: data.Save: Donnees de sauvegarde (commandes et touches)
+    :return: dict: {code: (dx, dy, rz)}
+    """
+    return {opcode: move for _, opcode, move in _commands(save_data)}
+
+
+def _number(text: str) -> float:
+    """
+    Lit le nombre au debut du texte.
+    :param text: str: Texte
+    :return: float: Nombre, 0 s'il n'y en a pas
+    """
+    end = 0
+    while end < len(text) and (text[end].isdigit() or text[end] in '.-'):
+        end += 1
+    try:
+        return float(text[:end])
+    except ValueError:
+        return 0.
+
+
+def _start(line: str) -> tuple:
+    """
+    Lit la position de depart, au format de la ligne ecrite a l'origine de la sequence.
+    :param line: str: Ligne "... x = ... mm ... y = ... mm ... angle = ... degres"
+    :return: tuple: (x, y, angle)
+    """
+    return tuple(_number(line[line.find(name) + len(name):]) for name in ("x = ", "y = ", "angle = "))
+
+
+def compile_lines(lines, save_data, speed: float, speed_rotation: float, sources=None) -> tuple:
+    """
+    Transforme les lignes d'une sequence en programme.
+    Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
+    :param lines: iterable: Lignes de la sequence
+    :param save_data: data.Save: Donnees de sauvegarde (commandes et touches)
+    :param speed: float: Vitesse de deplacement du robot (mm/s)
+    :param speed_rotation: float: Vitesse de rotation du robot (degres/s)
+    :param sources: list: Si donnee, la ligne de chaque enregistrement y est ajoutee (affichage)
+    :return: tuple: (np.array: en-tete (HEADER), np.array: enregistrements (RECORD))
+    """
+    init_data = data.Init()
+    position_text = init_data.position_text
+    pause = init_data.get_main_robot('program_opcodes').get('Pause')
+    commands = _commands(save_data)
+
+    header = np.zeros(1, dtype=HEADER)
+    records = list()
+    x, y, angle, time = 0., 0., 0., 0.
+    for line in lines:
+        if position_text in line:
+            x, y, angle = _start(line)
+            header['x'], header['y'], header['angle'] = x, y, angle
+            continue
+
+        for prefix, opcode, (dx, dy, rz) in commands:
+            if prefix and line.startswith(prefix):
+                break
+        else:  # Ligne vide, commentaire ou commande inconnue
+            continue
+
+        argument = _number(line[len(prefix):])
+        duration = 0.
+        if opcode == pause:
+            duration = argument
+        elif rz != 0:
+            duration = argument / speed_rotation if speed_rotation else 0.
+            angle = (angle + rz * argument) % 360
+        elif dx != 0 or dy != 0:
+            duration = argument / speed if speed else 0.
+            x += argument * (dx * cos(radians(angle)) - dy * sin(radians(angle)))
+            y += argument * (dx * sin(radians(angle)) + dy * cos(radians(angle)))
+        time += duration
+        records.append((opcode, 0, argument, duration, time, x, y, angle))
+        if sources is not None:
+            sources.append(line)
+
+    header['magic'] = init_data.get_main_robot('program_header')
+    header['version'] = init_data.get_main_robot('program_version')
+    header['record_size'] = RECORD.itemsize
+    header['count'] = len(records)
+    header['speed'] = speed
+    header['speed_rotation'] = speed_rotation
+    return header, np.array(records, dtype=RECORD)
+
+
+def write(file: str, header: np.array, records: np.array):
+    """
+    Ecrit un programme.
+    :param file: str: Chemin du fichier
+    :param header: np.array: En-tete renvoye par compile_lines
+    :param records: np.array: Enregistrements renvoyes par compile_lines
+    :return: None
+    """
+    with open(file, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(records.tobytes())
+
+
+def read(file: str) -> tuple:
+    """
+    Ouvre un programme. Les enregistrements sont projetes en memoire, pas copies.
+    :param file: str: Chemin du fichier
+    :return: tuple: (np.void: en-tete, np.memmap: enregistrements en lecture seule)
+    """
+    init_data = data.Init()
+    header = np.fromfile(file, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != init_data.get_main_robot('program_header'):
+        raise ValueError("Fichier de programme invalide : " + file)
+    if header['version'][0] > init_data.get_main_robot('program_version') or \
+            header['record_size'][0] != RECORD.itemsize:
+        raise ValueError("Version de programme non supportee : " + str(header['version'][0]))
+
+    count = int(header['count'][0])
+    if count == 0:
+        return header[0], np.zeros(0, dtype=RECORD)
+    return header[0], np.memmap(file, dtype=RECORD, mode='r', offset=HEADER.itemsize, shape=(count,))
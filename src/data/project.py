@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Lecture et ecriture des fichiers de projet (.crp) et de composant (.crb, .crr).
+
+Les fichiers sont au format JSON avec un numero de version. Chaque section (window, grid, board, ...) est ecrite
+directement dans le fichier, sans construire le texte complet en memoire, et la lecture se fait en une seule passe.
+Les anciens fichiers (une ligne "cle = valeur" par donnee) sont convertis a la lecture, sans eval.
+"""
+
+import ast
+import json
+import re
+
+from PyQt5 import QtCore
+import numpy as np
+
+from src import data
+
+
+def write(file: str, save_data, sections=None):
+    """
+    Ecrit les sections demandees de save_data dans le fichier.
+    :param file: str: Chemin du fichier
+    :param save_data: data.Save: Donnees du projet
+    :param sections: tuple: Sections a ecrire, toutes par defaut
+    :return: None
+    """
+    if sections is None:
+        sections = data.Init().get_window('project_sections')
+    with open(file, 'w', encoding='utf-8') as f:
+        dump(f, ((section, save_data.to_dict(section)) for section in sections))
+
+
+def dump(stream, sections):
+    """
+    Ecrit les sections dans un flux texte, une par une.
+    :param stream: io.TextIOBase: Flux dans lequel ecrire
+    :param sections: iterable: Couples (nom de la section, dictionnaire)
+    :return: None
+    """
+    init_data = data.Init()
+    stream.write('{\n"version": ' + json.dumps(init_data.get_window('project_version')) + ',\n"date": ' +
+                 json.dumps(QtCore.QDate.currentDate().toString(init_data.get_main_robot('date_format'))))
+    for section, values in sections:
+        stream.write(',\n' + json.dumps(section) + ': ')
+        json.dump(values, stream, ensure_ascii=False)
+    stream.write('\n}\n')
+
+
+def read(file: str) -> dict:
+    """
+    Lit un fichier de projet ou de composant et renvoie ses sections.
+    :param file: str: Chemin du fichier
+    :return: dict: Sections du fichier {section: {cle: valeur}}
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        return loads(f.read(), file)
+
+
+def loads(text: str, name="") -> dict:
+    """
+    Lit le contenu d'un fichier de projet et renvoie ses sections.
+    Les anciens fichiers sont convertis avec read_legacy.
+    :param text: str: Contenu du fichier
+    :param name: str: Nom du fichier, pour les messages d'erreur
+    :return: dict: Sections du fichier {section: {cle: valeur}}
+    """
+    if not text.lstrip().startswith('{'):
+        return read_legacy(text)
+
+    init_data = data.Init()
+    project = json.loads(text)
+    if not isinstance(project, dict) or not isinstance(project.get('version'), int):
+        raise ValueError("Fichier de projet sans version : " + name)
+    if project.get('version') > init_data.get_window('project_version'):
+        raise ValueError("Version de projet non supportee : " + str(project.get('version')))
+
+    return {section: project.get(section) for section in init_data.get_window('project_sections')
+            if isinstance(project.get(section), dict)}
+
+
+def read_legacy(text: str) -> dict:
+    """
+    Convertit le contenu d'un ancien fichier (sections "## ..." puis une ligne "cle = valeur" par donnee).
+    :param text: str: Contenu du fichier
+    :return: dict: Sections du fichier {section: {cle: valeur}}
+    """
+    init_data = data.Init()
+    headers = {init_data.get_window(section + '_first_line').strip(): section
+               for section in init_data.get_window('project_sections')}
+
+    project = dict()
+    section = None
+    for line in text.splitlines():
+        if line.startswith('##'):
+            section = headers.get(line.strip())
+            if section is not None:
+                project[section] = dict()
+        elif section is not None and ' = ' in line:
+            key, value = line.split(' = ', 1)
+            project[section][key] = _legacy_value(value)
+
+    if not project:
+        raise ValueError("Aucune section trouvee dans le fichier")
+    return project
+
+
+def _qt_name(match) -> str:
+    """
+    Remplace un nom de constante Qt (QtCore.Qt.Key_Up) par sa valeur entiere.
+    :param match: re.Match: Nom trouve
+    :return: str: Valeur entiere
+    """
+    value = getattr(QtCore.Qt, match.group(1), None)
+    return match.group(0) if value is None else str(int(value))
+
+
+def _legacy_value(value: str):
+    """
+    Convertit une valeur d'un ancien fichier. Les valeurs etaient ecrites entre quotes, sauf pour gcrubs,
+    et les chaines non evaluables (chemins, axes) etaient gardees telles quelles.
+    :param value: str: Valeur ecrite dans le fichier
+    :return: any: Valeur lue
+    """
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        value = value[1:-1]
+    value = re.sub(r"(?:PyQt5\.)?QtCore\.Qt\.(\w+)", _qt_name, value)
+
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        pass
+
+    if value.startswith('[') and value.endswith(']'):  # str d'un np.ndarray : "[0. 0. 0.]"
+        try:
+            return np.array(value[1:-1].split(), dtype='float')
+        except ValueError:
+            pass
+    return value
@@ -251,60 +251,68 @@ class Save:
         if value != dict():  # Si c'est pas un dico vide
             self.gcrubs[key] = value
 
-    def save(self, to_save: str):
+    def to_dict(self, section: str) -> dict:
         """
-        Renvoie sous forme de string le dictionnaire to_save.
-        Si to_save n'est pas dans la liste des dictionnaires, renvoie "".
+        Renvoie une copie de la section sous une forme ecrivable en JSON (np.ndarray et tuple deviennent des listes).
+        Renvoie un dictionnaire vide si section n'est pas dans la liste des dictionnaires.
 
         Liste des dictionnaires :
             window, board, main_robot, second_robot, grid, gcrubs, vinyl
 
-        :param to_save: str: Dictionnaire que l'on veut sous format str
-        :return: str: Dictionnaire sous format str
-        """
-        ans = ""
-        if to_save == 'window':
-            ans = self.init_data.get_window('window_first_line')
-            for key, value in zip(self.window.keys(), self.window.values()):
-                ans += str(key) + " = '" + str(value) + "'\n"
-
-        elif to_save == 'board':
-            ans = self.init_data.get_window('board_first_line')
-            for key, value in zip(self.board.keys(), self.board.values()):
-                ans += str(key) + " = '" + str(value) + "'\n"
-
-        elif to_save == 'main_robot':
-            ans = self.init_data.get_window('main_robot_first_line')
-            for key, value in zip(self.main_robot.keys(), self.main_robot.values()):
-                if key == 'sequence':
-                    continue
-                else:
-                    ans += str(key) + " = '" + str(value) + "'\n"
-
-        elif to_save == 'second_robot':
-            ans = self.init_data.get_window('second_robot_first_line')
-            for key, value in zip(self.second_robot.keys(), self.second_robot.values()):
-                if key == 'sequence':
-                    continue
-                else:
-                    ans += str(key) + " = '" + str(value) + "'\n"
-
-        elif to_save == 'grid':
-            ans = self.init_data.get_window('grid_first_line')
-            for key, value in zip(self.grid.keys(), self.grid.values()):
-                ans += str(key) + " = '" + str(value) + "'\n"
-
-        elif to_save == 'gcrubs':
-            ans = self.init_data.get_window('gcrubs_first_line')
-            for key, value in zip(self.gcrubs.keys(), self.gcrubs.values()):
-                ans += str(key) + " = " + str(value) + "\n"
-
-        elif to_save == 'vinyl':
-            ans = self.init_data.get_window('vinyl_first_line')
-            for key, value in zip(self.vinyl.keys(), self.vinyl.values()):
-                ans += str(key) + " = '" + str(value) + "'\n"
-
-        return ans
+        :param section: str: Dictionnaire que l'on veut
+        :return: dict: Copie du dictionnaire
+        """
+        return {key: self._to_json(value) for key, value in self._section(section).items() if key != 'sequence'}
+
+    def from_dict(self, section: str, values: dict):
+        """
+        Definit les valeurs d'une section lue dans un fichier.
+        Les listes sont reconverties dans le type de la valeur par defaut (tuple ou np.ndarray).
+        :param section: str: Dictionnaire a modifier
+        :param values: dict: Valeurs lues
+        :return: None
+        """
+        setter = getattr(self, 'set_' + section, None)
+        if setter is None or section not in self.init_data.get_window('project_sections'):
+            return
+
+        current = self._section(section)
+        for key, value in values.items():
+            default = current.get(key)
+            if isinstance(default, np.ndarray) and isinstance(value, (list, tuple, np.ndarray)):
+                value = np.array(value, dtype=default.dtype)
+            elif isinstance(default, tuple) and isinstance(value, list):
+                value = tuple(value)
+            setter(key, value)
+
+    def _section(self, section: str) -> dict:
+        """
+        Renvoie le dictionnaire correspondant a section, ou un dictionnaire vide.
+        :param section: str: Nom du dictionnaire
+        :return: dict: Dictionnaire
+        """
+        if section in self.init_data.get_window('project_sections'):
+            return getattr(self, section)
+        return dict()
+
+    @staticmethod
+    def _to_json(value):
+        """
+        Convertit une valeur en type ecrivable en JSON.
+        :param value: any: Valeur a convertir
+        :return: any: Valeur convertie
+        """
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, (list, tuple)):
+            return [Save._to_json(v) for v in value]
+        if isinstance(value, dict):
+            return {k: Save._to_json(v) for k, v in value.items()}
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, int) and not isinstance(value, bool):
+            return int(value)  # Les enums de Qt (touches) sont des int
+        return value
 
     def get_len_cmd(self) -> int:
         """
@@ -313,34 +321,6 @@ class Save:
         """
         return len(self.gcrubs.get('cmd_name'))
 
-    def get_len(self, dictionary: str) -> int:
-        """
-        Renvoie le nombre d'elements pour chaque dictionnaire.
-        Renvoie 0 si ce n'est pas un des dictionnaires.
-
-        Liste des dictionnaires :
-            window, board, main_robot, second_robot, grid, gcrubs, vinyl
-
-        :param dictionary: str: Dictionnaire dont on veut le nombre d'elements
-        :return: int : Nombre d'element du dictionnaire
-        """
-        if dictionary == 'window':
-            return len(self.window)
-        elif dictionary == 'board':
-            return len(self.board)
-        elif dictionary == 'main_robot':
-            return len(self.main_robot)
-        elif dictionary == 'second_robot':
-            return len(self.second_robot)
-        elif dictionary == 'grid':
-            return len(self.grid)
-        elif dictionary == 'gcrubs':
-            return len(self.gcrubs)
-        elif dictionary == 'vinyl':
-            return len(self.vinyl)
-        else:
-            return 0
-
     def set_settings(self, key: str, value):
         """
         Enregistre value a key
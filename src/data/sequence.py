@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la classe Sequence, modele de la sequence d'un robot.
+La liste des lignes est la reference ; le document affiche est modifie bloc par bloc, sans etre reecrit en entier.
+"""
+
+from PyQt5 import QtGui
+
+
+class Sequence:
+    """
+    Lignes de la sequence d'un robot, affichees dans un QTextDocument.
+    Les modifications faites a la main dans le document sont prises en compte au prochain acces aux lignes.
+    L'historique du document est garde pour annuler les modifications faites a la main (Ctrl + Z dans le texte).
+    """
+
+    def __init__(self, document: QtGui.QTextDocument):
+        """
+        Constructeur de Sequence.
+        :param document: QtGui.QTextDocument: Document dans lequel la sequence est affichee
+        """
+        self.document = document
+        self.lines = list()
+        self.editing = False  # Modification du document en cours par le modele
+        self.dirty = False  # Document modifie a la main, lines est a relire
+
+        self.document.contentsChange.connect(self._contents_change)
+
+    def _contents_change(self, position: int, removed: int, added: int):
+        """
+        Slot appele a chaque modification du document.
+        :param position: int: Position de la modification
+        :param removed: int: Nombre de caracteres retires
+        :param added: int: Nombre de caracteres ajoutes
+        :return: None
+        """
+        if not self.editing:
+            self.dirty = True
+
+    def _sync(self):
+        """
+        Relit les lignes depuis le document s'il a ete modifie a la main.
+        :return: None
+        """
+        if self.dirty:
+            text = self.document.toPlainText()
+            self.lines = text.split('\n') if text else list()
+            self.dirty = False
+
+    def get_lines(self) -> list:
+        """
+        Renvoie les lignes de la sequence.
+        :return: list: Lignes
+        """
+        self._sync()
+        return self.lines
+
+    def get_text(self) -> str:
+        """
+        Renvoie le texte de la sequence.
+        :return: str: Texte
+        """
+        return '\n'.join(self.get_lines())
+
+    def set_text(self, text: str):
+        """
+        Remplace toute la sequence.
+        :param text: str: Texte
+        :return: None
+        """
+        self.editing = True
+        self.document.setPlainText(text)
+        self.editing = False
+        self.lines = text.split('\n') if text else list()
+        self.dirty = False
+
+    def set_lines(self, lines: list):
+        """
+        Remplace toute la sequence.
+        :param lines: list: Lignes
+        :return: None
+        """
+        self.set_text('\n'.join(lines))
+
+    def clear(self):
+        """
+        Vide la sequence.
+        :return: None
+        """
+        self.set_text("")
+
+    def append(self, line: str):
+        """
+        Ajoute une ligne a la fin de la sequence.
+        :param line: str: Ligne
+        :return: None
+        """
+        self._sync()
+        cursor = QtGui.QTextCursor(self.document)
+        cursor.movePosition(QtGui.QTextCursor.End)
+        self.editing = True
+        cursor.beginEditBlock()  # Une seule etape dans l'historique du document
+        if self.lines:
+            cursor.insertBlock()
+        cursor.insertText(line)
+        cursor.endEditBlock()
+        self.editing = False
+        self.lines.extend(line.split('\n'))
+
+    def replace_last(self, line: str):
+        """
+        Remplace la derniere ligne de la sequence, ou l'ajoute si la sequence est vide.
+        Le remplacement est fusionne avec la modification precedente dans l'historique du document : une touche
+        maintenue ne donne qu'une etape a annuler.
+        :param line: str: Nouvelle ligne
+        :return: None
+        """
+        self._sync()
+        if not self.lines:
+            self.append(line)
+            return
+
+        cursor = QtGui.QTextCursor(self.document.lastBlock())
+        cursor.movePosition(QtGui.QTextCursor.EndOfBlock, QtGui.QTextCursor.KeepAnchor)
+        self.editing = True
+        cursor.joinPreviousEditBlock()
+        cursor.insertText(line)
+        cursor.endEditBlock()
+        self.editing = False
+        self.lines[-1] = line
+
+    def pop(self) -> str:
+        """
+        Retire la derniere ligne de la sequence.
+        :return: str: Ligne retiree, None si la sequence est vide
+        """
+        self._sync()
+        if not self.lines:
+            return None
+
+        cursor = QtGui.QTextCursor(self.document.lastBlock())
+        cursor.select(QtGui.QTextCursor.BlockUnderCursor)  # Avec le retour a la ligne qui la precede
+        self.editing = True
+        cursor.removeSelectedText()
+        self.editing = False
+        return self.lines.pop()
+
+    @staticmethod
+    def read_file(file: str, chunk_size=1 << 16):
+        """
+        Lit un fichier sequentiel par blocs et donne ses lignes une par une, sans retour a la ligne.
+        Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
+        :param file: str: Chemin du fichier
+        :param chunk_size: int: Nombre de caracteres lus a chaque fois
+        :return: generator: Lignes du fichier
+        """
+        with open(file, 'r') as f:
+            rest = ''
+            for chunk in iter(lambda: f.read(chunk_size), ''):
+                lines = (rest + chunk).split('\n')
+                rest = lines.pop()  # Ligne pas encore terminee
+                yield from lines
+            if rest:
+                yield rest
+
+    def __len__(self) -> int:
+        """
+        Renvoie le nombre de lignes.
+        :return: int: Nombre de lignes
+        """
+        return len(self.get_lines())
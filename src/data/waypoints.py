@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la classe Waypoints, points de passage d'un robot (contenu des fichiers ccrubs).
+Les points sont gardes dans un tableau numpy agrandi par doublement : ajouter, remplacer ou retirer le dernier point
+ne recopie pas les precedents. Le texte n'est genere qu'a l'enregistrement.
+"""
+
+import numpy as np
+
+from src import data
+
+
+class Waypoints:
+    """
+    Tableau des points de passage (x, y) en mm, avec l'indice de la ligne de la sequence de chaque point.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Constructeur de Waypoints.
+        :param capacity: int: Nombre de points reserves au depart
+        """
+        self.points = np.empty((capacity, 2), dtype='float')
+        self.commands = np.empty(capacity, dtype=np.int64)  # Ligne de la sequence qui a cree le point
+        self.length = 0
+
+    def __len__(self) -> int:
+        """
+        Renvoie le nombre de points.
+        :return: int: Nombre de points
+        """
+        return self.length
+
+    def _reserve(self, length: int):
+        """
+        Agrandit les tableaux pour contenir au moins length points.
+        :param length: int: Nombre de points a contenir
+        :return: None
+        """
+        if length <= len(self.points):
+            return
+        capacity = max(length, 2 * len(self.points))
+        points = np.empty((capacity, 2), dtype=self.points.dtype)
+        points[:self.length] = self.points[:self.length]
+        commands = np.empty(capacity, dtype=self.commands.dtype)
+        commands[:self.length] = self.commands[:self.length]
+        self.points = points
+        self.commands = commands
+
+    def append(self, x: float, y: float, command=-1):
+        """
+        Ajoute un point a la fin.
+        :param x: float: Coordonnee x (mm)
+        :param y: float: Coordonnee y (mm)
+        :param command: int: Indice de la ligne de la sequence, -1 si aucune
+        :return: None
+        """
+        self._reserve(self.length + 1)
+        self.points[self.length] = x, y
+        self.commands[self.length] = command
+        self.length += 1
+
+    def replace_last(self, x: float, y: float):
+        """
+        Remplace le dernier point, ou l'ajoute s'il n'y en a pas.
+        :param x: float: Coordonnee x (mm)
+        :param y: float: Coordonnee y (mm)
+        :return: None
+        """
+        if self.length == 0:
+            self.append(x, y)
+        else:
+            self.points[self.length - 1] = x, y
+
+    def pop(self) -> np.array:
+        """
+        Retire le dernier point.
+        :return: np.array: Point retire (copie), None s'il n'y en a pas
+        """
+        if self.length == 0:
+            return None
+        self.length -= 1
+        return self.points[self.length].copy()
+
+    def clear(self):
+        """
+        Retire tous les points.
+        :return: None
+        """
+        self.length = 0
+
+    def get_points(self) -> np.array:
+        """
+        Renvoie les points. Le tableau renvoye est une vue, valable jusqu'a la prochaine modification.
+        :return: np.array: Tableau (nombre de points, 2)
+        """
+        return self.points[:self.length]
+
+    def get_commands(self) -> np.array:
+        """
+        Renvoie l'indice de la ligne de la sequence de chaque point.
+        :return: np.array: Tableau (nombre de points,)
+        """
+        return self.commands[:self.length]
+
+    def to_text(self) -> str:
+        """
+        Renvoie le contenu du fichier ccrubs : une ligne "x;;y" par point, en mm arrondis.
+        :return: str: Texte
+        """
+        separator = data.Init().get_main_robot('ccrubs_separator')
+        rounded = np.rint(self.get_points()).astype(np.int64)
+        return '\n'.join(str(x) + separator + str(y) for x, y in rounded.tolist())
+
+    def to_bytes(self) -> bytes:
+        """
+        Renvoie le contenu du fichier ccrubs binaire pour la carte du robot :
+        l'en-tete, le nombre de points (uint32) puis les points (int32 x, int32 y), en mm arrondis, petit-boutiste.
+        :return: bytes: Contenu
+        """
+        header = data.Init().get_main_robot('ccrubs_binary_header')
+        rounded = np.rint(self.get_points()).astype('<i4')
+        return header + np.uint32(self.length).astype('<u4').tobytes() + rounded.tobytes()
@@ -28,7 +28,6 @@
 Fichier contenant la classe Board, partie objet.
 """
 
-from src import functions
 from src import element
 from src import ui
 
@@ -49,7 +48,7 @@ class Board(element.CoordSys):
         self.parent = parent
         self.file = str()
         self.name = self.init_data.get_board('name')
-        self.window = ui.Board(self.parent, self.save_data, self)
+        self.window = None  # Fenetre des proprietes, creee a la premiere utilisation (voir get_window)
         self.axis_angle = 0
         self.offset = 0
         self.is_updated = False
@@ -60,7 +59,16 @@ class Board(element.CoordSys):
         Cree la fenetre de proprietes du plateau.
         :return: None
         """
-        self.window.properties_window()
+        self.get_window().properties_window()
+
+    def get_window(self):
+        """
+        Renvoie la fenetre des proprietes du plateau. Elle est creee au premier appel.
+        :return: ui.Board: window
+        """
+        if self.window is None:
+            self.window = ui.Board(self.parent, self.save_data, self)
+        return self.window
 
     def get_axis(self) -> list:
         """
@@ -81,17 +89,16 @@ class Board(element.CoordSys):
         elif axis == 'y':
             self.axis[1] = int(value)
 
-    def update_(self):
+    def update_(self, loaded=True):
         """
         Met a jour les donnees du plateau a partir des donnees de sauvegarde.
+        :param loaded: bool: False si le fichier 3D n'a pas pu etre lu
         :return: None
         """
-        if self.file == '':
-            self.file = self.save_data.get_board('file')
-            if not functions.object.show_mesh(self):
-                self.file = ''
-                self.remove(False)
-                return
+        if not loaded:
+            self.file = ''
+            self.remove(False)
+            return
 
         self.setColor(self.save_data.get_board('color'))
         self.set_edge_color(self.save_data.get_board('edge_color'))
@@ -102,27 +109,15 @@ class Board(element.CoordSys):
         self.translate(*self.axis, self.offset)
 
         self.axis_angle = self.save_data.get_board('angle_rotation')
-        if self.save_data.get_board('axis_rotation') == 'x':
-            self.window.axis_rotation_rb_x.setChecked(True)
-            self.window.axis_rotation_rb_y.setChecked(False)
-            self.window.axis_rotation_rb_z.setChecked(False)
-        elif self.save_data.get_board('axis_rotation') == 'y':
-            self.window.axis_rotation_rb_x.setChecked(False)
-            self.window.axis_rotation_rb_y.setChecked(True)
-            self.window.axis_rotation_rb_z.setChecked(False)
-        elif self.save_data.get_board('axis_rotation') == 'z':
-            self.window.axis_rotation_rb_x.setChecked(False)
-            self.window.axis_rotation_rb_y.setChecked(False)
-            self.window.axis_rotation_rb_z.setChecked(True)
-
         if self.file == "":
             self.remove(False)
 
         if not self.is_updated:  # Si le plateau n'a pas deja ete mis a jour
             self.is_updated = True
-            self.rotate(self.axis_angle, int(self.window.axis_rotation_rb_x.isChecked()),
-                        int(self.window.axis_rotation_rb_y.isChecked()),
-                        int(self.window.axis_rotation_rb_z.isChecked()), local=True)
+            # Axe lu dans les donnees : la fenetre des proprietes n'est creee qu'a sa premiere ouverture,
+            # ou elle coche le bon axe (voir ui.Board.properties_window)
+            axis = self.save_data.get_board('axis_rotation')
+            self.rotate(self.axis_angle, int(axis == 'x'), int(axis == 'y'), int(axis == 'z'), local=True)
 
     def remove(self, message: bool):
         """
@@ -130,7 +125,7 @@ class Board(element.CoordSys):
         :param message: bool: Si True, affiche un message
         :return: None
         """
-        self.window.remove(message)
+        self.get_window().remove(message)
 
     def get_axis_angle(self) -> int:
         """
@@ -49,8 +49,24 @@ class CoordSys(gl.GLMeshItem):
         self.element_type = ""
         self.dimensions = np.zeros(shape=3, dtype="float")
         self.min_max = np.zeros(shape=(3, 2), dtype="float")
+        self.load_token = None  # Lecture en arriere-plan en cours (voir functions.object.show_mesh_async)
         self.setVisible(False)
 
+    def set_load_token(self, token):
+        """
+        Definit la lecture en arriere-plan en cours pour l'element (voir functions.object).
+        :param token: object: Jeton de la lecture, None s'il n'y en a pas
+        :return: None
+        """
+        self.load_token = token
+
+    def get_load_token(self):
+        """
+        Renvoie le jeton de la lecture en arriere-plan en cours pour l'element.
+        :return: object: Jeton de la lecture, None s'il n'y en a pas
+        """
+        return self.load_token
+
     def set_file(self, file: str):
         """
         Definit le fichier 3D de l'element.
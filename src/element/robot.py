@@ -32,7 +32,6 @@ from PyQt5 import QtCore
 from math import cos, sin, radians
 
 from src import element
-from src import functions
 from src import ui
 
 
@@ -74,7 +73,6 @@ class Robot(element.Board):
             self.speed = self.save_data.get_second_robot('speed')
             self.speed_rotation = self.save_data.get_second_robot('speed_rotation')
             self.name = self.init_data.get_second_robot('name')
-        self.window = ui.Robot(self.parent, self.save_data, self)
 
     def set_sequence(self, sequence: str):
         """
@@ -183,11 +181,21 @@ class Robot(element.Board):
         """
         return self.key
 
+    def get_sequence_text(self) -> str:
+        """
+        Renvoie la sequence en cours d'edition, sans creer la fenetre des proprietes.
+        :return: str: Sequence de la fenetre si elle existe, sinon la sequence enregistree
+        """
+        # La fenetre du robot n'existe pas tant qu'elle n'a pas ete ouverte ou qu'une sequence n'a pas ete lue
+        return self.sequence if self.window is None else self.window.get_sequence_text()
+
     def get_window(self):
         """
-        Renvoie la fenetre des proprietes du robot.
+        Renvoie la fenetre des proprietes du robot. Elle est creee au premier appel.
         :return: ui.Robot: window
         """
+        if self.window is None:
+            self.window = ui.Robot(self.parent, self.save_data, self)
         return self.window
 
     def set_moving(self, dx=0., dy=0., rz=0.):
@@ -202,20 +210,17 @@ class Robot(element.Board):
         self.moving[1] += dy
         self.moving[2] += rz
 
-    def update_(self):
+    def update_(self, loaded=True, gcrubs=None):
         """
         Met les donnees du robot a jour.
+        :param loaded: bool: False si le fichier 3D n'a pas pu etre lu
+        :param gcrubs: list: Lignes du fichier sequentiel deja lues. Si None, le fichier est lu ici.
         :return: None
         """
-        if self.file == '':
-            if self.main_robot:
-                self.file = self.save_data.get_main_robot('file')
-            else:
-                self.file = self.save_data.get_second_robot('file')
-            if not functions.object.show_mesh(self):
-                self.file = ''
-                self.remove(False)
-                return
+        if not loaded:
+            self.file = ''
+            self.remove(False)
+            return
 
         if self.main_robot:
             self.setColor(self.save_data.get_main_robot('color'))
@@ -225,19 +230,6 @@ class Robot(element.Board):
             self.speed = self.save_data.get_main_robot('speed')
             self.speed_rotation = self.save_data.get_main_robot('speed_rotation')
             self.gcrubs_file = self.save_data.get_main_robot('gcrubs_file')
-
-            if self.save_data.get_main_robot('axis_rotation') == 'x':
-                self.window.axis_rotation_rb_x.setChecked(True)
-                self.window.axis_rotation_rb_y.setChecked(False)
-                self.window.axis_rotation_rb_z.setChecked(False)
-            elif self.save_data.get_main_robot('axis_rotation') == 'y':
-                self.window.axis_rotation_rb_x.setChecked(False)
-                self.window.axis_rotation_rb_y.setChecked(True)
-                self.window.axis_rotation_rb_z.setChecked(False)
-            elif self.save_data.get_main_robot('axis_rotation') == 'z':
-                self.window.axis_rotation_rb_x.setChecked(False)
-                self.window.axis_rotation_rb_y.setChecked(False)
-                self.window.axis_rotation_rb_z.setChecked(True)
         else:
             self.setColor(self.save_data.get_second_robot('color'))
             self.set_edge_color(self.save_data.get_second_robot('edge_color'))
@@ -247,32 +239,23 @@ class Robot(element.Board):
             self.speed_rotation = self.save_data.get_second_robot('speed_rotation')
             self.gcrubs_file = self.save_data.get_second_robot('gcrubs_file')
 
-            if self.save_data.get_second_robot('axis_rotation') == 'x':
-                self.window.axis_rotation_rb_x.setChecked(True)
-                self.window.axis_rotation_rb_y.setChecked(False)
-                self.window.axis_rotation_rb_z.setChecked(False)
-            elif self.save_data.get_second_robot('axis_rotation') == 'y':
-                self.window.axis_rotation_rb_x.setChecked(False)
-                self.window.axis_rotation_rb_y.setChecked(True)
-                self.window.axis_rotation_rb_z.setChecked(False)
-            elif self.save_data.get_second_robot('axis_rotation') == 'z':
-                self.window.axis_rotation_rb_x.setChecked(False)
-                self.window.axis_rotation_rb_y.setChecked(False)
-                self.window.axis_rotation_rb_z.setChecked(True)
-
         if self.file == "":
             self.remove(False)
 
         if self.gcrubs_file != "":
-            self.get_window().import_gcrubs(self.gcrubs_file)
+            self.get_window().import_gcrubs(self.gcrubs_file, gcrubs)
             self.get_window().draw_track(self.get_sequence())
             self.get_window().track_visible(True)
 
         if not self.is_updated:  # Si le robot n'a pas deja ete mis a jour
             self.is_updated = True
-            self.rotate(self.axis_angle, int(self.window.axis_rotation_rb_x.isChecked()),
-                        int(self.window.axis_rotation_rb_y.isChecked()),
-                        int(self.window.axis_rotation_rb_z.isChecked()), local=True)
+            # Axe lu dans les donnees : la fenetre des proprietes n'est creee qu'a sa premiere ouverture,
+            # ou elle coche le bon axe (voir ui.Robot.properties_window)
+            if self.main_robot:
+                axis = self.save_data.get_main_robot('axis_rotation')
+            else:
+                axis = self.save_data.get_second_robot('axis_rotation')
+            self.rotate(self.axis_angle, int(axis == 'x'), int(axis == 'y'), int(axis == 'z'), local=True)
 
             self.translate(0, 0, self.offset)
 
@@ -387,7 +370,7 @@ class Robot(element.Board):
         Met a jour la sequence_list de la fenetre de proprietes
         :return: None
         """
-        self.window.sequence_list_update()
+        self.get_window().sequence_list_update()
 
     def go_to_origin(self):
         """
@@ -29,8 +29,10 @@ Fichier contenant la classe ImageItem.
 """
 import numpy as np
 from time import time
+from math import tan, radians, log2
 import pyqtgraph.opengl as gl
-from PyQt5 import QtWidgets
+from OpenGL import GL
+from PyQt5 import QtWidgets, QtCore, QtGui
 
 from src import functions
 
@@ -38,6 +40,8 @@ from src import functions
 class Vinyl(gl.GLImageItem):
     """
     Classe concernant le tapis du plateau.
+    Le tapis ne dessine rien lui-meme : il est decoupe en tuiles (VinylTile) prises dans une pyramide de mipmaps.
+    Seules les tuiles du niveau adapte au zoom et proches de la zone visible sont envoyees a la carte graphique.
     """
 
     def __init__(self, parent, save_data, array=None, file=""):
@@ -48,7 +52,7 @@ class Vinyl(gl.GLImageItem):
         :param array: numpy.array: Tableau 3D
         :param file: str: Nom du fichier
         """
-        super(Vinyl, self).__init__(array)
+        super(Vinyl, self).__init__(None)  # Les pixels sont dans les tuiles
 
         self.pixel_height = len(array) if array is not None else 0
         self.pixel_width = len(array[0]) if array is not None else 0
@@ -61,28 +65,116 @@ class Vinyl(gl.GLImageItem):
         self.save_data.set_vinyl('pixel_width', self.pixel_width)
         self.time = 0.
         self.setVisible(False)
-        self.array = None
         self.one_placement = True
+        self.mipmaps = list()  # Niveaux du tapis, du plus precis au plus grossier
+        self.tiles = dict()  # (niveau, ligne, colonne): VinylTile
+        self.tiles_pending = False
+        self.load_token = None  # Lecture en arriere-plan en cours (voir functions.object.show_vinyl_async)
 
-    def _updateTexture(self):
+        if array is not None:
+            self.set_array(array)
+
+    def paint(self):
         """
-        Insert un element. Cette methode n'a pas a etre appelee.
+        Verifie que les tuiles affichees correspondent a la vue. Cette methode n'a pas a etre appelee.
         :return: None
         """
-        # noinspection PyBroadException
-        try:
-            super(Vinyl, self)._updateTexture()
-            del self.array
-            # Met a la bonne taille
-            width = self.save_data.get_init_data().get_grid('width')  # Longueur du plateau
-            self.scale(width / self.get_pixel_width(), width / self.get_pixel_width(), width / self.get_pixel_width())
-        except Exception:
-            # Dans le cas d'une vm Windows, probleme a l'affichage du tapis.
-            # Ceci divise par 2 les dimensions du tapis (en terme de points de couleur)
-            self.array = np.delete(self.array, range(0, len(self.array), 2), axis=0)
-            self.array = np.delete(self.array, range(0, len(self.array[0]), 2), axis=1)
-            self.set_array(self.array)
-            self._updateTexture()
+        if not self.mipmaps or self.tiles_pending:
+            return
+
+        if set(self.tiles) != self._visible_tiles():
+            # Les tuiles ne sont pas creees pendant le dessin de la vue
+            self.tiles_pending = True
+            QtCore.QTimer.singleShot(0, self._update_tiles)
+
+    def _visible_tiles(self) -> set:
+        """
+        Renvoie les tuiles a afficher : le niveau le plus grossier en entier et, si la vue est assez proche,
+        les tuiles du niveau adapte au zoom qui sont dans la zone visible.
+        :return: set: {(niveau, ligne, colonne)}
+        """
+        view = self.view()
+        init_data = self.save_data.get_init_data()
+        tile_size = init_data.get_vinyl('tile_size')
+        top = len(self.mipmaps) - 1
+        tiles = {(top, 0, 0)}
+
+        # Taille sur le plateau d'un pixel de l'ecran et d'un pixel du tapis, au centre de la vue (mm)
+        half_view = view.opts['distance'] * tan(radians(view.opts['fov']) / 2)
+        screen_pixel = 2 * half_view / max(view.width(), 1)
+        vinyl_pixel = init_data.get_grid('width') / self.pixel_width
+        level = min(int(log2(max(screen_pixel / vinyl_pixel, 1))), top)
+        if level == top:
+            return tiles
+
+        center = view.opts['center']
+        radius = init_data.get_vinyl('tiles_margin') * half_view
+        transform = self.transform()
+        factor = 2 ** level
+        height, width = self.mipmaps[level].shape[:2]
+        for row in range(0, height, tile_size):
+            for column in range(0, width, tile_size):
+                # Une colonne c de l'image est dessinee en y = largeur - c (voir VinylTile)
+                corners = [transform.map(QtGui.QVector3D(x * factor, self.pixel_width - y * factor, 0))
+                           for x in (row, min(row + tile_size, height))
+                           for y in (column, min(column + tile_size, width))]
+                if min(c.x() for c in corners) < center.x() + radius and \
+                        max(c.x() for c in corners) > center.x() - radius and \
+                        min(c.y() for c in corners) < center.y() + radius and \
+                        max(c.y() for c in corners) > center.y() - radius:
+                    tiles.add((level, row, column))
+        return tiles
+
+    def _update_tiles(self):
+        """
+        Cree les tuiles qui deviennent visibles et libere celles qui ne le sont plus.
+        :return: None
+        """
+        self.tiles_pending = False
+        if not self.mipmaps or self.view() is None:
+            return
+
+        tile_size = self.save_data.get_init_data().get_vinyl('tile_size')
+        visible = self._visible_tiles()
+        for key in set(self.tiles) - visible:
+            self._remove_tile(key)
+        for level, row, column in visible - set(self.tiles):
+            # Seule la tuile est lue, le niveau peut etre projete en memoire depuis le cache
+            array = self.mipmaps[level][row:row + tile_size, column:column + tile_size]
+            self.tiles[(level, row, column)] = VinylTile(self, array, level, row, column)
+
+    def _remove_tile(self, key: tuple):
+        """
+        Retire une tuile et libere sa texture.
+        :param key: tuple: (niveau, ligne, colonne)
+        :return: None
+        """
+        tile = self.tiles.pop(key)
+        view = tile.view()
+        tile.setParentItem(None)
+        if view is not None:
+            view.removeItem(tile)
+            if tile.texture is not None:  # Texture creee au premier dessin de la tuile
+                view.makeCurrent()
+                GL.glDeleteTextures([tile.texture])
+
+    def clear_tiles(self):
+        """
+        Retire toutes les tuiles du tapis.
+        :return: None
+        """
+        for key in list(self.tiles):
+            self._remove_tile(key)
+
+    def remove(self):
+        """
+        Retire le tapis et ses tuiles de la vue et libere leurs textures.
+        :return: None
+        """
+        self.setVisible(False)
+        self.clear_tiles()
+        if self.view() is not None:
+            self.view().removeItem(self)
 
     def get_pixel_height(self) -> int:
         """
@@ -98,6 +190,28 @@ class Vinyl(gl.GLImageItem):
         """
         return self.pixel_width
 
+    def get_min_max(self) -> np.array:
+        """
+        Renvoie les coordonnees minimales et maximales du tapis selon chaque axe, dans son repere local.
+        :return: np.array: [[min x, max x], [min y, max y], [min z, max z]] contient des flottants
+        """
+        return np.array([[0., self.pixel_height], [0., self.pixel_width], [0., 0.]])
+
+    def set_load_token(self, token):
+        """
+        Definit la lecture en arriere-plan en cours pour l'element (voir functions.object).
+        :param token: object: Jeton de la lecture, None s'il n'y en a pas
+        :return: None
+        """
+        self.load_token = token
+
+    def get_load_token(self):
+        """
+        Renvoie le jeton de la lecture en arriere-plan en cours pour l'element.
+        :return: object: Jeton de la lecture, None s'il n'y en a pas
+        """
+        return self.load_token
+
     def set_file(self, file: str):
         """
         Definit le fichier du tapis.
@@ -116,17 +230,23 @@ class Vinyl(gl.GLImageItem):
 
     def set_array(self, array: np.array):
         """
-        Definit le tableau de donnees s'il n'a pas ete definit auparavant. Sinon ne fait rien.
+        Definit l'image du tapis. Les mipmaps sont generees ici, preferer set_mipmaps avec des mipmaps deja pretes.
         :param array: numpy.array: Tableau 3D
         :return: None
         """
-        if array.shape[2] == 3:  # Si pas de canal alpha, on l'ajoute et l'initialise a 255
-            array = np.concatenate((array, np.full((array.shape[0], array.shape[1], 1), 255)), axis=2)
+        self.set_mipmaps(functions.object.make_mipmaps(array,
+                                                       self.save_data.get_init_data().get_vinyl('tile_size')))
 
-        self.setData(array)
-        self.array = array
-        self.pixel_height = len(array)
-        self.pixel_width = len(array[0])
+    def set_mipmaps(self, mipmaps: list):
+        """
+        Definit les niveaux de l'image du tapis et l'affiche.
+        :param mipmaps: list: Niveaux (voir functions.object.make_mipmaps)
+        :return: None
+        """
+        self.clear_tiles()
+        self.mipmaps = mipmaps
+        self.pixel_height = len(mipmaps[0])
+        self.pixel_width = len(mipmaps[0][0])
         self.save_data.set_vinyl('pixel_height', self.pixel_height)
         self.save_data.set_vinyl('pixel_width', self.pixel_width)
         self.setVisible(True)
@@ -134,11 +254,13 @@ class Vinyl(gl.GLImageItem):
         init_data = self.save_data.get_init_data()
         width = init_data.get_grid('width')  # Longueur du plateau
         if self.one_placement:
-            # Place le tapis correctement
+            # Place le tapis correctement et le met a la bonne taille
             self.rotate(90, 0, 0, 1)
             self.rotate(180, 1, 0, 0)
             self.translate(width / 2, init_data.get_grid('height') / 2, 0)
+            self.scale(width / self.pixel_width, width / self.pixel_width, width / self.pixel_width)
             self.one_placement = False
+        self.update()
 
     def get_name(self) -> str:
         """
@@ -147,21 +269,20 @@ class Vinyl(gl.GLImageItem):
         """
         return self.name
 
-    def update_(self):
+    def update_(self, loaded=True):
         """
         Met le tapis a jour.
+        :param loaded: bool: False si l'image n'a pas pu etre lue
         :return: None
         """
-        if self.file == '':
-            self.file = self.save_data.get_vinyl('file')
-            if not functions.object.show_vinyl(self):
-                self.file = ''
+        if not loaded:
+            self.file = ''
 
-                for i in range(self.parent.list_widget.get_len()):
-                    # Si c'est l'element dans le list widget
-                    if self.get_name() == self.parent.list_widget.get_contents()[i].get_name():
-                        self.parent.list_widget.remove_content(i)
-                        break
+            for i in range(self.parent.list_widget.get_len()):
+                # Si c'est l'element dans le list widget
+                if self.get_name() == self.parent.list_widget.get_contents()[i].get_name():
+                    self.parent.list_widget.remove_content(i)
+                    break
 
     def properties(self):
         """
@@ -189,4 +310,47 @@ class Vinyl(gl.GLImageItem):
         self.set_file("")
         self.save_data.set_vinyl('file', '')
         self.setVisible(False)
+        self.clear_tiles()
+        self.mipmaps = list()
         self.time = time()
+
+
+class VinylTile(gl.GLImageItem):
+    """
+    Tuile du tapis : une partie d'un niveau de mipmap, placee et agrandie dans le repere du tapis.
+    """
+
+    def __init__(self, vinyl: Vinyl, array: np.array, level: int, row: int, column: int):
+        """
+        Constructeur de VinylTile.
+        :param vinyl: Vinyl: Tapis auquel appartient la tuile
+        :param array: np.array: Pixels de la tuile
+        :param level: int: Niveau de mipmap (0 : pleine resolution)
+        :param row: int: Premiere ligne de la tuile dans le niveau
+        :param column: int: Premiere colonne de la tuile dans le niveau
+        """
+        super(VinylTile, self).__init__(functions.object.to_rgba(array))
+        factor = 2 ** level
+        self.scale(factor, factor, 1)
+        # gl.GLImageItem dessine la colonne c d'une image de largeur w en y = w - c : la tuile est placee du cote
+        # miroir, pour que ses colonnes tombent au meme endroit que dans l'image entiere du niveau 0
+        self.translate(row * factor, vinyl.get_pixel_width() - (column + array.shape[1]) * factor, 0)
+        self.setDepthValue(-level)  # Les niveaux les plus precis sont dessines par-dessus
+        self.setParentItem(vinyl)
+
+    def _updateTexture(self):
+        """
+        Envoie la tuile a la carte graphique. Cette methode n'a pas a etre appelee.
+        :return: None
+        """
+        # noinspection PyBroadException
+        try:
+            super(VinylTile, self)._updateTexture()
+            # L'image est sur la carte graphique, seule la forme du tableau sert encore a l'affichage
+            self.data = np.broadcast_to(np.zeros(4, dtype=np.uint8), self.data.shape)
+        except Exception:
+            # Dans le cas d'une vm Windows, probleme a l'affichage du tapis.
+            # Ceci divise par 2 les dimensions de la tuile (en terme de points de couleur), sans copie intermediaire
+            self.scale(2, 2, 1)
+            self.setData(functions.object.to_rgba(self.data[::2, ::2]))
+            self._updateTexture()
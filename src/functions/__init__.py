@@ -23,8 +23,24 @@
 # The fact that you are presently reading this means that you have had knowledge of the CeCILL license
 # and that you accept its terms.
 
+# stream, link et convert ne sont pas importes ici : ils ne servent qu'a l'envoi au robot et en ligne de commande,
+# et sont importes a leur premiere utilisation pour ne pas ralentir le lancement
 from . import object
+from . import loader
+from . import cache
+from . import bundle
+from . import autosave
+from . import history
+from . import perf
+from . import odometry
 
 __all__ = [
-    'object'
+    'object',
+    'loader',
+    'cache',
+    'bundle',
+    'autosave',
+    'history',
+    'perf',
+    'odometry'
 ]
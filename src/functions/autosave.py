@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la classe Autosave qui enregistre regulierement le projet en arriere-plan.
+Le fichier est supprime a la fermeture normale de l'application : s'il existe au demarrage, il peut etre restaure.
+"""
+
+from PyQt5 import QtCore
+import hashlib
+import io
+import json
+import os
+
+from src import data
+from src.functions import loader
+
+
+class Autosave(QtCore.QObject):
+    """
+    Sauvegarde automatique du projet et des sequences des deux robots.
+    Les donnees sont copiees dans le thread de l'interface graphique, puis ecrites dans un autre thread.
+    """
+
+    def __init__(self, save_data, parent):
+        """
+        Constructeur de Autosave.
+        :param save_data: data.Save: Donnees de sauvegarde
+        :param parent: ui.MainWindow: Fenetre principale
+        """
+        super(Autosave, self).__init__(parent)
+        self.save_data = save_data
+        self.init_data = self.save_data.get_init_data()
+        self.parent = parent
+        self.worker = None  # Ecriture en cours
+        self.last_hash = None  # Hash de la derniere sauvegarde ecrite
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # Une seule ecriture a la fois
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(self.init_data.get_window('autosave_interval'))
+        self.timer.timeout.connect(self.save)
+
+    def start(self):
+        """
+        Lance les sauvegardes periodiques.
+        :return: None
+        """
+        self.timer.start()
+
+    def get_file(self) -> str:
+        """
+        Renvoie le chemin du fichier de sauvegarde automatique.
+        :return: str: Chemin du fichier
+        """
+        folder = os.path.join(QtCore.QStandardPaths.writableLocation(self.init_data.get_window('autosave_location')),
+                              self.init_data.get_window('autosave_folder'))
+        return os.path.join(folder, self.init_data.get_window('autosave_name'))
+
+    def snapshot(self) -> list:
+        """
+        Copie les donnees du projet et les sequences en cours d'edition.
+        :return: list: Couples (nom de la section, dictionnaire), comme pour data.project.dump
+        """
+        sections = [(section, self.save_data.to_dict(section))
+                    for section in self.init_data.get_window('project_sections')]
+
+        sequences = dict()
+        for name, robot in (('main_robot', self.parent.main_robot), ('second_robot', self.parent.second_robot)):
+            sequences[name] = robot.get_sequence_text()
+        sections.append(('sequences', sequences))
+        return sections
+
+    def save(self):
+        """
+        Slot du timer : lance l'ecriture de la sauvegarde si la precedente est terminee.
+        :return: None
+        """
+        if self.worker is not None:
+            return
+
+        self.worker = loader.Worker(write, self.get_file(), self.snapshot(), self.last_hash)
+        self.worker.signals.finished.connect(self._finished)
+        self.worker.signals.error.connect(lambda _: self._finished(self.last_hash))  # Reessaye au prochain tour
+        self.pool.start(self.worker)
+
+    def _finished(self, file_hash: str):
+        """
+        Fin d'une ecriture, appelee dans le thread de l'interface graphique.
+        :param file_hash: str: Hash de la sauvegarde ecrite
+        :return: None
+        """
+        self.worker = None
+        self.last_hash = file_hash
+
+    def remove(self):
+        """
+        Supprime la sauvegarde automatique, a la fermeture normale de l'application.
+        :return: None
+        """
+        self.timer.stop()
+        self.pool.waitForDone()
+        try:
+            os.remove(self.get_file())
+        except OSError:
+            pass
+
+    def sequences(self) -> dict:
+        """
+        Lit les sequences enregistrees dans la sauvegarde automatique.
+        :return: dict: {'main_robot': str, 'second_robot': str}, vide si elles ne peuvent pas etre lues
+        """
+        try:
+            with open(self.get_file(), 'r', encoding='utf-8') as f:
+                sequences = json.load(f).get('sequences')
+        except (OSError, ValueError, AttributeError):
+            return dict()
+        return sequences if isinstance(sequences, dict) else dict()
+
+
+def write(file: str, sections: list, last_hash: str) -> str:
+    """
+    Ecrit la sauvegarde si elle a change depuis la derniere. Executee dans un autre thread.
+    Le fichier est ecrit a cote puis renomme : une sauvegarde interrompue n'ecrase pas la precedente.
+    :param file: str: Chemin du fichier
+    :param sections: list: Copie des donnees (voir Autosave.snapshot)
+    :param last_hash: str: Hash de la derniere sauvegarde ecrite
+    :return: str: Hash de la sauvegarde
+    """
+    stream = io.StringIO()
+    data.project.dump(stream, sections)
+    text = stream.getvalue().encode('utf-8')
+
+    file_hash = hashlib.sha1(text).hexdigest()
+    if file_hash == last_hash:  # Rien n'a change
+        return file_hash
+
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    with open(file + '.tmp', 'wb') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(file + '.tmp', file)
+    return file_hash
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant les fonctions des archives de projet (.crz).
+
+Une archive est un zip qui contient :
+    - le projet (meme format que les .crp), dont les chemins des fichiers pointent dans l'archive ;
+    - les fichiers utilises par le projet (plateau, tapis, robots, sequences) ;
+    - les tableaux deja calcules (points et faces des maillages, mipmaps du tapis), tels qu'ils sont dans le cache.
+
+A l'ouverture, l'archive est extraite une seule fois dans le cache et les tableaux sont places parmi ceux du cache :
+les fichiers ne sont alors pas decodes, leurs tableaux sont projetes en memoire.
+"""
+
+import io
+import os
+import shutil
+import zipfile
+
+from src import data
+from src.functions import cache
+from src.functions import object
+
+
+def write(file: str, save_data):
+    """
+    Ecrit le projet et tous ses fichiers dans une archive.
+    L'archive est ecrite a cote puis renommee : un echec ne remplace pas une archive existante.
+    :param file: str: Chemin de l'archive
+    :param save_data: data.Save: Donnees du projet
+    :return: None
+    """
+    init_data = data.Init()
+    sections = {section: save_data.to_dict(section) for section in init_data.get_window('project_sections')}
+
+    tmp = file + '.tmp'
+    try:
+        with zipfile.ZipFile(tmp, 'w') as archive:
+            for section, key in init_data.get_window('bundle_assets'):
+                asset = sections.get(section).get(key)
+                if not asset or not os.path.isfile(asset):
+                    continue
+
+                name = '/'.join((init_data.get_window('bundle_assets_folder'), section, key, os.path.basename(asset)))
+                archive.write(asset, name, zipfile.ZIP_DEFLATED)
+                sections.get(section)[key] = name
+
+                # Les tableaux ne sont pas compresses : leur extraction est une simple copie
+                for array in reversed(_arrays(section, key, asset)):  # Le tableau 0 est extrait en dernier
+                    archive.write(array, init_data.get_window('bundle_arrays_folder') + '/' +
+                                  os.path.basename(array), zipfile.ZIP_STORED)
+
+            with archive.open(init_data.get_window('bundle_project_name'), 'w') as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8') as stream:
+                    data.project.dump(stream, sections.items())
+        os.replace(tmp, file)
+    finally:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+
+def _arrays(section: str, key: str, asset: str) -> list:
+    """
+    Calcule si besoin les tableaux d'un fichier et renvoie leurs chemins dans le cache.
+    :param section: str: Section du projet
+    :param key: str: Cle du fichier dans la section
+    :param asset: str: Chemin du fichier
+    :return: list: Chemins des tableaux, vide si le fichier n'en a pas
+    """
+    init_data = data.Init()
+    extension = '.' + asset.split('.')[-1]
+    try:
+        if section == 'vinyl' and extension in init_data.get_extension('vinyl'):
+            object.read_vinyl(asset)
+            return cache.array_files(object.vinyl_key(asset))
+        if key == 'file' and extension in init_data.get_extension('3d_file'):
+            object.read_mesh(asset)
+            return cache.array_files(object.mesh_key(asset))
+    except (OSError, ValueError):  # Le fichier est quand meme dans l'archive, il sera decode a l'ouverture
+        pass
+    return list()
+
+
+def read(file: str) -> dict:
+    """
+    Ouvre une archive et renvoie les sections du projet, avec les chemins des fichiers extraits.
+    :param file: str: Chemin de l'archive
+    :return: dict: Sections du projet {section: {cle: valeur}}
+    """
+    init_data = data.Init()
+    try:
+        folder = extract(file)
+    except zipfile.BadZipFile as error:
+        raise ValueError(str(error))
+
+    project = data.project.read(os.path.join(folder, init_data.get_window('bundle_project_name')))
+    for section, key in init_data.get_window('bundle_assets'):
+        name = project.get(section, dict()).get(key)
+        if name:
+            project.get(section)[key] = os.path.join(folder, *name.split('/'))
+    return project
+
+
+def extract(file: str) -> str:
+    """
+    Extrait une archive dans le cache, si elle ne l'a pas deja ete, et renvoie le dossier d'extraction.
+    Les tableaux sont copies directement parmi ceux du cache.
+    :param file: str: Chemin de l'archive
+    :return: str: Dossier d'extraction
+    """
+    init_data = data.Init()
+    folder = os.path.join(cache.directory(), init_data.get_window('bundle_folder'), cache.file_key(file, 'bundle'))
+    if os.path.isdir(folder):
+        return folder
+
+    tmp = folder + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    with zipfile.ZipFile(file) as archive:
+        for member in archive.infolist():
+            folder_name, _, name = member.filename.partition('/')
+            if folder_name == init_data.get_window('bundle_arrays_folder') and name:
+                with archive.open(member) as stream:
+                    cache.save_file(name, stream)
+            else:
+                archive.extract(member, tmp)  # extract retire les chemins absolus et les ".."
+    os.replace(tmp, folder)
+    return folder
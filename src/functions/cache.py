@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+"""
+Fichier contenant les fonctions du cache sur disque.
+Les resultats longs a calculer (mipmaps du tapis, points et faces des maillages) y sont enregistres en .npy pour ne pas
+etre recalcules a chaque ouverture d'un projet. Les archives de projet (voir bundle) y sont aussi extraites.
+La taille des tableaux est bornee : les moins recemment utilises sont supprimes en premier.
+"""
+
+from PyQt5 import QtCore
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from src import data
+
+_lock = threading.Lock()  # Le cache est utilise par les taches en arriere-plan
+_hashes = None  # {"chemin|taille|date": hash du contenu}, charge a la premiere utilisation
+
+
+def directory() -> str:
+    """
+    Renvoie le dossier du cache et le cree s'il n'existe pas.
+    :return: str: Chemin du dossier
+    """
+    init_data = data.Init()
+    folder = os.path.join(QtCore.QStandardPaths.writableLocation(init_data.get_window('cache_location')),
+                          init_data.get_window('cache_folder'))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def file_key(file: str, *params) -> str:
+    """
+    Renvoie la cle du cache d'un fichier : le hash de son contenu et des parametres.
+    Le hash du contenu est garde tant que le chemin, la taille et la date de modification du fichier ne changent pas :
+    le fichier n'est relu entierement que s'il a change.
+    :param file: str: Chemin du fichier
+    :param params: any: Parametres du calcul (resolution, taille des tuiles...)
+    :return: str: Cle
+    """
+    sha = hashlib.sha1(content_hash(file).encode())
+    sha.update(repr(params).encode())
+    return sha.hexdigest()
+
+
+def content_hash(file: str) -> str:
+    """
+    Renvoie le hash du contenu d'un fichier, garde dans un index pour ne pas relire un fichier qui n'a pas change.
+    Le fichier est lu par morceaux pour ne pas le charger entierement en memoire.
+    :param file: str: Chemin du fichier
+    :return: str: Hash
+    """
+    global _hashes
+
+    init_data = data.Init()
+    stat = os.stat(file)
+    name = "{path}|{size}|{date}".format(path=os.path.abspath(file), size=stat.st_size, date=stat.st_mtime_ns)
+    index = os.path.join(directory(), init_data.get_window('cache_hash_index'))
+    with _lock:
+        if _hashes is None:
+            try:
+                with open(index, 'r') as f:
+                    _hashes = json.load(f)
+            except (OSError, ValueError):
+                _hashes = dict()
+        if name in _hashes:
+            return _hashes[name]
+
+    sha = hashlib.sha1()
+    chunk_size = init_data.get_window('cache_hash_chunk')
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+
+    with _lock:
+        _hashes[name] = sha.hexdigest()
+        for old in list(_hashes)[:-init_data.get_window('cache_hash_index_size')]:  # Les plus anciens
+            del _hashes[old]
+        try:
+            with open(index + '.tmp', 'w') as f:
+                json.dump(_hashes, f)
+            os.replace(index + '.tmp', index)
+        except OSError:
+            pass
+    return sha.hexdigest()
+
+
+def _array_path(key: str, index: int) -> str:
+    """
+    Renvoie le chemin d'un tableau du cache.
+    :param key: str: Cle
+    :param index: int: Numero du tableau
+    :return: str: Chemin
+    """
+    return os.path.join(directory(), "{key}_{index}.npy".format(key=key, index=index))
+
+
+def load_arrays(key: str) -> list:
+    """
+    Charge les tableaux enregistres sous key. Les tableaux sont projetes en memoire (memmap) et non lus en entier.
+    :param key: str: Cle
+    :return: list: Tableaux, None s'il n'y a rien dans le cache
+    """
+    arrays = list()
+    try:
+        while os.path.isfile(_array_path(key, len(arrays))):
+            arrays.append(np.load(_array_path(key, len(arrays)), mmap_mode='r'))
+    except (OSError, ValueError):  # Fichier incomplet ou illisible
+        return None
+    if not arrays:
+        return None
+
+    try:
+        os.utime(_array_path(key, 0))  # Utilise recemment : supprime en dernier
+    except OSError:
+        pass
+    return arrays
+
+
+def save_arrays(key: str, arrays: list):
+    """
+    Enregistre les tableaux sous key. Le premier tableau est ecrit en dernier : le cache n'est lu que s'il est complet.
+    Un cache impossible a ecrire (disque plein, droits...) est ignore.
+    :param key: str: Cle
+    :param arrays: list: Tableaux a enregistrer
+    :return: None
+    """
+    try:
+        for index in reversed(range(len(arrays))):
+            tmp = _array_path(key, index) + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, arrays[index])
+            os.replace(tmp, _array_path(key, index))
+    except OSError:
+        pass
+    evict(key)
+
+
+def array_files(key: str) -> list:
+    """
+    Renvoie les chemins des tableaux enregistres sous key.
+    :param key: str: Cle
+    :return: list: Chemins, dans l'ordre des tableaux
+    """
+    files = list()
+    while os.path.isfile(_array_path(key, len(files))):
+        files.append(_array_path(key, len(files)))
+    return files
+
+
+def save_file(name: str, stream):
+    """
+    Copie un tableau deja ecrit au format .npy (par exemple depuis une archive de projet) dans le cache.
+    Un tableau deja present n'est pas reecrit.
+    :param name: str: Nom du fichier dans le cache ("{key}_{index}.npy")
+    :param stream: io.BufferedIOBase: Flux binaire du fichier
+    :return: None
+    """
+    file = os.path.join(directory(), os.path.basename(name))
+    if not file.endswith('.npy') or os.path.isfile(file):
+        return
+
+    try:
+        with open(file + '.tmp', 'wb') as f:
+            shutil.copyfileobj(stream, f)
+        os.replace(file + '.tmp', file)
+    except OSError:
+        pass
+    evict(os.path.basename(name).rpartition('_')[0])
+
+
+def evict(keep=""):
+    """
+    Supprime les tableaux les moins recemment utilises jusqu'a ce que le cache ne depasse plus sa taille maximale.
+    Les tableaux d'une meme cle sont supprimes ensemble, en commencant par le premier : une cle a moitie supprimee
+    n'est plus lue (voir load_arrays).
+    :param keep: str: Cle a garder (tableaux qui viennent d'etre enregistres)
+    :return: None
+    """
+    keys = dict()  # {cle: [taille, date de derniere utilisation, {numero: chemin}]}
+    with _lock:
+        try:
+            with os.scandir(directory()) as entries:
+                for entry in entries:
+                    key, _, index = entry.name[:-len('.npy')].rpartition('_')
+                    if not entry.name.endswith('.npy') or not index.isdigit() or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    arrays = keys.setdefault(key, [0, 0., dict()])
+                    arrays[0] += stat.st_size
+                    arrays[1] = max(arrays[1], stat.st_mtime)
+                    arrays[2][int(index)] = entry.path
+        except OSError:
+            return
+
+        size = sum(arrays[0] for arrays in keys.values())
+        for key, (key_size, _, files) in sorted(keys.items(), key=lambda item: item[1][1]):
+            if size <= data.Init().get_window('cache_max_size'):
+                break
+            if key == keep:
+                continue
+            try:
+                for index in sorted(files):
+                    os.remove(files[index])
+            except OSError:  # Tableau en cours d'utilisation (Windows)
+                continue
+            size -= key_size
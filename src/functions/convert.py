@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Conversion de points de passage (.ccrubs, ou tableau "x;y" exporte d'un tableur) en sequence gcrubs.
+Pour chaque point, le robot tourne puis avance en ligne droite. Il roule en avant ou en arriere, selon ce qui demande
+la plus petite rotation. Les commandes sont ecrites avec les textes de 'cmd_name', ceux du projet s'il est donne.
+Les valeurs sont arrondies au mm et au degre, et la position suivante est calculee a partir des valeurs arrondies :
+les erreurs d'arrondi ne s'accumulent pas.
+> python -m src.functions.convert points.ccrubs dossier/ [--output dossier] [--angle 90] [--project projet.crp]
+"""
+
+import os
+import re
+import sys
+from math import atan2, cos, degrees, hypot, radians, sin
+
+import numpy as np
+from PyQt5 import QtCore
+
+from src import data
+
+_SEPARATORS = re.compile(r'(?:;;|[;,\s])+')
+
+
+def read_waypoints(file: str) -> np.array:
+    """
+    Lit les points de passage d'un fichier texte, une ligne "x;;y" (ou "x;y", "x,y", "x y") par point.
+    Les lignes qui ne commencent pas par deux nombres (en-tete du tableur, commentaires) sont ignorees.
+    :param file: str: Chemin du fichier
+    :return: np.array: Tableau (nombre de points, 2) en mm
+    """
+    points = list()
+    with open(file, 'r') as f:
+        for line in f:
+            fields = _SEPARATORS.split(line.strip())
+            try:
+                points.append((float(fields[0]), float(fields[1])))
+            except (ValueError, IndexError):
+                continue
+    if not points:
+        raise ValueError("Aucun point dans le fichier : " + file)
+    return np.array(points)
+
+
+def to_lines(points: np.array, start: tuple, save_data, backward=True, main_robot=True) -> list:
+    """
+    Calcule les commandes qui font passer le robot par les points.
+    :param points: np.array: Points de passage (nombre de points, 2) en mm
+    :param start: tuple: Position de depart (x, y, angle) en mm et degres
+    :param save_data: data.Save: Donnees de sauvegarde (textes des commandes)
+    :param backward: bool: True pour autoriser les deplacements en arriere
+    :param main_robot: bool: Robot principal ou non, pour le commentaire de debut de sequence
+    :return: list: Lignes de la sequence gcrubs
+    """
+    init_data = data.Init()
+    name = save_data.get_gcrubs('cmd_name')
+    comment = name.get("Commentaire")
+    robot = init_data.get_main_robot if main_robot else init_data.get_second_robot
+    x, y, angle = float(start[0]), float(start[1]), round(start[2]) % 360
+
+    text = robot('sequence_text').format(
+        comment=comment, date=QtCore.QDate.currentDate().toString(init_data.get_main_robot('date_format')))
+    text += init_data.get_main_robot('start_sequence_text').format(comment=comment, x=round(x), y=round(y),
+                                                                   angle=angle)
+    lines = text.rstrip('\n').split('\n')
+
+    for target_x, target_y in points:
+        dx, dy = target_x - x, target_y - y
+        dist = round(hypot(dx, dy))
+        if dist == 0:
+            continue
+
+        # En avant, le robot se deplace selon son axe y : direction (-sin(angle), cos(angle))
+        heading = degrees(atan2(-dx, dy))
+        turn = (heading - angle + 180) % 360 - 180
+        forward = True
+        if backward and abs(turn) > 90:  # Demi-tour plus court en arriere
+            turn = (turn + 360) % 360 - 180
+            forward = False
+        turn = round(turn)
+
+        if turn > 0:
+            lines.append(name.get("Tourner a gauche").format(angle=turn))
+        elif turn < 0:
+            lines.append(name.get("Tourner a droite").format(angle=-turn))
+        angle = (angle + turn) % 360
+
+        sign = 1 if forward else -1
+        lines.append(name.get("Se deplacer en avant" if forward else "Se deplacer en arriere").format(dist=dist))
+        x -= sign * dist * sin(radians(angle))
+        y += sign * dist * cos(radians(angle))
+
+    return lines
+
+
+def convert_file(file: str, output: str, save_data, angle=None, backward=True, main_robot=True):
+    """
+    Convertit un fichier de points de passage en fichier gcrubs. Le premier point est la position de depart.
+    :param file: str: Fichier de points de passage
+    :param output: str: Fichier gcrubs a ecrire
+    :param save_data: data.Save: Donnees de sauvegarde (textes des commandes)
+    :param angle: float: Angle de depart en degres, None pour partir tourne vers le deuxieme point
+    :param backward: bool: True pour autoriser les deplacements en arriere
+    :param main_robot: bool: Robot principal ou non
+    :return: None
+    """
+    points = read_waypoints(file)
+    if angle is None:
+        dx, dy = points[1] - points[0] if len(points) > 1 else (0., 1.)
+        angle = degrees(atan2(-dx, dy))
+    lines = to_lines(points[1:], (points[0][0], points[0][1], angle), save_data, backward, main_robot)
+
+    with open(output, 'w') as f:
+        f.write('\n'.join(lines))
+        f.write('\n')
+
+
+def _files(paths: list, extensions: tuple):
+    """
+    Donne les fichiers a convertir : les fichiers donnes, et ceux des dossiers qui ont une des extensions.
+    :param paths: list: Fichiers ou dossiers
+    :param extensions: tuple: Extensions cherchees dans les dossiers
+    :return: generator: Chemins des fichiers
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for folder, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(folder, name)
+
+
+def main(argv=None) -> int:
+    """
+    Convertit des fichiers de points de passage en fichiers gcrubs.
+    :param argv: list: Arguments de la ligne de commande, sys.argv par defaut
+    :return: int: Nombre de fichiers qui n'ont pas pu etre convertis
+    """
+    import argparse  # Ligne de commande seulement
+
+    init_data = data.Init()
+    parser = argparse.ArgumentParser(description="Conversion de points de passage (ccrubs, csv) en sequences gcrubs")
+    parser.add_argument('paths', nargs='+', help="fichiers ou dossiers a convertir")
+    parser.add_argument('--output', help="dossier des fichiers gcrubs, a cote des fichiers d'origine par defaut")
+    parser.add_argument('--angle', type=float, help="angle de depart (degres), vers le deuxieme point par defaut")
+    parser.add_argument('--forward-only', action='store_true', help="ne jamais rouler en arriere")
+    parser.add_argument('--second-robot', action='store_true', help="sequence du robot secondaire")
+    parser.add_argument('--project', help="projet dont les textes des commandes sont utilises")
+    args = parser.parse_args(argv)
+
+    save_data = data.Save()
+    if args.project:
+        sections = data.project.read(args.project)
+        if 'gcrubs' in sections:
+            save_data.from_dict('gcrubs', sections['gcrubs'])
+
+    failed = 0
+    extensions = (init_data.get_extension('coord_file'), '.csv', '.txt')
+    for file in _files(args.paths, extensions):
+        name = os.path.splitext(os.path.basename(file))[0] + init_data.get_extension('sequence')
+        output = os.path.join(args.output or os.path.dirname(file), name)
+        try:
+            convert_file(file, output, save_data, args.angle, not args.forward_only, not args.second_robot)
+        except (OSError, ValueError) as error:
+            failed += 1
+            print("{file} : {error}".format(file=file, error=error), file=sys.stderr)
+        else:
+            print("{file} -> {output}".format(file=file, output=output))
+    return failed
+
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
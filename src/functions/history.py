@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant l'historique des actions (annuler / refaire).
+Chaque action ne garde que ce qu'elle a change (ligne de commande ajoutee, deplacement du robot, point de passage) :
+annuler ou refaire ne depend pas de la longueur de la sequence.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class Action(ABC):
+    """
+    Action de l'historique. Les classes filles definissent undo et redo.
+    """
+
+    def __init__(self, robot):
+        """
+        Constructeur de Action.
+        :param robot: element.Robot: Robot concerne par l'action
+        """
+        self.robot = robot
+
+    def get_robot(self):
+        """
+        Renvoie le robot concerne par l'action.
+        :return: element.Robot: robot
+        """
+        return self.robot
+
+    @abstractmethod
+    def undo(self):
+        """
+        Annule l'action.
+        :return: None
+        """
+
+    @abstractmethod
+    def redo(self):
+        """
+        Refait l'action.
+        :return: None
+        """
+
+
+class CommandAction(Action):
+    """
+    Ajout d'une commande dans la sequence depuis la liste des commandes.
+    """
+
+    def __init__(self, robot, line: str):
+        """
+        Constructeur de CommandAction.
+        :param robot: element.Robot: Robot dont la sequence est modifiee
+        :param line: str: Ligne ajoutee a la sequence
+        """
+        super(CommandAction, self).__init__(robot)
+        self.line = line
+
+    def undo(self):
+        """
+        Annule l'action.
+        :return: None
+        """
+        self.robot.get_window().remove_last_sequence_line()
+
+    def redo(self):
+        """
+        Refait l'action.
+        :return: None
+        """
+        self.robot.get_window().add_sequence_text(self.line)
+
+
+class MoveAction(Action):
+    """
+    Deplacement ou rotation du robot au clavier pendant l'enregistrement d'une sequence.
+    L'action est creee a l'appui sur une touche puis mise a jour (update) tant que la touche est maintenue.
+    """
+
+    def __init__(self, robot):
+        """
+        Constructeur de MoveAction.
+        :param robot: element.Robot: Robot deplace
+        """
+        super(MoveAction, self).__init__(robot)
+        self.dx = 0
+        self.dy = 0
+        self.rz = 0
+        self.line = ""
+        self.point = None
+
+    def update(self, dx: float, dy: float, rz: float, line: str, point=None):
+        """
+        Met a jour l'action avec le deplacement total depuis l'appui sur la touche.
+        :param dx: float: Deplacement selon x a appliquer pour annuler
+        :param dy: float: Deplacement selon y a appliquer pour annuler
+        :param rz: float: Rotation a appliquer pour annuler
+        :param line: str: Ligne de la sequence correspondant au deplacement
+        :param point: tuple: Point de passage (x, y) ajoute, None pour une rotation
+        :return: None
+        """
+        self.dx = dx
+        self.dy = dy
+        self.rz = rz
+        self.line = line
+        self.point = point
+
+    def undo(self):
+        """
+        Annule l'action.
+        :return: None
+        """
+        window = self.robot.get_window()
+        self.robot.move_robot(self.dx, self.dy, self.rz)
+        window.remove_last_sequence_line()
+        if self.rz == 0:  # Si pas de rotation
+            window.remove_last_track()
+        if self.point is not None:
+            window.remove_last_waypoint()
+
+    def redo(self):
+        """
+        Refait l'action.
+        :return: None
+        """
+        window = self.robot.get_window()
+        self.robot.move_robot(-self.dx, -self.dy, -self.rz)
+        if self.rz == 0:  # Seuls les deplacements laissent une trace
+            window.add_track(self.robot)
+            window.update_last_track(self.dx + self.dy, self.dx, self.dy)
+        window.add_sequence_text(self.line)
+        if self.point is not None:
+            window.add_waypoint(*self.point)
+
+
+class History:
+    """
+    Historique borne des actions. Les plus anciennes sont oubliees quand la taille maximale est atteinte.
+    """
+
+    def __init__(self, max_len: int):
+        """
+        Constructeur de History.
+        :param max_len: int: Nombre maximal d'actions gardees
+        """
+        self.doing = deque(maxlen=max_len)
+        self.undoing = deque(maxlen=max_len)
+
+    def do(self, action: Action):
+        """
+        Ajoute une action. Les actions annulees ne peuvent plus etre refaites.
+        :param action: Action: Action faite
+        :return: None
+        """
+        self.doing.append(action)
+        self.undoing.clear()
+
+    def last(self) -> Action:
+        """
+        Renvoie la derniere action faite.
+        :return: Action: Derniere action, None s'il n'y en a pas
+        """
+        return self.doing[-1] if self.doing else None
+
+    def undo(self) -> Action:
+        """
+        Annule la derniere action.
+        :return: Action: Action annulee, None s'il n'y en a pas
+        """
+        if not self.doing:
+            return None
+        action = self.doing.pop()
+        action.undo()
+        self.undoing.append(action)
+        return action
+
+    def redo(self) -> Action:
+        """
+        Refait la derniere action annulee.
+        :return: Action: Action refaite, None s'il n'y en a pas
+        """
+        if not self.undoing:
+            return None
+        action = self.undoing.pop()
+        action.redo()
+        self.doing.append(action)
+        return action
+
+    def clear(self):
+        """
+        Vide l'historique.
+        :return: None
+        """
+        self.doing.clear()
+        self.undoing.clear()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la classe RobotLink qui envoie la sequence d'un robot a la carte du robot pendant les essais.
+L'envoi (functions.stream) tourne dans une boucle asyncio, dans un thread : les resultats sont renvoyes par signaux.
+"""
+
+from PyQt5 import QtCore
+import asyncio
+import threading
+
+from src import data
+from src.functions import stream
+
+
+class RobotLink(QtCore.QObject):
+    """
+    Liaison avec la carte d'un robot, par TCP (hote:port) ou par liaison serie (port@debit).
+    """
+    done = QtCore.pyqtSignal(int)  # Numero de la commande terminee par le robot
+    odometry = QtCore.pyqtSignal(float, float, float)  # Position mesuree par le robot (x, y, angle)
+    finished = QtCore.pyqtSignal(object)  # None, ou l'erreur qui a arrete l'envoi
+
+    def __init__(self, save_data, parent):
+        """
+        Constructeur de RobotLink.
+        :param save_data: data.Save: Donnees de sauvegarde
+        :param parent: ui.MainWindow: Fenetre principale
+        """
+        super(RobotLink, self).__init__(parent)
+        self.save_data = save_data
+        self.init_data = self.save_data.get_init_data()
+        self.streamer = None
+        self.thread = None
+        self.stopping = False
+        self.total = 0
+
+    def start(self, robot, address: str):
+        """
+        Compile la sequence du robot et commence l'envoi.
+        :param robot: element.Robot: Robot dont la sequence est envoyee
+        :param address: str: "hote:port" ou "port_serie@debit"
+        :return: None
+        """
+        header, records = data.program.compile_lines(robot.get_window().get_sequence_lines(), self.save_data,
+                                                     robot.get_speed(), robot.get_speed_rotation())
+        self.total = len(records)
+        self.streamer = stream.Streamer((float(header['x'][0]), float(header['y'][0]), float(header['angle'][0])),
+                                        records.tolist(), self.init_data.get_run('stream_window'),
+                                        self.init_data.get_run('stream_lead'),
+                                        self.init_data.get_run('stream_ack_timeout'))
+        self.streamer.on_done = self.done.emit  # Signaux emis depuis le thread : recus dans le thread principal
+        self.streamer.on_odometry = self.odometry.emit
+
+        if '@' in address:
+            url, baudrate = address.rsplit('@', 1)
+            target, args = self.streamer.run_serial, (url, int(baudrate))
+        else:
+            host, port = address.rsplit(':', 1)
+            target, args = self.streamer.run, (host, int(port))
+
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, args=(target, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, target, args: tuple):
+        """
+        Envoi, execute dans le thread de la liaison.
+        :param target: callable: Streamer.run ou Streamer.run_serial
+        :param args: tuple: Arguments de target
+        :return: None
+        """
+        # noinspection PyBroadException
+        try:
+            target(*args)
+        except asyncio.CancelledError as error:  # Arret demande, ou connexion fermee par le robot
+            self.finished.emit(None if self.stopping else ConnectionResetError(str(error)))
+        except Exception as error:  # Toute erreur est renvoyee au thread principal
+            self.finished.emit(error)
+        else:
+            self.finished.emit(None)
+
+    def stop(self):
+        """
+        Arrete l'envoi.
+        :return: None
+        """
+        if self.is_running():
+            self.stopping = True
+            self.streamer.stop()
+
+    def is_running(self) -> bool:
+        """
+        Indique si un envoi est en cours.
+        :return: bool: True si la sequence est en cours d'envoi
+        """
+        return self.thread is not None and self.thread.is_alive()
+
+    def get_total(self) -> int:
+        """
+        Renvoie le nombre de commandes envoyees au robot.
+        :return: int: Nombre de commandes
+        """
+        return self.total
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+"""
+Fichier contenant les classes Worker et Loader qui permettent de lire les fichiers en arriere-plan.
+Seul le resultat est renvoye au thread de l'interface graphique.
+"""
+
+from PyQt5 import QtCore, QtWidgets
+
+
+class WorkerSignals(QtCore.QObject):
+    """
+    Signaux d'un Worker. Un QRunnable n'etant pas un QObject, il ne peut pas porter de signaux lui-meme.
+    """
+    finished = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(object)
+
+
+class Worker(QtCore.QRunnable):
+    """
+    Tache executee dans un thread du pool de Loader.
+    """
+
+    def __init__(self, function, *args):
+        """
+        Constructeur de Worker.
+        :param function: callable: Fonction a executer, elle ne doit pas toucher a l'interface graphique
+        :param args: any: Arguments de la fonction
+        """
+        super(Worker, self).__init__()
+        self.setAutoDelete(False)  # Loader garde une reference tant que la tache n'est pas finie
+        self.function = function
+        self.args = args
+        self.signals = WorkerSignals()
+        self.cancelled = False
+
+    def run(self):
+        """
+        Execute la fonction et emet le resultat ou l'erreur. Cette methode n'a pas a etre appelee.
+        :return: None
+        """
+        # noinspection PyBroadException
+        try:
+            result = self.function(*self.args)
+        except Exception as error:  # Toute erreur est renvoyee au thread principal
+            if not self.cancelled:
+                self.signals.error.emit(error)
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+
+    def cancel(self):
+        """
+        Annule la tache. Une tache deja lancee va jusqu'au bout mais son resultat est ignore.
+        :return: None
+        """
+        self.cancelled = True
+
+    def is_cancelled(self) -> bool:
+        """
+        Indique si la tache a ete annulee.
+        :return: bool: cancelled
+        """
+        return self.cancelled
+
+
+class Loader(QtCore.QObject):
+    """
+    Classe qui lance les lectures de fichiers dans un pool de threads et affiche leur avancement.
+    """
+
+    def __init__(self, save_data, parent):
+        """
+        Constructeur de Loader.
+        :param save_data: data.Save: Donnees de sauvegarde
+        :param parent: ui.MainWindow: Fenetre principale
+        """
+        super(Loader, self).__init__(parent)
+        self.save_data = save_data
+        self.init_data = self.save_data.get_init_data()
+        self.parent = parent
+        self.jobs = list()  # [Worker, callback d'annulation]
+        self.total = 0
+        self.done = 0
+        self.progress = None
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(self.init_data.get_window('loading_max_threads'))
+
+    def start(self, function, args: tuple, finished, error=None, cancelled=None) -> Worker:
+        """
+        Lance function(*args) dans le pool de threads.
+        Les callbacks sont appeles dans le thread de l'interface graphique.
+        :param function: callable: Fonction a executer en arriere-plan
+        :param args: tuple: Arguments de la fonction
+        :param finished: callable: Appele avec le resultat de la fonction
+        :param error: callable: Appele avec l'exception levee par la fonction
+        :param cancelled: callable: Appele sans argument si la tache est annulee
+        :return: Worker: Tache creee
+        """
+        worker = Worker(function, *args)
+        worker.signals.finished.connect(lambda result: self._finished(worker, finished, result))
+        worker.signals.error.connect(lambda err: self._finished(worker, error, err))
+        self.jobs.append([worker, cancelled])
+
+        if self.total == 0:  # Premiere tache d'une serie
+            self.parent.setCursor(self.init_data.get_window('cursor_while_opening'))
+        self.total += 1
+        self._update_progress()
+
+        self.pool.start(worker)
+        return worker
+
+    def _finished(self, worker: Worker, callback, result):
+        """
+        Fin d'une tache, appelee dans le thread de l'interface graphique.
+        :param worker: Worker: Tache terminee
+        :param callback: callable: Fonction a appeler avec result
+        :param result: any: Resultat ou erreur de la tache
+        :return: None
+        """
+        if worker.is_cancelled():
+            return
+
+        for i in range(len(self.jobs)):
+            if self.jobs[i][0] is worker:
+                self.jobs.pop(i)
+                break
+
+        self.done += 1
+        self._update_progress()
+        if callback is not None:
+            callback(result)
+
+    def cancel(self):
+        """
+        Annule toutes les taches en cours.
+        :return: None
+        """
+        jobs = self.jobs
+        self.jobs = list()
+        for worker, cancelled in jobs:
+            worker.cancel()
+            self.pool.tryTake(worker)  # Retire la tache si elle n'a pas encore demarre
+
+        self.done = self.total
+        self._update_progress()
+        for worker, cancelled in jobs:
+            if cancelled is not None:
+                cancelled()
+
+    def is_loading(self) -> bool:
+        """
+        Indique si des taches sont en cours.
+        :return: bool: True si des fichiers sont en cours de lecture
+        """
+        return len(self.jobs) != 0
+
+    def _update_progress(self):
+        """
+        Met a jour la fenetre d'avancement. La ferme lorsque tout est termine.
+        :return: None
+        """
+        if self.done >= self.total:  # Tout est termine
+            if self.progress is not None:
+                self.progress.canceled.disconnect(self.cancel)
+                self.progress.reset()
+                self.progress.deleteLater()
+                self.progress = None
+            self.total = 0
+            self.done = 0
+            self.parent.setCursor(self.init_data.get_window('normal_cursor'))
+            return
+
+        if self.progress is None:
+            self.progress = QtWidgets.QProgressDialog(self.parent)
+            self.progress.setWindowTitle(self.init_data.get_window('loading_title'))
+            self.progress.setCancelButtonText(self.init_data.get_window('loading_cancel_btn_name'))
+            self.progress.setWindowModality(self.init_data.get_window('loading_modality'))
+            self.progress.setMinimumDuration(self.init_data.get_window('loading_min_duration'))
+            self.progress.setAutoClose(False)
+            self.progress.setAutoReset(False)
+            self.progress.canceled.connect(self.cancel)
+
+        self.progress.setMaximum(self.total)
+        self.progress.setValue(self.done)
+        self.progress.setLabelText(self.init_data.get_window('loading_label').format(done=self.done,
+                                                                                      total=self.total))
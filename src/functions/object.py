@@ -31,13 +31,11 @@ Fichier contenant des fonctions concernant les objets 3D.
 from PyQt5 import QtWidgets
 import numpy as np
 import pyqtgraph.opengl as gl
-from PIL import Image
-import fitz  # PyMuPDF
-import trimesh
 from sys import path
 
 from src import element
 from src import data
+from src.functions import cache
 
 
 def make_mesh(elem: gl.GLMeshItem, points: np.array, faces: np.array):
@@ -56,10 +54,10 @@ def make_mesh(elem: gl.GLMeshItem, points: np.array, faces: np.array):
 
     if np.amax(dim, 0) < 1.:  # Si les dimensions sont inferieures a 1 mm
         try:
-            init_data = data.Init()
-            dim *= init_data.get_main_robot('invisible_coef')  # On augmente les dimensions
-            min_max *= init_data.get_main_robot('invisible_coef')
-            points *= init_data.get_main_robot('invisible_coef')
+            invisible_coef = data.Init().invisible_coef
+            dim *= invisible_coef  # On augmente les dimensions
+            min_max *= invisible_coef
+            points = points * invisible_coef  # Copie : points peut etre en lecture seule (cache)
         except AttributeError:
             pass
     try:
@@ -71,91 +69,312 @@ def make_mesh(elem: gl.GLMeshItem, points: np.array, faces: np.array):
     elem.setMeshData(meshdata=gl.MeshData(vertexes=points, faces=faces))
 
 
-def show_mesh(elem: gl.GLMeshItem) -> bool:
+def read_mesh(file: str, element_type="") -> tuple:
     """
-    Fonction pour ouvrir un fichier 3D. elem est modifie durant la fonction.
+    Lit un fichier 3D et renvoie ses points et ses faces.
+    Les points et les faces sont enregistres dans le cache, d'ou ils sont projetes en memoire aux lectures suivantes.
+    Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
     Temps d'execution : stl < obj < 3mf
+    :param file: str: Chemin du fichier
+    :param element_type: str: Type de l'element ('coord_sys' pour chercher le fichier dans sys.path)
+    :return: tuple: (np.array: Tableau des points, np.array: Tableau des faces)
+    """
+    if element_type == 'coord_sys':
+        import trimesh  # Importe a la premiere utilisation, long a charger
+
+        mesh = None
+        for p in path:
+            # noinspection PyBroadException
+            try:
+                mesh = trimesh.load(p + '/' + file, force='mesh')
+                break
+            except:  # C'est un peu sale mais erreur inconnue en executable
+                continue
+
+        if not mesh:
+            raise FileNotFoundError(file)
+        return mesh.vertices, mesh.faces
+
+    key = mesh_key(file)
+    arrays = cache.load_arrays(key)
+    if arrays is not None and len(arrays) == 2:
+        return tuple(arrays)
+
+    import trimesh
+
+    mesh = trimesh.load(file, force='mesh')
+    arrays = (np.asarray(mesh.vertices), np.asarray(mesh.faces))
+    cache.save_arrays(key, arrays)
+    return arrays
+
+
+def mesh_key(file: str) -> str:
+    """
+    Renvoie la cle du cache des points et des faces d'un fichier 3D.
+    :param file: str: Chemin du fichier
+    :return: str: Cle
+    """
+    return cache.file_key(file, 'mesh')
+
+
+def read_vinyl(file: str) -> list:
+    """
+    Lit l'image d'un tapis et renvoie ses mipmaps (voir make_mipmaps).
+    Les mipmaps sont generees une seule fois puis enregistrees dans le cache, d'ou elles sont projetees en memoire.
+    Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
+    :param file: str: Chemin du fichier
+    :return: list: Niveaux de l'image, tableaux 3D RGBA en uint8
+    """
+    key = vinyl_key(file)
+    mipmaps = cache.load_arrays(key)
+    if mipmaps is not None:  # Enregistres contigus, dans la disposition envoyee a la carte graphique
+        return mipmaps
+
+    if file.split('.')[-1] == 'pdf':
+        array = load_pdf(file)
+    else:
+        from PIL import Image  # Importe a la premiere utilisation
+
+        with Image.open(file) as image:
+            if image.mode not in ('RGB', 'RGBA'):  # Niveaux de gris, palette...
+                image = image.convert('RGBA')
+            array = np.asarray(image)
+
+    mipmaps = make_mipmaps(array, data.Init().get_vinyl('tile_size'))
+    cache.save_arrays(key, mipmaps)
+    return mipmaps
+
+
+def vinyl_key(file: str) -> str:
+    """
+    Renvoie la cle du cache des mipmaps d'un tapis.
+    :param file: str: Chemin du fichier
+    :return: str: Cle
+    """
+    init_data = data.Init()
+    return cache.file_key(file, 'mipmaps', init_data.get_vinyl('tile_size'), init_data.get_vinyl('pdf_texel_size'))
+
+
+def make_mipmaps(array: np.array, tile_size: int) -> list:
+    """
+    Genere la pyramide de mipmaps d'une image : chaque niveau est la moyenne des carres de 2x2 pixels du precedent,
+    jusqu'a un niveau qui tient dans une seule tuile.
+    :param array: np.array: Image (hauteur, largeur, 3 ou 4)
+    :param tile_size: int: Taille maximale d'une tuile
+    :return: list: Niveaux, du plus precis au plus grossier, tableaux 3D RGBA en uint8
+    """
+    mipmaps = [to_rgba(array)]
+    while max(mipmaps[-1].shape[:2]) > tile_size and min(mipmaps[-1].shape[:2]) > 1:
+        level = mipmaps[-1]
+        level = level[:level.shape[0] // 2 * 2, :level.shape[1] // 2 * 2]
+        total = level[0::2, 0::2].astype(np.uint16)
+        total += level[1::2, 0::2]
+        total += level[0::2, 1::2]
+        total += level[1::2, 1::2]
+        total += 2  # Arrondi
+        total //= 4
+        mipmaps.append(to_rgba(total))
+    return mipmaps
+
+
+def to_rgba(array: np.array) -> np.array:
+    """
+    Renvoie l'image en RGBA uint8, dans un tableau contigu (hauteur, largeur, 4) alloue une fois.
+    C'est la disposition envoyee telle quelle a la carte graphique par gl.GLImageItem, sans copie intermediaire.
+    :param array: np.array: Image (hauteur, largeur, 3 ou 4)
+    :return: np.array: Image (hauteur, largeur, 4) en uint8
+    """
+    if array.dtype == np.uint8 and array.shape[2] == 4 and array.flags.c_contiguous:
+        return array  # Deja au bon format
+
+    rgba = np.empty((array.shape[0], array.shape[1], 4), dtype=np.uint8)
+    np.copyto(rgba[:, :, :array.shape[2]], array, casting='unsafe')
+    if array.shape[2] == 3:  # Pas de canal alpha : opaque
+        rgba[:, :, 3] = 255
+    return rgba
+
+
+def is_supported(file: str, extension: str) -> bool:
+    """
+    Indique si le fichier a une extension supportee. Sinon, affiche un message d'erreur.
+    :param file: str: Chemin du fichier
+    :param extension: str: Cle des extensions dans data.Init ('3d_file' ou 'vinyl')
+    :return: bool: True si l'extension est supportee, False sinon
+    """
+    init_data = data.Init()
+    if '.' + file.split('.')[-1] in init_data.get_extension(extension):
+        return True
+
+    QtWidgets.QMessageBox(init_data.get_window('error_format_file_type'),
+                          init_data.get_window('error_format_file_title'),
+                          init_data.get_window('error_format_file_message').format(filename=file)).exec()
+    return False
+
+
+def open_error(file: str):
+    """
+    Affiche le message d'erreur d'ouverture de fichier.
+    :param file: str: Chemin du fichier
+    :return: None
+    """
+    init_data = data.Init()
+    QtWidgets.QMessageBox(init_data.get_window('error_open_file_type'),
+                          init_data.get_window('error_open_file_title'),
+                          init_data.get_window('error_open_file_message').format(filename=file)).exec()
+
+
+def show_mesh(elem: gl.GLMeshItem, mesh=None) -> bool:
+    """
+    Fonction pour ouvrir un fichier 3D. elem est modifie durant la fonction.
     :param elem: gl.GLMeshItem: Element a afficher.
+    :param mesh: tuple: (points, faces) deja lus par read_mesh. Si None, le fichier est lu ici.
     :return: bool: True si tout s'est bien passe, False sinon
     """
     if elem.get_file() == "":
         return False
 
-    init_data = data.Init()
-    try:
-        if '.' + elem.get_file().split('.')[-1] in init_data.get_extension('3d_file'):
-            if elem.get_element_type() == 'coord_sys':
-                mesh = None
-                for p in path:
-                    # noinspection PyBroadException
-                    try:
-                        mesh = trimesh.load(p + '/' + elem.get_file(), force='mesh')
-                        break
-                    except:  # C'est un peu sale mais erreur inconnue en executable
-                        continue
-
-                if not mesh:
-                    return False
-            else:
-                mesh = trimesh.load(elem.get_file(), force='mesh')
-
-        else:
-            QtWidgets.QMessageBox(init_data.get_window('error_format_file_type'),
-                                  init_data.get_window('error_format_file_title'),
-                                  init_data.get_window('error_format_file_message').format(
-                                      filename=elem.get_file())).exec()
+    if mesh is None:
+        if not is_supported(elem.get_file(), '3d_file'):
+            return False
+
+        try:
+            mesh = read_mesh(elem.get_file(), elem.get_element_type())
+        except (FileNotFoundError, ValueError):
+            open_error(elem.get_file())
             return False
-    except (FileNotFoundError, ValueError):
-        QtWidgets.QMessageBox(init_data.get_window('error_open_file_type'),
-                              init_data.get_window('error_open_file_title'),
-                              init_data.get_window('error_open_file_message').format(
-                                  filename=elem.get_file())).exec()
-        return False
 
-    make_mesh(elem, mesh.vertices, mesh.faces)
+    make_mesh(elem, *mesh)
     return True
 
 
-def show_vinyl(vinyl: element.Vinyl) -> bool:
+def show_mesh_async(elem: gl.GLMeshItem, loader, callback):
+    """
+    Lit le fichier 3D de elem en arriere-plan puis l'affiche dans le thread de l'interface graphique.
+    Si un autre fichier est demande pour elem avant la fin de la lecture, le resultat de celle-ci est ignore.
+    :param elem: gl.GLMeshItem: Element a afficher
+    :param loader: functions.loader.Loader: Gestionnaire des taches en arriere-plan
+    :param callback: callable: Appele avec True si tout s'est bien passe, False sinon
+    :return: None
+    """
+    elem.set_load_token(None)  # Une lecture precedente de elem est ignoree
+    if elem.get_file() == "" or not is_supported(elem.get_file(), '3d_file'):
+        callback(False)
+        return
+
+    token = object()
+    elem.set_load_token(token)
+
+    def current() -> bool:
+        if elem.get_load_token() is not token:  # Un autre fichier a ete demande depuis
+            return False
+        elem.set_load_token(None)
+        return True
+
+    def finished(mesh):
+        if current():
+            callback(show_mesh(elem, mesh))
+
+    def error(_):
+        if current():
+            open_error(elem.get_file())
+            callback(False)
+
+    def cancelled():
+        if current():
+            callback(False)
+
+    loader.start(read_mesh, (elem.get_file(), elem.get_element_type()), finished, error, cancelled)
+
+
+def show_vinyl(vinyl: element.Vinyl, mipmaps=None) -> bool:
     """
     Fonction pour ouvrir un tapis. vinyl est modifie durant la fonction.
     :param vinyl: widget.ImageItem: Tapis
+    :param mipmaps: list: Mipmaps deja lues par read_vinyl. Si None, le fichier est lu ici.
     :return: bool: Renvoie True si tout s'est bien passe, False sinon
     """
     if not vinyl.get_file():
         return False
 
-    init_data = data.Init()
-    try:
-        if '.' + vinyl.get_file().split('.')[-1] in init_data.get_extension('vinyl'):
-            if vinyl.get_file().split('.')[-1] == 'pdf':
-                vinyl.set_array(load_pdf(vinyl.get_file()))
-            else:
-                vinyl.set_array(np.array(Image.open(vinyl.get_file())))
-        else:
-            QtWidgets.QMessageBox(init_data.get_window('error_format_file_type'),
-                                  init_data.get_window('error_format_file_title'),
-                                  init_data.get_window('error_format_file_message').format(
-                                      filename=vinyl.get_file())).exec()
+    if mipmaps is None:
+        if not is_supported(vinyl.get_file(), 'vinyl'):
             return False
-    except FileNotFoundError:
-        QtWidgets.QMessageBox(init_data.get_window('error_open_file_type'),
-                              init_data.get_window('error_open_file_title'),
-                              init_data.get_window('error_open_file_message').format(
-                                  filename=vinyl.get_file())).exec()
-        return False
+
+        try:
+            mipmaps = read_vinyl(vinyl.get_file())
+        except FileNotFoundError:
+            open_error(vinyl.get_file())
+            return False
+
+    vinyl.set_mipmaps(mipmaps)
     return True
 
 
-def load_pdf(file: str) -> np.array:
+def show_vinyl_async(vinyl: element.Vinyl, loader, callback):
+    """
+    Lit l'image du tapis en arriere-plan puis l'affiche dans le thread de l'interface graphique.
+    Si une autre image est demandee pour vinyl avant la fin de la lecture, le resultat de celle-ci est ignore.
+    :param vinyl: element.Vinyl: Tapis
+    :param loader: functions.loader.Loader: Gestionnaire des taches en arriere-plan
+    :param callback: callable: Appele avec True si tout s'est bien passe, False sinon
+    :return: None
     """
-    Charge une image pdf et renvoie un tableau numpy 3D.
+    vinyl.set_load_token(None)  # Une lecture precedente du tapis est ignoree
+    if not vinyl.get_file() or not is_supported(vinyl.get_file(), 'vinyl'):
+        callback(False)
+        return
+
+    token = object()
+    vinyl.set_load_token(token)
+
+    def current() -> bool:
+        if vinyl.get_load_token() is not token:  # Une autre image a ete demandee depuis
+            return False
+        vinyl.set_load_token(None)
+        return True
+
+    def finished(mipmaps):
+        if current():
+            callback(show_vinyl(vinyl, mipmaps))
+
+    def error(_):
+        if current():
+            open_error(vinyl.get_file())
+            callback(False)
+
+    def cancelled():
+        if current():
+            callback(False)
+
+    loader.start(read_vinyl, (vinyl.get_file(),), finished, error, cancelled)
+
+
+def load_pdf(file: str, dpi=None) -> np.array:
+    """
+    Charge la premiere page d'une image pdf et renvoie un tableau numpy 3D RGBA en uint8.
+    Le resultat n'est pas enregistre dans le cache : ses mipmaps le sont deja (voir read_vinyl).
     :param file: str: Chemin du fichier
+    :param dpi: int: Resolution. Si None, elle est deduite de la longueur du plateau et de la taille d'un pixel du tapis
     :return: np.array: Tableau 3D
     """
-    pdf = fitz.open(file)
-    pix = pdf.get_page_pixmap(0)  # Conversion en pixmap
-    if pix.alpha:  # S'il y a un canal alpha
-        return np.array(Image.frombytes("RGBA", (pix.width, pix.height), bytes(pix.samples_mv)))
-    else:
-        return np.array(Image.frombytes("RGB", (pix.width, pix.height), bytes(pix.samples_mv)))
+    import fitz  # PyMuPDF, importe a la premiere utilisation, long a charger
+
+    with fitz.open(file) as pdf:
+        page = pdf.load_page(0)
+        if dpi is None:
+            dpi = pdf_dpi(page.rect.width)
+
+        pix = page.get_pixmap(dpi=dpi)  # Conversion en pixmap
+        # Lecture directe de la memoire du pixmap, la seule copie est celle de to_rgba
+        return to_rgba(np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape((pix.height, pix.width, pix.n)))
+
+
+def pdf_dpi(page_width: float) -> int:
+    """
+    Renvoie la resolution a laquelle rasteriser un tapis pdf pour qu'un pixel ait la taille voulue sur le plateau.
+    :param page_width: float: Largeur de la page (points, 1/72 pouce)
+    :return: int: Resolution (points par pouce)
+    """
+    init_data = data.Init()
+    pixels = init_data.grid_width / init_data.get_vinyl('pdf_texel_size')  # Pixels sur la longueur du tapis
+    return max(1, round(pixels * 72 / page_width))
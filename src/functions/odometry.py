@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Comparaison d'un journal d'odometrie (position reelle du robot pendant un essai) avec la sequence prevue.
+Le journal est un fichier texte avec une ligne "t x y angle" par mesure (s, mm, mm, degres), separateurs ';', ',',
+espaces ou tabulations. Les lignes qui ne commencent pas par un nombre (en-tete, commentaires) sont ignorees.
+Les calculs sont faits sur des tableaux numpy, sans boucle sur les mesures.
+"""
+
+import re
+
+import numpy as np
+
+_SEPARATORS = re.compile(r'[;,\s]+')
+
+
+def _values(file: str, chunk_size: int):
+    """
+    Lit le journal par blocs et donne les valeurs des lignes de mesures, quatre par ligne.
+    :param file: str: Chemin du fichier
+    :param chunk_size: int: Nombre de caracteres lus a chaque fois
+    :return: generator: Valeurs t, x, y, angle a la suite
+    """
+    with open(file, 'r') as f:
+        rest = ''
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            lines = (rest + chunk).split('\n')
+            rest = lines.pop()  # Ligne pas encore terminee
+            for line in lines:
+                yield from _line(line)
+        yield from _line(rest)
+
+
+def _line(line: str) -> list:
+    """
+    Lit une ligne du journal.
+    :param line: str: Ligne
+    :return: list: [t, x, y, angle], vide si la ligne n'est pas une mesure
+    """
+    fields = _SEPARATORS.split(line.strip())
+    if len(fields) < 4:
+        return []
+    try:
+        return [float(field) for field in fields[:4]]
+    except ValueError:  # En-tete ou commentaire
+        return []
+
+
+def read(file: str, chunk_size=1 << 16) -> np.array:
+    """
+    Lit un journal d'odometrie sans garder son texte en memoire.
+    Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
+    :param file: str: Chemin du fichier
+    :param chunk_size: int: Nombre de caracteres lus a chaque fois
+    :return: np.array: Tableau (nombre de mesures, 4) [t, x, y, angle], trie par temps croissant
+    """
+    log = np.fromiter(_values(file, chunk_size), dtype=float).reshape((-1, 4))
+    if len(log) == 0:
+        raise ValueError("Aucune mesure dans le journal : " + file)
+    return log[np.argsort(log[:, 0], kind='stable')]
+
+
+def planned(header, records: np.array, times: np.array) -> np.array:
+    """
+    Calcule la position prevue par la sequence aux instants donnes, en interpolant entre les fins des commandes.
+    :param header: np.array: En-tete du programme (data.program.compile_lines)
+    :param records: np.array: Enregistrements du programme
+    :param times: np.array: Instants depuis le debut de la sequence (s)
+    :return: np.array: Tableau (len(times), 3) [x, y, angle]
+    """
+    ends = np.concatenate(([0.], records['time']))
+    poses = np.empty((len(ends), 3))
+    poses[0] = header['x'][0], header['y'][0], header['angle'][0]
+    poses[1:, 0], poses[1:, 1], poses[1:, 2] = records['x'], records['y'], records['angle']
+    angles = np.degrees(np.unwrap(np.radians(poses[:, 2])))  # Pas de saut de 360 degres entre deux commandes
+
+    result = np.empty((len(times), 3))
+    result[:, 0] = np.interp(times, ends, poses[:, 0])
+    result[:, 1] = np.interp(times, ends, poses[:, 1])
+    result[:, 2] = np.interp(times, ends, angles) % 360
+    return result
+
+
+def compare(log: np.array, header, records: np.array) -> dict:
+    """
+    Compare le journal avec la sequence prevue, le temps 0 etant la premiere mesure.
+    :param log: np.array: Journal renvoye par read
+    :param header: np.array: En-tete du programme (data.program.compile_lines)
+    :param records: np.array: Enregistrements du programme
+    :return: dict: 'planned' (n, 3) positions prevues aux instants des mesures, 'position_error' (n,) en mm,
+                   'heading_error' (n,) en degres dans [-180, 180[, 'command' (n,) indice de la commande en cours,
+                   'command_position_error' et 'command_heading_error' (nombre de commandes,) erreurs moyennes
+                   (NaN pour une commande sans mesure)
+    """
+    times = log[:, 0] - log[0, 0]
+    expected = planned(header, records, times)
+    position_error = np.hypot(log[:, 1] - expected[:, 0], log[:, 2] - expected[:, 1])
+    heading_error = (log[:, 3] - expected[:, 2] + 180) % 360 - 180
+
+    # Commande en cours a chaque mesure : les mesures apres la fin de la sequence vont a la derniere commande
+    count = max(len(records), 1)
+    command = np.minimum(np.searchsorted(records['time'], times, side='right'), count - 1)
+    samples = np.bincount(command, minlength=count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        command_position_error = np.bincount(command, position_error, count) / samples
+        command_heading_error = np.bincount(command, np.abs(heading_error), count) / samples
+
+    return {'planned': expected, 'position_error': position_error, 'heading_error': heading_error,
+            'command': command, 'command_position_error': command_position_error,
+            'command_heading_error': command_heading_error}
+
+
+def color_ramp(error: np.array, maximum: float, colors: tuple) -> np.array:
+    """
+    Donne une couleur a chaque erreur, de la premiere couleur (erreur nulle) a la derniere (erreur >= maximum).
+    :param error: np.array: Erreurs
+    :param maximum: float: Erreur qui prend la derniere couleur
+    :param colors: tuple: Couleurs (r, v, b, a) entre 0 et 1, reparties regulierement
+    :return: np.array: Tableau (len(error), 4)
+    """
+    colors = np.asarray(colors, dtype=float)
+    steps = np.linspace(0., 1., len(colors))
+    ratio = np.clip(error / maximum, 0., 1.) if maximum > 0 else np.zeros(len(error))
+    return np.stack([np.interp(ratio, steps, colors[:, channel]) for channel in range(4)], axis=1)
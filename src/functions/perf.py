@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la mesure des performances de la vue 3D et de la simulation.
+Les durees ne sont mesurees que si la fenetre des performances est affichee ou si une trace est enregistree.
+Une trace est ecrite au format Trace Event de Chrome, lisible dans chrome://tracing ou https://ui.perfetto.dev.
+
+Le profilage est active par la variable d'environnement CRUBSRUNNER_PROFILE : les fonctions donnees a
+install_profiling sont alors enveloppees par un chronometre, et un rapport (nombre d'appels, percentiles) est ecrit
+a la fermeture, sur la sortie d'erreur (valeur 1) ou dans le fichier donne. Un chemin en .prof enregistre aussi les
+statistiques de cProfile de toute l'execution. Sans la variable, rien n'est enveloppe : aucun cout.
+cProfile peut aussi etre lance et arrete depuis le menu (start_profiler, stop_profiler).
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+_start = perf_counter()
+_overlay = False
+_recording = False
+_frames = deque(maxlen=240)  # Debuts des derniers dessins de la vue
+_last = dict()  # Nom de la mesure : duree de la derniere mesure (s)
+_events = list()  # Evenements de la trace en cours
+
+PROFILE = 'CRUBSRUNNER_PROFILE'
+_calls = dict()  # Nom de la fonction : durees des appels (s)
+_profiler = None  # cProfile en cours
+
+
+def is_enabled() -> bool:
+    """
+    Indique si les durees doivent etre mesurees.
+    :return: bool: True si la fenetre des performances est affichee ou si une trace est enregistree
+    """
+    return _overlay or _recording
+
+
+def set_overlay(visible: bool):
+    """
+    Active ou non la mesure pour la fenetre des performances.
+    :param visible: bool: True si la fenetre des performances est affichee
+    :return: None
+    """
+    global _overlay
+    _overlay = visible
+
+
+def is_recording() -> bool:
+    """
+    Indique si une trace est en cours d'enregistrement.
+    :return: bool: True si une trace est enregistree
+    """
+    return _recording
+
+
+def start_trace():
+    """
+    Commence l'enregistrement d'une trace.
+    :return: None
+    """
+    global _recording
+    _events.clear()
+    _recording = True
+
+
+def stop_trace() -> list:
+    """
+    Arrete l'enregistrement de la trace.
+    :return: list: Evenements enregistres
+    """
+    global _recording
+    _recording = False
+    events = list(_events)
+    _events.clear()
+    return events
+
+
+def write_trace(file: str, events: list):
+    """
+    Ecrit une trace au format Trace Event de Chrome, dans un fichier temporaire remplace a la fin de l'ecriture.
+    :param file: str: Chemin du fichier
+    :param events: list: Evenements renvoyes par stop_trace
+    :return: None
+    """
+    tmp = file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    os.replace(tmp, file)
+
+
+def _add(name: str, begin: float, duration: float):
+    """
+    Enregistre une mesure.
+    :param name: str: Nom de la mesure
+    :param begin: float: Debut (s, perf_counter)
+    :param duration: float: Duree (s)
+    :return: None
+    """
+    _last[name] = duration
+    if _recording:
+        _events.append({'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                        'ts': (begin - _start) * 1e6, 'dur': duration * 1e6})
+
+
+@contextmanager
+def measure(name: str):
+    """
+    Mesure la duree d'un bloc : with perf.measure('paint'): ...
+    :param name: str: Nom de la mesure
+    :return: None
+    """
+    if not is_enabled():
+        yield
+        return
+
+    begin = perf_counter()
+    try:
+        yield
+    finally:
+        _add(name, begin, perf_counter() - begin)
+
+
+def timed(name: str):
+    """
+    Decorateur qui mesure la duree de chaque appel d'une fonction.
+    :param name: str: Nom de la mesure
+    :return: callable: Decorateur
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return function(*args, **kwargs)
+
+            begin = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _add(name, begin, perf_counter() - begin)
+        return wrapper
+    return decorator
+
+
+def frame():
+    """
+    Enregistre le debut d'un dessin de la vue, pour le calcul des images par seconde.
+    :return: None
+    """
+    if not is_enabled():
+        return
+
+    now = perf_counter()
+    if _recording and _frames:
+        _events.append({'name': 'fps', 'ph': 'C', 'pid': os.getpid(), 'tid': 0, 'ts': (now - _start) * 1e6,
+                        'args': {'fps': 1 / max(now - _frames[-1], 1e-6)}})
+    _frames.append(now)
+
+
+def get_fps() -> float:
+    """
+    Renvoie le nombre d'images dessinees pendant la derniere seconde.
+    :return: float: Images par seconde
+    """
+    now = perf_counter()
+    return float(sum(1 for begin in _frames if now - begin < 1.))
+
+
+def get_time(name: str) -> float:
+    """
+    Renvoie la duree de la derniere mesure.
+    :param name: str: Nom de la mesure
+    :return: float: Duree (ms), 0 si rien n'a ete mesure
+    """
+    return _last.get(name, 0.) * 1000
+
+
+def is_profiling() -> bool:
+    """
+    Indique si le profilage est demande par la variable d'environnement.
+    :return: bool: True si CRUBSRUNNER_PROFILE est definie
+    """
+    return bool(os.environ.get(PROFILE))
+
+
+def _profiled(function, name: str):
+    """
+    Enveloppe une fonction pour enregistrer la duree de chacun de ses appels.
+    Seuls les appels termines sans erreur sont comptes : PyQt rappelle un slot avec moins d'arguments apres une
+    TypeError.
+    :param function: callable: Fonction
+    :param name: str: Nom dans le rapport
+    :return: callable: Fonction enveloppee
+    """
+    durations = _calls.setdefault(name, list())
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        begin = perf_counter()
+        result = function(*args, **kwargs)
+        durations.append(perf_counter() - begin)  # list.append : sur meme depuis les threads de chargement
+        return result
+    return wrapper
+
+
+def install_profiling(targets):
+    """
+    Enveloppe les fonctions a profiler si CRUBSRUNNER_PROFILE est definie. A appeler avant de creer les objets :
+    les slots deja connectes ne seraient pas enveloppes.
+    :param targets: iterable: (classe ou module, noms des fonctions ou None pour toutes les methodes de la classe)
+    :return: None
+    """
+    if not is_profiling():
+        return
+
+    for owner, names in targets:
+        if names is None:
+            names = [name for name, value in vars(owner).items()
+                     if not name.startswith('__') and (callable(value) or isinstance(value, staticmethod))]
+        for name in names:
+            value = vars(owner)[name]
+            label = getattr(owner, '__name__', str(owner)) + '.' + name
+            if isinstance(value, staticmethod):
+                setattr(owner, name, staticmethod(_profiled(value.__func__, label)))
+            else:
+                setattr(owner, name, _profiled(value, label))
+
+    if os.environ.get(PROFILE).endswith('.prof'):
+        start_profiler()
+    atexit.register(_exit_report)
+
+
+def start_profiler():
+    """
+    Lance cProfile dans le thread de l'interface graphique.
+    :return: None
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profiler() -> cProfile.Profile:
+    """
+    Arrete cProfile.
+    :return: cProfile.Profile: Statistiques (dump_stats pour les enregistrer), None si cProfile n'etait pas lance
+    """
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    if profiler is not None:
+        profiler.disable()
+    return profiler
+
+
+def report() -> str:
+    """
+    Renvoie le rapport du profilage : pour chaque fonction appelee, le nombre d'appels, le temps total et les
+    percentiles, de la fonction au temps total le plus long a la plus courte.
+    :return: str: Rapport
+    """
+    lines = ["profile: function | calls | total [ms] | mean | p50 | p90 | p99 | max [ms]"]
+    for name, durations in sorted(_calls.items(), key=lambda item: -sum(item[1])):
+        if not durations:
+            continue
+        ordered = sorted(durations)
+        count = len(ordered)
+        lines.append("profile: {name} | {count} | {total:.1f} | {mean:.3f} | {p50:.3f} | {p90:.3f} | {p99:.3f} | "
+                     "{max:.3f}".format(name=name, count=count, total=sum(ordered) * 1000,
+                                        mean=sum(ordered) / count * 1000,
+                                        p50=ordered[int(0.5 * (count - 1))] * 1000,
+                                        p90=ordered[int(0.9 * (count - 1))] * 1000,
+                                        p99=ordered[int(0.99 * (count - 1))] * 1000, max=ordered[-1] * 1000))
+    return '\n'.join(lines)
+
+
+def _exit_report():
+    """
+    Ecrit le rapport a la fermeture, et les statistiques de cProfile si le chemin donne finit par .prof.
+    :return: None
+    """
+    destination = os.environ.get(PROFILE, '')
+    if destination.endswith('.prof'):
+        profiler = stop_profiler()
+        if profiler is not None:
+            profiler.dump_stats(destination)
+        destination = ''
+
+    if destination and destination != '1':
+        with open(destination, 'w') as f:
+            f.write(report() + '\n')
+    else:
+        print(report(), file=sys.stderr)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Envoi d'une sequence a un robot par TCP ou par liaison serie, et robot factice pour tester sans carte.
+Ce fichier n'importe que la bibliotheque standard : le robot factice se lance seul avec
+    python -m src.functions.stream --port 5000
+
+Protocole, une ligne de texte par message, champs separes par SEPARATOR :
+    start;;x;;y;;angle                                  Position de depart (mm, degres)
+    cmd;;n;;code;;argument;;duree;;x;;y;;angle          Commande n : enregistrement de data.program
+    end                                                 Fin de la sequence
+et dans l'autre sens :
+    ack;;n                                              Commande n recue
+    done;;n                                             Commande n terminee
+    odo;;x;;y;;angle                                    Position mesuree par le robot
+Controle de flux : au plus 'window' commandes envoyees et pas encore terminees. Les commandes sont aussi cadencees
+par leurs durees attendues, comme dans simulation.Run : une commande n'est pas envoyee plus de 'lead' secondes avant
+l'heure prevue de son debut.
+"""
+
+import asyncio
+import random
+import sys
+
+SEPARATOR = ';;'
+
+
+def _message(*fields) -> bytes:
+    """
+    Construit un message.
+    :param fields: any: Champs du message
+    :return: bytes: Ligne encodee
+    """
+    return (SEPARATOR.join(str(field) for field in fields) + '\n').encode('ascii')
+
+
+def _fields(line: bytes) -> list:
+    """
+    Decoupe un message recu.
+    :param line: bytes: Ligne recue
+    :return: list: Champs, vide si la ligne est vide
+    """
+    line = line.decode('ascii', 'replace').strip()
+    return line.split(SEPARATOR) if line else list()
+
+
+class Streamer:
+    """
+    Envoie les commandes d'une sequence compilee et recoit les acquittements et l'odometrie.
+    Les fonctions de rappel sont appelees dans le thread de la boucle asyncio.
+    """
+
+    def __init__(self, start: tuple, records: list, window=2, lead=0.5, ack_timeout=2.):
+        """
+        Constructeur de Streamer.
+        :param start: tuple: Position de depart (x, y, angle)
+        :param records: list: Enregistrements (code, reserve, argument, duree, temps, x, y, angle) de data.program
+        :param window: int: Nombre maximal de commandes envoyees et non terminees
+        :param lead: float: Avance maximale (s) de l'envoi d'une commande sur son debut prevu
+        :param ack_timeout: float: Delai (s) d'attente de l'acquittement d'une commande
+        """
+        self.start = start
+        self.records = records
+        self.window = window
+        self.lead = lead
+        self.ack_timeout = ack_timeout
+        self.on_ack = None  # Appele avec le numero de la commande
+        self.on_done = None  # Appele avec le numero de la commande
+        self.on_odometry = None  # Appele avec x, y, angle
+        self.loop = None
+        self.task = None
+        self.acked = dict()  # Numero : asyncio.Event
+        self.credits = None
+
+    def run(self, host: str, port: int):
+        """
+        Se connecte au robot par TCP et envoie la sequence. Bloque jusqu'a la fin : a lancer dans un thread.
+        :param host: str: Adresse du robot
+        :param port: int: Port du robot
+        :return: None
+        """
+        asyncio.run(self._main(asyncio.open_connection(host, port)))
+
+    def run_serial(self, url: str, baudrate: int):
+        """
+        Se connecte au robot par liaison serie (pyserial-asyncio) et envoie la sequence.
+        Bloque jusqu'a la fin : a lancer dans un thread.
+        :param url: str: Port serie, par exemple /dev/ttyUSB0
+        :param baudrate: int: Debit
+        :return: None
+        """
+        import serial_asyncio  # Dependance optionnelle, seulement pour la liaison serie
+        asyncio.run(self._main(serial_asyncio.open_serial_connection(url=url, baudrate=baudrate)))
+
+    def stop(self):
+        """
+        Arrete l'envoi. Peut etre appelee depuis un autre thread.
+        :return: None
+        """
+        if self.loop is not None and self.task is not None:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+
+    async def _main(self, connection):
+        """
+        Ouvre la connexion et envoie la sequence.
+        :param connection: coroutine: Ouverture de la connexion, renvoie (StreamReader, StreamWriter)
+        :return: None
+        """
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        reader, writer = await connection
+        receiver = asyncio.ensure_future(self._receive(reader))
+        try:
+            await self._send(writer)
+        finally:
+            receiver.cancel()
+            writer.close()
+
+    async def _send(self, writer):
+        """
+        Envoie les commandes en respectant la fenetre et le cadencement.
+        :param writer: asyncio.StreamWriter: Sortie
+        :return: None
+        """
+        self.credits = asyncio.Semaphore(self.window)
+        writer.write(_message('start', *self.start))
+        await writer.drain()
+
+        begin = self.loop.time()
+        for number, (opcode, _, argument, duration, time, x, y, angle) in enumerate(self.records):
+            await self.credits.acquire()  # Rendu a la reception de done
+            delay = begin + time - duration - self.lead - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.acked[number] = asyncio.Event()
+            writer.write(_message('cmd', number, opcode, argument, duration, x, y, angle))
+            await writer.drain()  # Controle de flux de la liaison
+            await asyncio.wait_for(self.acked[number].wait(), self.ack_timeout)
+
+        for _ in range(self.window):  # Attend la fin des dernieres commandes
+            await self.credits.acquire()
+        writer.write(_message('end'))
+        await writer.drain()
+
+    async def _receive(self, reader):
+        """
+        Lit les messages du robot.
+        :param reader: asyncio.StreamReader: Entree
+        :return: None
+        """
+        while True:
+            line = await reader.readline()
+            if not line:  # Connexion fermee par le robot
+                self.task.cancel()
+                return
+
+            fields = _fields(line)
+            if not fields:
+                continue
+            try:  # Une ligne mal formee est ignoree, elle ne doit pas arreter la reception
+                if fields[0] in ('ack', 'done'):
+                    number = int(fields[1])
+                elif fields[0] == 'odo':
+                    position = tuple(float(fields[i]) for i in range(1, 4))
+            except (ValueError, IndexError):
+                continue
+
+            if fields[0] == 'ack' and number in self.acked:
+                self.acked.pop(number).set()
+                if self.on_ack is not None:
+                    self.on_ack(number)
+            elif fields[0] == 'done':
+                self.credits.release()
+                if self.on_done is not None:
+                    self.on_done(number)
+            elif fields[0] == 'odo' and self.on_odometry is not None:
+                self.on_odometry(*position)
+
+
+class FakeRobot:
+    """
+    Robot factice : execute les commandes recues en suivant leurs durees et renvoie une odometrie bruitee.
+    """
+
+    def __init__(self, period=0.05, noise=0.5):
+        """
+        Constructeur de FakeRobot.
+        :param period: float: Periode (s) d'envoi de l'odometrie
+        :param noise: float: Ecart type du bruit ajoute a chaque envoi (mm, et dixiemes de degre pour l'angle)
+        """
+        self.period = period
+        self.noise = noise
+
+    async def serve(self, host: str, port: int):
+        """
+        Attend les connexions.
+        :param host: str: Adresse d'ecoute
+        :param port: int: Port d'ecoute
+        :return: None
+        """
+        server = await asyncio.start_server(self._client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _client(self, reader, writer):
+        """
+        Gere une connexion.
+        :param reader: asyncio.StreamReader: Entree
+        :param writer: asyncio.StreamWriter: Sortie
+        :return: None
+        """
+        commands = asyncio.Queue()
+        pose = [0., 0., 0.]
+        executor = asyncio.ensure_future(self._execute(commands, pose, writer))
+        try:
+            while True:
+                fields = _fields(await reader.readline())
+                if not fields or fields[0] == 'end':
+                    break
+                if fields[0] == 'start':
+                    pose[:] = (float(field) for field in fields[1:4])
+                elif fields[0] == 'cmd':
+                    writer.write(_message('ack', fields[1]))
+                    await writer.drain()
+                    await commands.put((int(fields[1]), *(float(field) for field in fields[4:8])))
+            await commands.join()
+        finally:
+            executor.cancel()
+            writer.close()
+
+    async def _execute(self, commands, pose: list, writer):
+        """
+        Execute les commandes une par une.
+        :param commands: asyncio.Queue: Commandes (numero, duree, x, y, angle) a atteindre
+        :param pose: list: Position courante [x, y, angle], modifiee sur place
+        :param writer: asyncio.StreamWriter: Sortie
+        :return: None
+        """
+        drift = [0., 0., 0.]  # Erreur accumulee de l'odometrie
+        while True:
+            number, duration, x, y, angle = await commands.get()
+            begin, target = list(pose), (x, y, angle)
+            turn = (angle - begin[2] + 180) % 360 - 180  # Rotation la plus courte
+            steps = max(1, int(duration / self.period))
+            for step in range(1, steps + 1):
+                ratio = step / steps
+                pose[:] = (begin[0] + (target[0] - begin[0]) * ratio, begin[1] + (target[1] - begin[1]) * ratio,
+                           (begin[2] + turn * ratio) % 360)
+                drift[0] += random.gauss(0., self.noise)
+                drift[1] += random.gauss(0., self.noise)
+                drift[2] += random.gauss(0., self.noise / 10)
+                writer.write(_message('odo', round(pose[0] + drift[0], 1), round(pose[1] + drift[1], 1),
+                                      round((pose[2] + drift[2]) % 360, 2)))
+                await asyncio.sleep(duration / steps)
+            writer.write(_message('done', number))
+            await writer.drain()
+            commands.task_done()
+
+
+def main(argv=None):
+    """
+    Lance le robot factice.
+    :param argv: list: Arguments de la ligne de commande, sys.argv par defaut
+    :return: None
+    """
+    import argparse  # Ligne de commande seulement
+
+    parser = argparse.ArgumentParser(description="Robot factice pour tester l'envoi des sequences de CrubsRunner")
+    parser.add_argument('--host', default='127.0.0.1', help="adresse d'ecoute")
+    parser.add_argument('--port', type=int, default=5000, help="port d'ecoute")
+    parser.add_argument('--period', type=float, default=0.05, help="periode d'envoi de l'odometrie (s)")
+    parser.add_argument('--noise', type=float, default=0.5, help="bruit de l'odometrie (mm)")
+    args = parser.parse_args(argv)
+
+    print("Robot factice en ecoute sur {host}:{port}".format(host=args.host, port=args.port), file=sys.stderr)
+    try:
+        asyncio.run(FakeRobot(args.period, args.noise).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -28,12 +28,14 @@
 Fichier contenant la classe Run.
 """
 
-from PyQt5 import QtCore, QtWidgets, QtGui
+from PyQt5 import QtCore, QtGui
 import numpy as np
 from sys import path
 
 from src import ui
+from src import data
 from src import element
+from src import functions
 
 
 # Note : mr mean main robot and sr mean second robot
@@ -72,7 +74,7 @@ class Run:
         self.start_time_move_mr.timeout.connect(self._start_time_mr)
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self._timer)
-        self.time = -self.init_data.get_run("time_before_start") / 1000  # Conversion en secondes
+        self.time = -self.init_data.time_before_start / 1000  # Conversion en secondes
         self.time_move_sr = QtCore.QTimer()
         self.time_move_sr.timeout.connect(self._time_move_sr)
         self.start_time_move_sr = QtCore.QTimer()
@@ -90,8 +92,11 @@ class Run:
         self.dist_per_time_sr = 0
         self.rest_sr = 0
         self.number_command_sr = 0
-        self.main_robot_file = list()
+        self.main_robot_file = list()  # Ligne de chaque commande, pour l'affichage
         self.second_robot_file = list()
+        self.main_robot_program = np.zeros(0, dtype=data.program.RECORD)  # Sequence compilee (data.program)
+        self.second_robot_program = np.zeros(0, dtype=data.program.RECORD)
+        self.moves = dict()  # Deplacement de chaque code de commande (data.program.moves)
         self.move_cmd_mr = None
         self.last_move_mr = None
         self.move_cmd_sr = None
@@ -116,6 +121,13 @@ class Run:
         """
         self.second_robot = rbt
 
+    def speed(self) -> float:
+        """
+        Renvoie le coefficient de vitesse de la simulation choisi dans la fenetre principale.
+        :return: float: Coefficient de vitesse
+        """
+        return self.init_data.speed_simulation_values[self.parent.speed_simulation_btn_nb]
+
     def is_ongoing(self) -> bool:
         """
         Indique si une simulation est en cours.
@@ -231,64 +243,48 @@ class Run:
         mr_theoretical_time = 0.
         sr_theoretical_time = 0.
 
+        # Les sequences sont compilees une fois : la simulation lit les enregistrements, sans analyse de texte
+        self.moves = data.program.moves(self.save_data)
         if self.main_robot.is_running():  # Si le robot principal fait la simulation
             self.nb_robot += 1
-            try:
-                with open(self.main_robot.get_gcrubs_file(), 'r') as file:  # Lit les instructions
-                    self.main_robot_file = file.readlines()
-                    for line in self.main_robot_file:
-                        if self.init_data.get_main_robot('position_text') in line:
-                            self.go_to_start(self.main_robot, line)  # Place le robot au point de depart
-                            break
-
-            except FileNotFoundError:
-                QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
-                                      self.init_data.get_window('error_open_file_title'),
-                                      self.init_data.get_window('error_open_file_message').format(
-                                          filename=file)).exec()
-                self.finish()
-                return
-            mr_theoretical_time = self.calculate_theoretical_time(self.main_robot, self.main_robot_file, self.save_data)
+            self.main_robot_file, self.main_robot_program = self.load(self.main_robot)
+            mr_theoretical_time = float(self.main_robot_program['time'][-1]) if len(self.main_robot_program) else 0.
 
         if self.second_robot.is_running():  # Si le robot secondaire fait la simulation
             self.nb_robot += 1
-            try:
-                with open(self.second_robot.get_gcrubs_file(), 'r') as file:  # Lit les instructions
-                    self.second_robot_file = file.readlines()
-                    for line in self.second_robot_file:
-                        if self.init_data.get_main_robot('position_text') in line:
-                            self.go_to_start(self.second_robot, line)  # Place le robot au point de depart
-                            break
-
-            except FileNotFoundError:
-                QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
-                                      self.init_data.get_window('error_open_file_title'),
-                                      self.init_data.get_window('error_open_file_message').format(
-                                          filename=file)).exec()
-                self.finish()
-                return
-            sr_theoretical_time = self.calculate_theoretical_time(self.second_robot, self.second_robot_file,
-                                                                  self.save_data)
+            self.second_robot_file, self.second_robot_program = self.load(self.second_robot)
+            sr_theoretical_time = float(self.second_robot_program['time'][-1]) \
+                if len(self.second_robot_program) else 0.
 
         self.running = True
         self.window.set_theoretical_time(max(mr_theoretical_time, sr_theoretical_time))
         self.set_refresh_time()
-        self.start_time_move_mr.start(int(self.init_data.get_run('time_before_start') /
-                                      self.init_data.get_window('speed_simulation_btn_values')[
-                                          self.parent.speed_simulation_btn_nb]))
-        self.start_time_move_sr.start(int(self.init_data.get_run('time_before_start') /
-                                      self.init_data.get_window('speed_simulation_btn_values')[
-                                          self.parent.speed_simulation_btn_nb]))
-        self.timer.start(
-            int(self.init_data.get_run('timer_refresh') / self.init_data.get_window('speed_simulation_btn_values')[
-                self.parent.speed_simulation_btn_nb]))  # Demarre le chrono
-
+        self.start_time_move_mr.start(int(self.init_data.time_before_start / self.speed()))
+        self.start_time_move_sr.start(int(self.init_data.time_before_start / self.speed()))
+        self.timer.start(int(self.init_data.timer_refresh / self.speed()))  # Demarre le chrono
+
+    def load(self, rbt: element.Robot) -> tuple:
+        """
+        Compile la sequence du robot et le place au point de depart.
+        :param rbt: element.Robot: Robot
+        :return: tuple: (list: Ligne de chaque commande, np.array: Enregistrements (data.program.RECORD))
+        """
+        # Lignes deja lues a l'import du fichier et affichees dans la fenetre du robot
+        lines = rbt.get_window().get_sequence_lines()
+        sources = list()
+        header, records = data.program.compile_lines(lines, self.save_data, rbt.get_speed(), rbt.get_speed_rotation(),
+                                                     sources)
+        if any(self.init_data.position_text in line for line in lines):  # Sinon le robot reste ou il est
+            self.place(rbt, float(header['x'][0]), float(header['y'][0]), float(header['angle'][0]))
+        return sources, records
+
+    @functions.perf.timed('simulation')
     def _timer(self):
         """
         Affiche le temps qui s'ecoule.
         :return: None
         """
-        self.time += self.init_data.get_run('timer_refresh') / 1000
+        self.time += self.init_data.timer_refresh / 1000
         self.window.set_time(self.time)
 
     def _start_time_mr(self):
@@ -299,6 +295,7 @@ class Run:
         self.start_time_move_mr.stop()
         self.next_command_mr()
 
+    @functions.perf.timed('simulation')
     def _time_move_mr(self):
         """
         Fait bouger le robot principal.
@@ -321,10 +318,9 @@ class Run:
         :return: None
         """
         self.timing_mr = False
-        if self.number_command_mr < len(self.main_robot_file):  # S'il reste des commandes
-            cmd = self.main_robot_file[self.number_command_mr]  # Recupere la commande
-            self.window.set_mr_command(cmd)  # Affiche la commande
-            self.moving(cmd, self.main_robot)  # Agit
+        if self.number_command_mr < len(self.main_robot_program):  # S'il reste des commandes
+            self.window.set_mr_command(self.main_robot_file[self.number_command_mr])  # Affiche la commande
+            self.moving(self.main_robot_program[self.number_command_mr], self.main_robot)  # Agit
             self.number_command_mr += 1
         else:  # Sinon arret
             self.main_robot.set_running(False)
@@ -367,6 +363,7 @@ class Run:
         self.start_time_move_sr.stop()
         self.next_command_sr()
 
+    @functions.perf.timed('simulation')
     def _time_move_sr(self):
         """
         Fait bouger le robot secondaire.
@@ -389,10 +386,9 @@ class Run:
         :return: None
         """
         self.timing_sr = False
-        if self.number_command_sr < len(self.second_robot_file):  # S'il reste des commandes
-            cmd = self.second_robot_file[self.number_command_sr]  # Recuperation de la commande
-            self.window.set_sr_command(cmd)  # Affichage de la commande
-            self.moving(cmd, self.second_robot)  # Agit
+        if self.number_command_sr < len(self.second_robot_program):  # S'il reste des commandes
+            self.window.set_sr_command(self.second_robot_file[self.number_command_sr])  # Affichage de la commande
+            self.moving(self.second_robot_program[self.number_command_sr], self.second_robot)  # Agit
             self.number_command_sr += 1
         else:
             self.second_robot.set_running(False)
@@ -408,8 +404,7 @@ class Run:
         :param time: float: Duree en secondes
         :return: None
         """
-        self.sleep_mr.start(
-            time * 1000 / self.init_data.get_window('speed_simulation_btn_values')[self.parent.speed_simulation_btn_nb])
+        self.sleep_mr.start(time * 1000 / self.speed())
 
     def _stop_sleep_mr(self):
         """
@@ -425,8 +420,7 @@ class Run:
         :param time: float: Duree en secondes
         :return: None
         """
-        self.sleep_sr.start(time * 1000 / self.init_data.get_window('speed_simulation_btn_values')[
-            self.parent.speed_simulation_btn_nb])
+        self.sleep_sr.start(time * 1000 / self.speed())
 
     def _stop_sleep_sr(self):
         """
@@ -436,169 +430,72 @@ class Run:
         self.sleep_sr.stop()
         self.next_command_sr()
 
-    def moving(self, cmd: str, rbt: element.Robot):
+    def moving(self, record: np.void, rbt: element.Robot):
         """
         Decide ce que le robot doit faire selon la commande.
-        :param cmd: str: Commande
+        :param record: np.void: Enregistrement de la commande (data.program.RECORD)
         :param rbt: Robot auquel correspond la commande
         :return: None
         """
         # Si la vitesse de simulation a ete modifiee on change la vitesse d'affichage du temps
-        if self.timer.interval() != self.init_data.get_run('timer_refresh') / \
-                self.init_data.get_window('speed_simulation_btn_values')[self.parent.speed_simulation_btn_nb]:
+        if self.timer.interval() != self.init_data.timer_refresh / self.speed():
             self.timer.stop()
-            self.timer.start(self.init_data.get_run('timer_refresh') /
-                             self.init_data.get_window('speed_simulation_btn_values')[
-                                 self.parent.speed_simulation_btn_nb])
-
-        name = self.save_data.get_gcrubs('cmd_name')  # On recupere les commandes
-
-        sep = name.get('Se deplacer en avant').find('{')
-        if cmd[:sep] == name.get('Se deplacer en avant')[:sep]:
-            self.move(rbt, cmd, 'Se deplacer en avant', sep)
-            return
-
-        sep = name.get('Se deplacer en arriere').find('{')
-        if cmd[:sep] == name.get('Se deplacer en arriere')[:sep]:
-            self.move(rbt, cmd, 'Se deplacer en arriere', sep)
-            return
-
-        sep = name.get('Tourner a droite').find('{')
-        if cmd[:sep] == name.get('Tourner a droite')[:sep]:
-            self.move(rbt, cmd, 'Tourner a droite', sep)
-            return
-
-        sep = name.get('Tourner a gauche').find('{')
-        if cmd[:sep] == name.get('Tourner a gauche')[:sep]:
-            self.move(rbt, cmd, 'Tourner a gauche', sep)
-            return
-
-        # Pour toutes les autres commandes, on verifie que la touche correspondante n'est pas la meme
-        # qu'une touche definie par un mouvement
-        for key, value in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                              self.save_data.get_gcrubs('cmd_key').values()):
-            if value == self.save_data.get_gcrubs('keys').get('go_up') and \
-                    (key != 'Se deplacer en avant' and key != 'Se deplacer en arriere' and
-                     key != 'Tourner a gauche' and key != 'Tourner a droite'):
-                sep = name.get(key).find('{')
-                if cmd[:sep] == name.get(key)[:sep]:
-                    self.move(rbt, cmd, key, sep)
-                    return
-            elif value == self.save_data.get_gcrubs('keys').get('go_down') and \
-                    (key != 'Se deplacer en avant' and key != 'Se deplacer en arriere' and
-                     key != 'Tourner a gauche' and key != 'Tourner a droite'):
-                sep = name.get(key).find('{')
-                if cmd[:sep] == name.get(key)[:sep]:
-                    self.move(rbt, cmd, key, sep)
-                    return
-            elif value == self.save_data.get_gcrubs('keys').get('go_right') and \
-                    (key != 'Se deplacer en avant' and key != 'Se deplacer en arriere' and
-                     key != 'Tourner a gauche' and key != 'Tourner a droite'):
-                sep = name.get(key).find('{')
-                if cmd[:sep] == name.get(key)[:sep]:
-                    self.move(rbt, cmd, key, sep)
-                    return
-            elif value == self.save_data.get_gcrubs('keys').get('go_left') and \
-                    (key != 'Se deplacer en avant' and key != 'Se deplacer en arriere' and
-                     key != 'Tourner a gauche' and key != 'Tourner a droite'):
-                sep = name.get(key).find('{')
-                if cmd[:sep] == name.get(key)[:sep]:
-                    self.move(rbt, cmd, key, sep)
-                    return
-
-        sep = name.get('Pause').find('{')
-        if cmd[:sep] == name.get('Pause')[:sep]:  # si c'est une pause
-            end_sep = sep
-            for char in cmd[sep:]:
-                if not char.isdigit() and char != '.':  # Si ce n'est pas un nombre
-                    break
-                end_sep += 1
+            self.timer.start(self.init_data.timer_refresh / self.speed())
 
+        opcode = int(record['opcode'])
+        if opcode == self.init_data.get_main_robot('program_opcodes').get('Pause'):  # Si c'est une pause
             if rbt.is_main_robot():
-                self._sleep_mr(float(cmd[sep:end_sep]))
+                self._sleep_mr(float(record['duration']))
                 self.timing_mr = True
             else:
-                self._sleep_sr(float(cmd[sep:end_sep]))
+                self._sleep_sr(float(record['duration']))
                 self.timing_sr = True
             return
 
-    def move(self, rbt: element.Robot, cmd: str, key: str, sep: int):
+        move = self.moves.get(opcode, (0, 0, 0))
+        if move != (0, 0, 0):  # Les autres commandes ne prennent pas de temps
+            self.move(rbt, float(record['argument']), np.array(move))
+
+    def move(self, rbt: element.Robot, distance: float, move: np.array):
         """
         Deplace le robot.
         :param rbt: element.Robot: Robot qui doit se deplacer
-        :param cmd: str: Commande
-        :param key: str: Touche correspondant a la commande
-        :param sep: int: Position du debut de la distance a lire
+        :param distance: float: Distance (mm) ou angle (degres) a parcourir
+        :param move: np.array: Direction du deplacement dans le repere du robot [dx, dy, rz]
         :return: None
         """
-        self.timing_mr = True
-        self.timing_sr = True
-        cmd_key = self.save_data.get_gcrubs('cmd_key')
-        rotation = False
-
-        if cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('go_up'):
-            move = np.array([0, 1, 0])
-        elif cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('go_down'):
-            move = np.array([0, -1, 0])
-        elif cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('go_right'):
-            move = np.array([1, 0, 0])
-        elif cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('go_left'):
-            move = np.array([-1, 0, 0])
-        elif cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('turn_right'):
-            rotation = True
-            move = np.array([0, 0, -1])
-        elif cmd_key.get(key) == self.save_data.get_gcrubs('keys').get('turn_left'):
-            rotation = True
-            move = np.array([0, 0, 1])
-        else:
-            if rbt.is_main_robot():
-                self.timing_mr = False
-            else:
-                self.timing_sr = False
-            return
-
-        end_sep = sep
-        for char in cmd[sep:]:
-            if not char.isdigit():
-                break  # Obtention de la position de la fin de la valeur
-            end_sep += 1
+        rotation = move[2] != 0
 
         if rbt.is_main_robot():
+            self.timing_mr = True
             # Calcul de la distance a parcourir a chaque appel de _time_move_mr
             if rotation:
-                self.dist_per_time_mr = rbt.get_speed_rotation() * self.refresh_time / 1000 * \
-                                        self.init_data.get_window('speed_simulation_btn_values')[
-                                            self.parent.speed_simulation_btn_nb]
+                self.dist_per_time_mr = rbt.get_speed_rotation() * self.refresh_time / 1000 * self.speed()
             else:
-                self.dist_per_time_mr = rbt.get_speed() * self.refresh_time / 1000 * \
-                                        self.init_data.get_window('speed_simulation_btn_values')[
-                                            self.parent.speed_simulation_btn_nb]
+                self.dist_per_time_mr = rbt.get_speed() * self.refresh_time / 1000 * self.speed()
 
             # Calcul du nombre d'appel a _time_move_mr
-            self.nb_time_mr = int(cmd[sep:end_sep]) // self.dist_per_time_mr
+            self.nb_time_mr = distance // self.dist_per_time_mr
 
             # Calcul du reste a parcourir
-            self.rest_mr = int(cmd[sep:end_sep]) - self.nb_time_mr * self.dist_per_time_mr
+            self.rest_mr = distance - self.nb_time_mr * self.dist_per_time_mr
 
             self.time_move_mr.start(self.refresh_time)
             self.move_cmd_mr = move * self.dist_per_time_mr
             self.last_move_mr = move * self.rest_mr
         else:
+            self.timing_sr = True
             # Calcul de la distance a parcourir a chaque appel de _time_move_sr
             if rotation:
-                self.dist_per_time_sr = rbt.get_speed_rotation() * self.refresh_time / 1000 * \
-                                        self.init_data.get_window('speed_simulation_btn_values')[
-                                            self.parent.speed_simulation_btn_nb]
+                self.dist_per_time_sr = rbt.get_speed_rotation() * self.refresh_time / 1000 * self.speed()
             else:
-                self.dist_per_time_sr = rbt.get_speed() * self.refresh_time / 1000 * \
-                                        self.init_data.get_window('speed_simulation_btn_values')[
-                                            self.parent.speed_simulation_btn_nb]
+                self.dist_per_time_sr = rbt.get_speed() * self.refresh_time / 1000 * self.speed()
 
             # Calcul du nombre d'appel a _time_move_sr
-            self.nb_time_sr = int(cmd[sep:end_sep]) // self.dist_per_time_sr
+            self.nb_time_sr = distance // self.dist_per_time_sr
 
             # Calcul du reste a parcourir
-            self.rest_sr = int(cmd[sep:end_sep]) - self.nb_time_sr * self.dist_per_time_sr
+            self.rest_sr = distance - self.nb_time_sr * self.dist_per_time_sr
 
             self.time_move_sr.start(self.refresh_time)
             self.move_cmd_sr = move * self.dist_per_time_sr
@@ -622,90 +519,32 @@ class Run:
 
         coord[2] = float(line[line.find("angle = ") + len("angle = "):line.find(" degres")])  # Obtention de l'angle
 
+        Run.place(rbt, *coord)
+        return coord
+
+    @staticmethod
+    def place(rbt: element.Robot, x: float, y: float, angle: float):
+        """
+        Place le robot a une position.
+        :param rbt: element.Robot: Robot concerne
+        :param x: float: Position selon x (mm)
+        :param y: float: Position selon y (mm)
+        :param angle: float: Angle (degres)
+        :return: None
+        """
         # Place le robot dans l'orientation de depart car move_robot deplace en coordonnees locales
         rbt.move_robot(0, 0, -rbt.get_angle())
-        rbt.move_robot(coord[0] - rbt.get_coord()[0], coord[1] - rbt.get_coord()[1], coord[2] - rbt.get_angle())
-
-        return coord
+        rbt.move_robot(x - rbt.get_coord()[0], y - rbt.get_coord()[1], angle - rbt.get_angle())
 
     @staticmethod
     def calculate_theoretical_time(robot: element.Robot, sequence: list, save_data) -> float:
         """
         Calcule le temps theorique que doit passer le robot a executer une sequence.
-        Ne gere que les rotations et les deplacements en avant et en arriere.
-        Aucun deplacement ajoute n'est pris en compte.
+        Ne gere que les rotations, les deplacements et les pauses.
         :param robot: element.Robot: Robot auquel correspond la sequence.
         :param sequence: list: Liste des commandes
         :param save_data: data.Save: Donnees de sauvegardes
         :return: float: Temps en secondes
         """
-        time = 0.
-        name = save_data.get_gcrubs('cmd_name')  # On recupere les commandes
-
-        for line in sequence:
-            sep = name.get('Se deplacer en avant').find('{')
-            if line[:sep] == name.get('Se deplacer en avant')[:sep]:
-                time += Run.time_from_command(robot, line, sep, 'Se deplacer en avant', save_data)
-                continue
-
-            sep = name.get('Se deplacer en arriere').find('{')
-            if line[:sep] == name.get('Se deplacer en arriere')[:sep]:
-                time += Run.time_from_command(robot, line, sep, 'Se deplacer en arriere', save_data)
-                continue
-
-            sep = name.get('Tourner a droite').find('{')
-            if line[:sep] == name.get('Tourner a droite')[:sep]:
-                time += Run.time_from_command(robot, line, sep, 'Tourner a droite', save_data)
-                continue
-
-            sep = name.get('Tourner a gauche').find('{')
-            if line[:sep] == name.get('Tourner a gauche')[:sep]:
-                time += Run.time_from_command(robot, line, sep, 'Tourner a gauche', save_data)
-                continue
-
-            sep = name.get('Pause').find('{')
-            if line[:sep] == name.get('Pause')[:sep]:  # si c'est une pause
-                end_sep = sep
-                for char in line[sep:]:
-                    if not char.isdigit() and char != '.':  # Si ce n'est pas un chiffre
-                        break
-                    end_sep += 1
-
-                time += float(line[sep:end_sep])
-                continue
-
-        return time
-
-    @staticmethod
-    def time_from_command(robot: element.Robot, cmd: str, sep: int, key: str, save_data) -> float:
-        """
-        Renvoie le temps necessaire au deplacement du robot selon la distance a parcourir.
-        :param robot: element.Robot: Robot dont on veut connaitre le temps de deplacement
-        :param cmd: str: Commande sequentielle
-        :param sep: int: Position du debut de la distance
-        :param key: str: Touche correspondante au deplacement
-        :param save_data: data.Save: Donnees de sauvegarde
-        :return: float: Temps du deplacement en secondes
-        """
-        cmd_key = save_data.get_gcrubs('cmd_key')
-        if cmd_key.get(key) == save_data.get_gcrubs('keys').get('turn_right') or \
-                cmd_key.get(key) == save_data.get_gcrubs('keys').get('turn_left'):
-            rotation = True
-        elif cmd_key.get(key) == save_data.get_gcrubs('keys').get('go_up') or \
-                cmd_key.get(key) == save_data.get_gcrubs('keys').get('go_down') or \
-                cmd_key.get(key) == save_data.get_gcrubs('keys').get('go_left') or \
-                cmd_key.get(key) == save_data.get_gcrubs('keys').get('go_right'):
-            rotation = False
-        else:
-            return 0.
-
-        end_sep = sep
-        for char in cmd[sep:]:
-            if not char.isdigit():
-                break  # Obtention de la position de la fin de la valeur
-            end_sep += 1
-
-        if rotation:
-            return int(cmd[sep:end_sep]) / robot.get_speed_rotation()
-        else:
-            return int(cmd[sep:end_sep]) / robot.get_speed()
+        records = data.program.compile_lines(sequence, save_data, robot.get_speed(), robot.get_speed_rotation())[1]
+        return float(records['time'][-1]) if len(records) else 0.
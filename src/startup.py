@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+"""
+Fichier contenant la mesure du temps de demarrage de CrubsRunner.
+La mesure est activee par l'option --startup-report ou par la variable d'environnement CRUBSRUNNER_STARTUP_REPORT
+(1 pour afficher le rapport, ou chemin du fichier dans lequel l'ecrire).
+Le rapport donne le temps d'import de chaque module, au format de python -X importtime, puis les etapes du lancement
+jusqu'au premier affichage de la vue 3D.
+Ce fichier n'importe rien de lourd : il doit etre importe avant tout le reste.
+"""
+
+import os
+import sys
+from time import perf_counter
+
+OPTION = '--startup-report'
+ENVIRONMENT = 'CRUBSRUNNER_STARTUP_REPORT'
+
+_start = perf_counter()
+_imports = list()  # (profondeur, module, temps propre, temps cumule) dans l'ordre de fin d'import
+_children = list()  # Temps passe dans les imports enfants de chaque import en cours
+_steps = list()  # (etape, temps depuis le lancement)
+_filter = None
+
+
+class _ImportTimer:
+    """
+    Chercheur de modules (sys.meta_path) qui mesure le temps d'execution de chaque module importe.
+    Il ne trouve rien lui-meme : il demande aux chercheurs suivants et enveloppe le chargement du module trouve.
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        """
+        Cherche le module avec les chercheurs suivants. Cette methode n'a pas a etre appelee.
+        :param name: str: Nom complet du module
+        :param path: list: Chemins du paquet parent
+        :param target: module: Module a recharger
+        :return: ModuleSpec: Specification du module, None s'il n'est pas trouve
+        """
+        finders = sys.meta_path[sys.meta_path.index(self) + 1:]
+        for finder in finders:
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is None:
+                continue
+
+            # Seuls les chargeurs propres a un fichier sont enveloppes, pas les classes partagees (modules integres)
+            loader = spec.loader
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+                loader.exec_module = _timed(loader.exec_module, name)
+            return spec
+        return None
+
+
+def _timed(exec_module, name: str):
+    """
+    Enveloppe l'execution d'un module pour la chronometrer.
+    :param exec_module: callable: Fonction d'execution du chargeur
+    :param name: str: Nom du module
+    :return: callable: Fonction enveloppee
+    """
+    def exec_timed(module):
+        _children.append(0.)
+        begin = perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            total = perf_counter() - begin
+            children = _children.pop()
+            if _children:
+                _children[-1] += total
+            _imports.append((len(_children), name, total - children, total))
+    return exec_timed
+
+
+def is_enabled() -> bool:
+    """
+    Indique si la mesure du demarrage est demandee.
+    :return: bool: True si la mesure est active
+    """
+    return OPTION in sys.argv or bool(os.environ.get(ENVIRONMENT))
+
+
+def install():
+    """
+    Commence la mesure des imports si elle est demandee. Doit etre appelee avant les autres imports.
+    :return: None
+    """
+    if is_enabled() and not any(isinstance(finder, _ImportTimer) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _ImportTimer())
+
+
+def mark(step: str):
+    """
+    Enregistre le temps ecoule depuis le lancement pour une etape.
+    :param step: str: Nom de l'etape
+    :return: None
+    """
+    if is_enabled():
+        _steps.append((step, perf_counter() - _start))
+
+
+def watch_first_paint(app, widget):
+    """
+    Enregistre l'etape 'first_paint' au premier affichage de widget, puis ecrit le rapport.
+    :param app: QtWidgets.QApplication: Application
+    :param widget: QtWidgets.QWidget: Widget dont le premier affichage termine le demarrage (la vue 3D)
+    :return: None
+    """
+    global _filter
+    if not is_enabled():
+        return
+
+    from PyQt5 import QtCore
+
+    class FirstPaint(QtCore.QObject):
+        """
+        Filtre d'evenements qui attend le premier affichage du widget.
+        """
+
+        def eventFilter(self, obj, event) -> bool:
+            if obj is widget and event.type() == QtCore.QEvent.Paint:
+                app.removeEventFilter(self)
+                mark('first_paint')
+                QtCore.QTimer.singleShot(0, report)  # Apres la fin de l'affichage
+            return False
+
+    _filter = FirstPaint()
+    app.installEventFilter(_filter)
+
+
+def report():
+    """
+    Ecrit le rapport du demarrage sur la sortie d'erreur, ou dans le fichier donne par CRUBSRUNNER_STARTUP_REPORT.
+    :return: None
+    """
+    lines = ["import time: self [us] | cumulative | imported package"]
+    for depth, name, self_time, total in _imports:
+        lines.append("import time: {self:>9} | {total:>10} | {indent}{name}".format(
+            self=int(self_time * 1e6), total=int(total * 1e6), indent="  " * depth, name=name))
+
+    lines.append("")
+    lines.append("startup: step | time since launch [ms]")
+    for step, time in _steps:
+        lines.append("startup: {step} | {time:.1f}".format(step=step, time=time * 1000))
+
+    destination = os.environ.get(ENVIRONMENT, '')
+    if destination and destination != '1':
+        with open(destination, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    else:
+        print('\n'.join(lines), file=sys.stderr)
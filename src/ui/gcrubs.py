@@ -158,6 +158,7 @@ class GCrubs:
 
         self.save_data.set_gcrubs('cmd_name', cmd_name)
         self.save_data.set_gcrubs('cmd_key', cmd_key)
+        self.parent.viewer.update_keys()
         self.parent.main_robot.sequence_list_update()
         self.window.close()
 
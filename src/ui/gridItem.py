@@ -29,6 +29,7 @@ Fichier qui contient la classe GridItem.
 """
 
 import pyqtgraph.opengl as gl
+import numpy as np
 from PyQt5 import QtGui, QtWidgets
 from time import time
 
@@ -67,6 +68,14 @@ class GridItem(gl.GLGridItem):
         self.group_box = QtWidgets.QGroupBox(self.init_data.get_grid('element_name'), self.window)
         self.window_layout = QtWidgets.QGridLayout(self.window)
 
+    def get_min_max(self) -> np.array:
+        """
+        Renvoie les coordonnees minimales et maximales de la grille selon chaque axe, dans son repere local.
+        :return: np.array: [[min x, max x], [min y, max y], [min z, max z]] contient des flottants
+        """
+        size = self.size()
+        return np.array([[-size.x() / 2, size.x() / 2], [-size.y() / 2, size.y() / 2], [0., 0.]])
+
     def properties(self):
         """
         Cree la fenetre des proprietes
@@ -29,7 +29,10 @@ Fichier qui contient la classe MainWindow.
 """
 
 from PyQt5 import QtWidgets, QtGui, QtCore
+import pyqtgraph.opengl as gl
+import numpy as np
 from time import time
+import os
 from platform import system
 from sys import path
 
@@ -56,16 +59,24 @@ class MainWindow(QtWidgets.QMainWindow):
         self.save_data = data.Save()
         self.init_data = self.save_data.get_init_data()
 
-        self.doing = list()
-        self.undoing = list()
+        self.history = functions.history.History(self.init_data.get_window('max_len_doing'))
         self.dropped_filename = ""
         self.time = 0.
+        self.loader = functions.loader.Loader(self.save_data, self)
+        self.autosave = functions.autosave.Autosave(self.save_data, self)
+        self.robot_link = None  # Envoi des sequences a la carte du robot, cree au premier envoi
+        self.odometry_items = list()  # Chemins prevu et reel de la comparaison d'odometrie
+        # Positions mesurees par le robot pendant l'envoi, tableau agrandi par doublement (voir data.Waypoints)
+        self.stream_points = np.empty((self.init_data.get_run('stream_odometry_capacity'), 3), dtype=np.float32)
+        self.stream_length = 0
+        self.stream_item = None  # Chemin mesure par le robot pendant l'envoi
+        self.restored_sequences = dict()  # Sequences de la sauvegarde automatique, utilisees par update_
 
         self.board = element.Board(self.save_data, self)
         self.main_robot = element.Robot(self.save_data, self, True)
         self.second_robot = element.Robot(self.save_data, self, False)
         self.vinyl = element.Vinyl(self, self.save_data)
-        self.gcrubs = ui.GCrubs(self.save_data, self)
+        self.gcrubs = None  # Fenetre d'edition des commandes, creee a la premiere ouverture
 
         self.layout = QtWidgets.QVBoxLayout()
         self.center_widget = QtWidgets.QWidget()
@@ -99,6 +110,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.run_action = QtWidgets.QAction(self.init_data.get_run('run_action_name'), self)
         self.stop_run_action = QtWidgets.QAction(self.init_data.get_run('stop_run_action_name'), self)
         self.key_action = QtWidgets.QAction(self.init_data.get_window('key_action_name'), self)
+        self.perf_action = QtWidgets.QAction(self.init_data.get_window('perf_action_name'), self)
+        self.trace_action = QtWidgets.QAction(self.init_data.get_window('trace_action_name'), self)
+        self.profile_action = QtWidgets.QAction(self.init_data.get_window('profile_action_name'), self)
+        self.stream_action = QtWidgets.QAction(self.init_data.get_run('stream_action_name'), self)
+        self.odometry_action = QtWidgets.QAction(self.init_data.get_run('odometry_action_name'), self)
 
         self.top_view_action = QtWidgets.QAction(self.init_data.get_window('top_view_action_name'), self)
         self.start_view_action = QtWidgets.QAction(self.init_data.get_window('start_view_action_name'), self)
@@ -272,6 +288,22 @@ class MainWindow(QtWidgets.QMainWindow):
         self.key_action.setStatusTip(self.init_data.get_window('key_action_status_tip'))
         set_icon(self.key_action, 'key_action_icon')
 
+        self.perf_action.setCheckable(True)
+        self.perf_action.setShortcut(self.init_data.get_window('perf_action_shortcut'))
+        self.perf_action.setStatusTip(self.init_data.get_window('perf_action_status_tip'))
+
+        self.trace_action.setCheckable(True)
+        self.trace_action.setStatusTip(self.init_data.get_window('trace_action_status_tip'))
+
+        self.profile_action.setCheckable(True)
+        self.profile_action.setStatusTip(self.init_data.get_window('profile_action_status_tip'))
+
+        self.stream_action.setCheckable(True)
+        self.stream_action.setStatusTip(self.init_data.get_run('stream_action_tip'))
+
+        self.odometry_action.setCheckable(True)
+        self.odometry_action.setStatusTip(self.init_data.get_run('odometry_action_tip'))
+
     def create_menubar(self):
         """
         Cree la barre de menus.
@@ -297,6 +329,12 @@ class MainWindow(QtWidgets.QMainWindow):
         run_menu = self.menuBar.addMenu(self.init_data.get_window('menu_bar_menu3'))
         run_menu.addAction(self.run_action)
         run_menu.addAction(self.stop_run_action)
+        run_menu.addAction(self.stream_action)
+        run_menu.addAction(self.odometry_action)
+        run_menu.addSeparator()
+        run_menu.addAction(self.perf_action)
+        run_menu.addAction(self.trace_action)
+        run_menu.addAction(self.profile_action)
         self.setMenuBar(self.menuBar)
 
     def init_3d(self):
@@ -337,6 +375,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.run_action.triggered.connect(self.run)
         self.stop_run_action.triggered.connect(self.stop_run)
         self.key_action.triggered.connect(self.keys)
+        self.perf_action.toggled.connect(self.viewer.perf_overlay.set_overlay)
+        self.trace_action.toggled.connect(self.trace)
+        self.profile_action.toggled.connect(self.profile)
+        self.stream_action.toggled.connect(self.stream)
+        self.odometry_action.toggled.connect(self.odometry)
         self.speed_simulation_btn.clicked.connect(self.speed_simulation)
 
     def speed_simulation(self):
@@ -401,8 +444,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.main_robot = element.Robot(self.save_data, self, True)
         self.second_robot.remove(False)
         self.second_robot = element.Robot(self.save_data, self, False)
-        self.vinyl.setVisible(False)
+        self.vinyl.remove()
         self.vinyl = element.Vinyl(self, self.save_data)
+        self.loader.cancel()  # Les lectures en cours concernent les elements retires
         self.list_widget.setVisible(False)
         self.list_widget = widget.ListWidget()
         self.list_widget.add_content(self.grid)
@@ -435,29 +479,42 @@ class MainWindow(QtWidgets.QMainWindow):
                                                          self.init_data.get_board('file_dialog_open_extensions'))[0]
         if file:
             extension = file.split('.')[-1]
-            self.setCursor(self.init_data.get_window('cursor_while_opening'))
             del self.board
             self.board = element.Board(self.save_data, self)
             if '.' + extension in self.init_data.get_extension('3d_file'):
-                self.board.set_file(file)
+                board = self.board
+                board.set_file(file)
                 self.save_data.set_board('file', file)
-                self.board.set_name(self.init_data.get_board('name'))
-                if functions.object.show_mesh(self.board):
-                    self.viewer.addItem(self.board)
-                    self.board.setColor(self.init_data.get_board('color'))
-                    self.board.set_edge_color(self.init_data.get_board('edge_color'))
+                board.set_name(self.init_data.get_board('name'))
+
+                def loaded(ok: bool):
+                    """
+                    Affiche le plateau une fois le fichier lu en arriere-plan.
+                    """
+                    if board is not self.board:  # Plateau remplace pendant la lecture
+                        return
+                    if not ok:
+                        board.set_file("")
+                        self.save_data.set_board('file', "")
+                        return
 
-                    self.list_widget.add_content(self.board)
+                    self.viewer.addItem(board)
+                    board.setColor(self.init_data.get_board('color'))
+                    board.set_edge_color(self.init_data.get_board('edge_color'))
+
+                    self.list_widget.add_content(board)
 
                     if system() == 'Windows':
-                        self.board.rotate(180, 1, 0, 0, local=True)
-                        self.board.rotate(180, 0, 0, 1, local=True)
-                        self.board.translate(-self.init_data.get_grid('width') / 2,
-                                             self.init_data.get_grid('height') / 2, -1, local=True)
+                        board.rotate(180, 1, 0, 0, local=True)
+                        board.rotate(180, 0, 0, 1, local=True)
+                        board.translate(-self.init_data.get_grid('width') / 2,
+                                        self.init_data.get_grid('height') / 2, -1, local=True)
                     else:
-                        self.board.translate(self.init_data.get_board('appearance_translation_x'),
-                                             self.init_data.get_board('appearance_translation_y'),
-                                             self.init_data.get_board('appearance_translation_z'))
+                        board.translate(self.init_data.get_board('appearance_translation_x'),
+                                        self.init_data.get_board('appearance_translation_y'),
+                                        self.init_data.get_board('appearance_translation_z'))
+
+                functions.object.show_mesh_async(board, self.loader, loaded)
 
             elif extension == self.init_data.get_extension('board')[1:]:
                 if self.open_project(file):
@@ -465,7 +522,6 @@ class MainWindow(QtWidgets.QMainWindow):
                     self.x_coord_sys.setVisible(True)
                     self.y_coord_sys.setVisible(True)
                     self.z_coord_sys.setVisible(True)
-            self.setCursor(self.init_data.get_window('normal_cursor'))
 
     def new_vinyl(self, message=True, file=""):
         """
@@ -486,14 +542,25 @@ class MainWindow(QtWidgets.QMainWindow):
                                                          self.init_data.get_vinyl('vinyl_dialog_open_extensions'))[0]
 
         if file and '.' + file.split('.')[-1] in self.init_data.get_extension('vinyl'):
-            self.setCursor(self.init_data.get_window('cursor_while_opening'))
-            del self.vinyl
+            self.vinyl.remove()
             self.vinyl = element.Vinyl(self, self.save_data)
-            self.vinyl.set_file(file)
-            if functions.object.show_vinyl(self.vinyl):
-                self.viewer.addItem(self.vinyl)
-                self.list_widget.add_content(self.vinyl)
-            self.setCursor(self.init_data.get_window('normal_cursor'))
+            vinyl = self.vinyl
+            vinyl.set_file(file)
+
+            def loaded(ok: bool):
+                """
+                Affiche le tapis une fois l'image lue en arriere-plan.
+                """
+                if vinyl is not self.vinyl:  # Tapis remplace pendant la lecture
+                    return
+                if not ok:
+                    vinyl.set_file("")
+                    return
+
+                self.viewer.addItem(vinyl)
+                self.list_widget.add_content(vinyl)
+
+            functions.object.show_vinyl_async(vinyl, self.loader, loaded)
 
     def new_main_robot(self, message=True, file=""):
         """
@@ -515,22 +582,35 @@ class MainWindow(QtWidgets.QMainWindow):
                                                              'file_dialog_open_extensions'))[0]
         if file:
             extension = file.split('.')[-1]
-            self.setCursor(self.init_data.get_window('cursor_while_opening'))
             del self.main_robot
             self.main_robot = element.Robot(self.save_data, self, True)
             self.running.set_main_robot(self.main_robot)
             if '.' + extension[:3] in self.init_data.get_extension('3d_file'):
-                self.main_robot.set_file(file)
+                robot = self.main_robot
+                robot.set_file(file)
                 self.save_data.set_main_robot('file', file)
-                self.main_robot.set_name(self.init_data.get_main_robot('name'))
-                if functions.object.show_mesh(self.main_robot):
-                    self.viewer.addItem(self.main_robot)
-                    self.list_widget.add_content(self.main_robot)
-                    self.main_robot.set_offset(-self.main_robot.get_min_max()[2][0])
-                    self.main_robot.translate(0, 0, self.main_robot.get_offset())
-                    self.save_data.set_main_robot('offset', self.main_robot.get_offset())
-                    self.main_robot.setColor(self.init_data.get_main_robot('color'))
-                    self.main_robot.set_edge_color(self.init_data.get_main_robot('edge_color'))
+                robot.set_name(self.init_data.get_main_robot('name'))
+
+                def loaded(ok: bool):
+                    """
+                    Affiche le robot une fois le fichier lu en arriere-plan.
+                    """
+                    if robot is not self.main_robot:  # Robot remplace pendant la lecture
+                        return
+                    if not ok:
+                        robot.set_file("")
+                        self.save_data.set_main_robot('file', "")
+                        return
+
+                    self.viewer.addItem(robot)
+                    self.list_widget.add_content(robot)
+                    robot.set_offset(-robot.get_min_max()[2][0])
+                    robot.translate(0, 0, robot.get_offset())
+                    self.save_data.set_main_robot('offset', robot.get_offset())
+                    robot.setColor(self.init_data.get_main_robot('color'))
+                    robot.set_edge_color(self.init_data.get_main_robot('edge_color'))
+
+                functions.object.show_mesh_async(robot, self.loader, loaded)
 
             elif extension in self.init_data.get_extension('robot')[1:]:
                 if self.open_project(file):
@@ -538,7 +618,6 @@ class MainWindow(QtWidgets.QMainWindow):
                     self.x_coord_sys.setVisible(True)
                     self.y_coord_sys.setVisible(True)
                     self.z_coord_sys.setVisible(True)
-            self.setCursor(self.init_data.get_window('normal_cursor'))
 
     def new_second_robot(self, message=True, file=""):
         """
@@ -565,22 +644,35 @@ class MainWindow(QtWidgets.QMainWindow):
                                                              'file_dialog_open_extensions'))[0]
         if file:
             extension = file.split('.')[-1]
-            self.setCursor(self.init_data.get_window('cursor_while_opening'))
             del self.second_robot
             self.second_robot = element.Robot(self.save_data, self, False)
             self.running.set_second_robot(self.second_robot)
             if '.' + extension[:3] in self.init_data.get_extension('3d_file'):
+                robot = self.second_robot
                 self.save_data.set_second_robot('file', file)
-                self.second_robot.set_file(file)
-                self.second_robot.set_name(self.init_data.get_second_robot('name'))
-                if functions.object.show_mesh(self.second_robot):
-                    self.viewer.addItem(self.second_robot)
-                    self.list_widget.add_content(self.second_robot)
-                    self.second_robot.set_offset(-self.second_robot.get_min_max()[2][0])
-                    self.second_robot.translate(0, 0, self.second_robot.get_offset())
-                    self.save_data.set_second_robot('offset', self.second_robot.get_offset())
-                    self.second_robot.setColor(self.init_data.get_second_robot('color'))
-                    self.second_robot.set_edge_color(self.init_data.get_second_robot('edge_color'))
+                robot.set_file(file)
+                robot.set_name(self.init_data.get_second_robot('name'))
+
+                def loaded(ok: bool):
+                    """
+                    Affiche le robot une fois le fichier lu en arriere-plan.
+                    """
+                    if robot is not self.second_robot:  # Robot remplace pendant la lecture
+                        return
+                    if not ok:
+                        robot.set_file("")
+                        self.save_data.set_second_robot('file', "")
+                        return
+
+                    self.viewer.addItem(robot)
+                    self.list_widget.add_content(robot)
+                    robot.set_offset(-robot.get_min_max()[2][0])
+                    robot.translate(0, 0, robot.get_offset())
+                    self.save_data.set_second_robot('offset', robot.get_offset())
+                    robot.setColor(self.init_data.get_second_robot('color'))
+                    robot.set_edge_color(self.init_data.get_second_robot('edge_color'))
+
+                functions.object.show_mesh_async(robot, self.loader, loaded)
 
             elif extension in self.init_data.get_extension('robot')[1:]:
                 if self.open_project(file):
@@ -588,7 +680,6 @@ class MainWindow(QtWidgets.QMainWindow):
                     self.x_coord_sys.setVisible(True)
                     self.y_coord_sys.setVisible(True)
                     self.z_coord_sys.setVisible(True)
-            self.setCursor(self.init_data.get_window('normal_cursor'))
 
     def open_project(self, file="") -> bool:
         """
@@ -611,8 +702,9 @@ class MainWindow(QtWidgets.QMainWindow):
             self.main_robot = element.Robot(self.save_data, self, True)
             self.second_robot.remove(False)
             self.second_robot = element.Robot(self.save_data, self, False)
-            self.vinyl.setVisible(False)
+            self.vinyl.remove()
             self.vinyl = element.Vinyl(self, self.save_data)
+            self.loader.cancel()  # Les lectures en cours concernent les elements retires
 
             self.list_widget = widget.ListWidget()
             self.list_widget.add_content(self.grid)
@@ -622,79 +714,33 @@ class MainWindow(QtWidgets.QMainWindow):
         if file:
             self.setCursor(self.init_data.get_window('cursor_while_opening'))
             try:
-                with open(file, 'r') as f:
-                    for param in f:
-                        if param.find(self.init_data.get_window('window_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('window')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_window(param.split(' = ')[0], eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_window(param.split(' = ')[0], eval(param.split(' = ')[1][:-1]))
-
-                        elif param.find(self.init_data.get_window('grid_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('grid')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_grid(param.split(' = ')[0], eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_grid(param.split(' = ')[0], eval(param.split(' = ')[1][:-1]))
-
-                        elif param.find(self.init_data.get_window('board_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('board')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_board(param.split(' = ')[0], eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_board(param.split(' = ')[0], eval(param.split(' = ')[1][:-1]))
-                            self.list_widget.add_content(self.board)
-                            self.board.translate(self.init_data.get_board('appearance_translation_x'),
-                                                 self.init_data.get_board('appearance_translation_y'),
-                                                 self.init_data.get_board('appearance_translation_z'))
-
-                        elif param.find(self.init_data.get_window('main_robot_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('main_robot')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_main_robot(param.split(' = ')[0],
-                                                                  eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_main_robot(param.split(' = ')[0],
-                                                                  eval(param.split(' = ')[1][:-1]))
-                            self.list_widget.add_content(self.main_robot)
-
-                        elif param.find(self.init_data.get_window('second_robot_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('second_robot')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_second_robot(param.split(' = ')[0],
-                                                                    eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_second_robot(param.split(' = ')[0],
-                                                                    eval(param.split(' = ')[1][:-1]))
-                            self.list_widget.add_content(self.second_robot)
-
-                        elif param.find(self.init_data.get_window('gcrubs_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('gcrubs')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_gcrubs(param.split(' = ')[0],
-                                                              eval(param.split(' = ')[1][1:-2].replace("PyQt5.", "")))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_gcrubs(param.split(' = ')[0],
-                                                              eval(param.split(' = ')[1][:-1].replace("PyQt5.", "")))
-
-                        elif param.find(self.init_data.get_window('vinyl_first_line')[1:-1]) != -1:
-                            for _ in range(self.save_data.get_len('vinyl')):
-                                param = f.readline()
-                                try:
-                                    self.save_data.set_vinyl(param.split(' = ')[0],
-                                                             eval(param.split(' = ')[1][1:-2]))
-                                except (IndexError, SyntaxError, NameError):
-                                    self.save_data.set_vinyl(param.split(' = ')[0],
-                                                             eval(param.split(' = ')[1][:-1]))
-                            self.list_widget.add_content(self.vinyl)
-            except (FileNotFoundError, SyntaxError):
+                if file.endswith(self.init_data.get_extension('bundle')):
+                    project = functions.bundle.read(file)
+                else:
+                    project = data.project.read(file)
+
+                for section, values in project.items():
+                    self.save_data.from_dict(section, values)
+
+                    if section == 'board':
+                        self.list_widget.add_content(self.board)
+                        self.board.translate(self.init_data.get_board('appearance_translation_x'),
+                                             self.init_data.get_board('appearance_translation_y'),
+                                             self.init_data.get_board('appearance_translation_z'))
+                    elif section == 'main_robot':
+                        self.list_widget.add_content(self.main_robot)
+                    elif section == 'second_robot':
+                        self.list_widget.add_content(self.second_robot)
+                    elif section == 'vinyl':
+                        self.list_widget.add_content(self.vinyl)
+
+                if 'gcrubs' in project:  # Commandes et touches du projet
+                    self.viewer.update_keys()
+
+                if 'window' in project:  # Le projet a pu etre deplace ou etre une archive extraite
+                    self.save_data.set_window('project_file', file)
+                    self.save_data.set_window('directory', file.rpartition('/')[0])
+            except (OSError, ValueError, SyntaxError):
                 QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                       self.init_data.get_window('error_open_file_title'),
                                       self.init_data.get_window('error_open_file_message').format(
@@ -707,19 +753,21 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.main_robot = element.Robot(self.save_data, self, True)
                 self.second_robot.remove(False)
                 self.second_robot = element.Robot(self.save_data, self, False)
-                self.vinyl.setVisible(False)
+                self.vinyl.remove()
                 self.vinyl = element.Vinyl(self, self.save_data)
+                self.loader.cancel()  # Les lectures en cours concernent les elements retires
 
                 self.list_widget = widget.ListWidget()
                 self.list_widget.add_content(self.grid)
                 self.component_dock.setWidget(self.list_widget)
                 self.create_connections()
 
+                self.setCursor(self.init_data.get_window('normal_cursor'))
                 self.time = time()
                 return False
 
-            self.update_()
             self.setCursor(self.init_data.get_window('normal_cursor'))
+            self.update_()  # Le curseur est ensuite gere par self.loader
         self.time = time()
         return True
 
@@ -749,10 +797,11 @@ class MainWindow(QtWidgets.QMainWindow):
                                                   self.save_data.get_window(
                                                       'directory') + '/' + self.init_data.get_window(
                                                       'project_default_name') + self.init_data.get_extension('project'),
-                                                  self.save_data.get_window('project_extension'))[0]
+                                                  self.init_data.get_window('project_extension'))[0]
 
         if file:
-            if file.split('.')[-1] != self.init_data.get_extension('project')[1:]:
+            if '.' + file.split('.')[-1] not in (self.init_data.get_extension('project'),
+                                                 self.init_data.get_extension('bundle')):
                 file = file.split('.')[0] + self.init_data.get_extension('project')
 
             self.save_data.set_window('project_file', file)
@@ -766,17 +815,14 @@ class MainWindow(QtWidgets.QMainWindow):
         :return: None
         """
         try:
-            with open(file_name, 'w') as file:
-                file.write(self.init_data.get_window('saving_file_first_line').format(
-                    date=QtCore.QDate.currentDate().toString(self.init_data.get_main_robot('date_format'))))
-                file.write(self.save_data.save('window'))
-                file.write(self.save_data.save('grid'))
-                file.write(self.save_data.save('board'))
-                file.write(self.save_data.save('main_robot'))
-                file.write(self.save_data.save('second_robot'))
-                file.write(self.save_data.save('gcrubs'))
-                file.write(self.save_data.save('vinyl'))
-        except FileNotFoundError:
+            if file_name.endswith(self.init_data.get_extension('bundle')):  # Archive avec tous les fichiers
+                self.setCursor(self.init_data.get_window('cursor_while_opening'))
+                functions.bundle.write(file_name, self.save_data)
+                self.setCursor(self.init_data.get_window('normal_cursor'))
+            else:
+                data.project.write(file_name, self.save_data)
+        except OSError:
+            self.setCursor(self.init_data.get_window('normal_cursor'))
             QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                   self.init_data.get_window('error_open_file_title'),
                                   self.init_data.get_window('error_open_file_message').format(
@@ -905,14 +951,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
                     self.save_data.set_window('directory', file.rpartition('/')[0])
                     try:
-                        with open(file, 'w') as file_name:
-                            file_name.write(self.save_data.save('board'))
+                        data.project.write(file, self.save_data, ('board',))
                         self.time = time()
                     except FileNotFoundError:
                         QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                               self.init_data.get_window('error_open_file_title'),
                                               self.init_data.get_window('error_open_file_message').format(
-                                                  filename=file_name)).exec()
+                                                  filename=file)).exec()
                         self.time = time()
                         return
 
@@ -932,14 +977,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
                     self.save_data.set_window('directory', file.rpartition('/')[0])
                     try:
-                        with open(file, 'w') as file_name:
-                            file_name.write(self.save_data.save('main_robot'))
+                        data.project.write(file, self.save_data, ('main_robot',))
                         self.time = time()
                     except FileNotFoundError:
                         QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                               self.init_data.get_window('error_open_file_title'),
                                               self.init_data.get_window('error_open_file_message').format(
-                                                  filename=file_name)).exec()
+                                                  filename=file)).exec()
                         self.time = time()
                         return
 
@@ -959,14 +1003,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
                     self.save_data.set_window('directory', file.rpartition('/')[0])
                     try:
-                        with open(file, 'w') as file_name:
-                            file_name.write(self.save_data.save('second_robot'))
+                        data.project.write(file, self.save_data, ('second_robot',))
                         self.time = time()
                     except FileNotFoundError:
                         QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                               self.init_data.get_window('error_open_file_title'),
                                               self.init_data.get_window('error_open_file_message').format(
-                                                  filename=file_name)).exec()
+                                                  filename=file)).exec()
                         self.time = time()
                         return
 
@@ -982,78 +1025,47 @@ class MainWindow(QtWidgets.QMainWindow):
         Slot pour defaire.
         :return: None
         """
-        if len(self.doing) > 0:
-            for _ in range(len(self.undoing) - self.init_data.get_window('max_len_doing')):
-                self.undoing.pop(0)
-            self.undoing.append(self.doing.pop(-1))
-            if len(self.undoing[-1]) == 2:
-                text = ""
-                for line in self.undoing[-1][0].get_window().get_sequence_text().split('\n')[:-1]:
-                    text += line
-                    text += '\n'
-                self.undoing[-1][0].get_window().set_sequence_text(text[:-1])  # On enleve le dernier '\n'
-            else:
-                self.undoing[-1][0].move_robot(self.undoing[-1][1], self.undoing[-1][2], self.undoing[-1][3])
-                text = ""
-                for line in self.undoing[-1][0].get_window().get_sequence_text().split('\n')[:-1]:
-                    text += line
-                    text += '\n'
-                self.undoing[-1][0].get_window().set_sequence_text(text[:-1])
-                self.status_bar.showMessage(
-                    self.init_data.get_window('position_status_message').format(
-                        x=round(self.undoing[-1][0].get_coord()[0]),
-                        y=round(self.undoing[-1][0].get_coord()[1]),
-                        angle=round(self.undoing[-1][0].get_angle())))
-
-                if self.undoing[-1][3] == 0:  # Si pas de rotation
-                    self.undoing[-1][0].get_window().remove_last_track()
-
-                if self.undoing[-1][5] is not None:
-                    self.undoing[-1][0].get_window().set_ccrubs('\n'.join(self.undoing[-1][5].split('\n')[:-1]))
+        action = self.history.undo()
+        if isinstance(action, functions.history.MoveAction):
+            self.show_position(action.get_robot())
 
     def redo(self):
         """
         Slot pour refaire.
         :return: None
         """
-        if len(self.undoing) > 0:
-            for _ in range(len(self.doing) - self.init_data.get_window('max_len_doing')):
-                self.doing.pop(0)
-            self.doing.append(self.undoing.pop(-1))
-            if len(self.doing[-1]) == 2:
-                self.doing[-1][0].get_window().add_sequence_text(self.doing[-1][1])
-            else:
-                self.doing[-1][0].move_robot(-self.doing[-1][1], -self.doing[-1][2], -self.doing[-1][3])
-                self.doing[-1][0].get_window().add_track(self.doing[-1][0])
-                self.doing[-1][0].get_window().update_last_track(self.doing[-1][1] + self.doing[-1][2],
-                                                                 self.doing[-1][1],
-                                                                 self.doing[-1][2])
-                self.doing[-1][0].get_window().set_sequence_text(self.doing[-1][4])
-                self.status_bar.showMessage(
-                    self.init_data.get_window('position_status_message').format(
-                        x=round(self.doing[-1][0].get_coord()[0]),
-                        y=round(self.doing[-1][0].get_coord()[1]),
-                        angle=round(self.doing[-1][0].get_angle())))
-
-                self.doing[-1][0].get_window().set_ccrubs(self.doing[-1][5])
-
-    def do(self, action):
+        action = self.history.redo()
+        if isinstance(action, functions.history.MoveAction):
+            self.show_position(action.get_robot())
+
+    def do(self, action: functions.history.Action):
         """
         Fonction pour faire.
-        :param action: any: Action a ajouter.
+        :param action: functions.history.Action: Action a ajouter.
+        :return: None
+        """
+        self.history.do(action)
+
+    def updo(self, dx: float, dy: float, rz: float, line: str, point=None):
+        """
+        Fonction pour modifier le deplacement fait precedemment sans ajouter d'action.
+        :param dx: float: Deplacement selon x a appliquer pour annuler
+        :param dy: float: Deplacement selon y a appliquer pour annuler
+        :param rz: float: Rotation a appliquer pour annuler
+        :param line: str: Ligne de la sequence correspondant au deplacement
+        :param point: tuple: Point de passage (x, y) ajoute, None pour une rotation
         :return: None
         """
-        for _ in range(len(self.doing) - self.init_data.get_window('max_len_doing')):
-            self.doing.pop(0)
-        self.doing.append(action)
+        self.history.last().update(dx, dy, rz, line, point)
 
-    def updo(self, action):
+    def show_position(self, robot: element.Robot):
         """
-        Fonction pour modifier ce qui a ete fait precedemment sans ajouter en plus.
-        :param action: any: Action a ajouter
+        Affiche la position du robot dans la barre d'etat.
+        :param robot: element.Robot: Robot
         :return: None
         """
-        self.doing[-1] = action
+        self.status_bar.showMessage(self.init_data.get_window('position_status_message').format(
+            x=round(robot.get_coord()[0]), y=round(robot.get_coord()[1]), angle=round(robot.get_angle())))
 
     def top_view(self):
         """
@@ -1086,6 +1098,8 @@ class MainWindow(QtWidgets.QMainWindow):
         Slot pour editer les commandes gcrubs.
         :return: None
         """
+        if self.gcrubs is None:
+            self.gcrubs = ui.GCrubs(self.save_data, self)
         self.gcrubs.edit()
 
     def speed(self):
@@ -1221,6 +1235,220 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.viewer.set_first_click()
 
+    def stream(self, start: bool):
+        """
+        Slot pour commencer ou arreter l'envoi de la sequence du robot selectionne a sa carte.
+        :param start: bool: True pour commencer l'envoi
+        :return: None
+        """
+        if not start:
+            if self.robot_link is not None:
+                self.robot_link.stop()
+            return
+
+        if self.robot_link is None:
+            from src.functions import link  # Importe au premier envoi : asyncio n'est pas charge au lancement
+
+            self.robot_link = link.RobotLink(self.save_data, self)
+            self.robot_link.done.connect(self._stream_done)
+            self.robot_link.odometry.connect(self._stream_odometry)
+            self.robot_link.finished.connect(self._stream_finished)
+
+        robot = self.second_robot if self.second_robot.is_selected() else self.main_robot
+        address, ok = QtWidgets.QInputDialog.getText(self, self.init_data.get_run('stream_dialog_title'),
+                                                     self.init_data.get_run('stream_dialog_label'),
+                                                     text=self.init_data.get_run('stream_address'))
+        if not ok or not address or not robot.visible():
+            self.stream_action.setChecked(False)
+            return
+
+        if self.stream_item is not None:  # Chemin de l'envoi precedent
+            self.viewer.removeItem(self.stream_item)
+            self.stream_item = None
+        self.stream_length = 0
+
+        try:
+            self.robot_link.start(robot, address)
+        except ValueError as error:  # Adresse mal ecrite
+            self._stream_finished(error)
+
+    def _stream_done(self, number: int):
+        """
+        Affiche l'avancement de l'envoi.
+        :param number: int: Numero de la commande terminee par le robot
+        :return: None
+        """
+        self.status_bar.showMessage(self.init_data.get_run('stream_status_message').format(
+            number=number + 1, total=self.robot_link.get_total()))
+
+    def _stream_odometry(self, x: float, y: float, angle: float):
+        """
+        Ajoute la position mesuree par le robot au chemin affiche pendant l'envoi.
+        :param x: float: Position selon x (mm)
+        :param y: float: Position selon y (mm)
+        :param angle: float: Angle (degres)
+        :return: None
+        """
+        if self.stream_length == len(self.stream_points):  # Tableau plein, les points deja recus sont recopies une fois
+            points = np.empty((2 * len(self.stream_points), 3), dtype=self.stream_points.dtype)
+            points[:self.stream_length] = self.stream_points
+            self.stream_points = points
+        self.stream_points[self.stream_length] = x, y, self.init_data.get_run('odometry_height')
+        self.stream_length += 1
+
+        # Vue float32 contigue : GLLinePlotItem la garde sans la recopier
+        pos = self.stream_points[:self.stream_length]
+        if self.stream_item is None:
+            self.stream_item = gl.GLLinePlotItem(pos=pos,
+                                                 color=self.init_data.get_run('stream_odometry_color'),
+                                                 width=self.init_data.get_run('odometry_width'), antialias=True)
+            self.viewer.addItem(self.stream_item)
+        else:  # Un seul dessin par image (voir widget.ViewWidget.update)
+            self.stream_item.setData(pos=pos)
+        self.status_bar.showMessage(self.init_data.get_run('stream_odometry_message').format(
+            x=x, y=y, angle=angle))
+
+    def _stream_finished(self, error):
+        """
+        Fin de l'envoi.
+        :param error: Exception: Erreur qui a arrete l'envoi, None s'il s'est termine normalement
+        :return: None
+        """
+        self._uncheck(self.stream_action)
+        if error is not None:
+            QtWidgets.QMessageBox(self.init_data.get_run('stream_error_type'),
+                                  self.init_data.get_run('stream_error_title'),
+                                  self.init_data.get_run('stream_error_message').format(
+                                      error=str(error) or type(error).__name__)).exec()
+
+    def odometry(self, show: bool):
+        """
+        Slot pour comparer un journal d'odometrie avec la sequence du robot selectionne, ou retirer la comparaison.
+        :param show: bool: True pour choisir un journal et afficher la comparaison
+        :return: None
+        """
+        for item in self.odometry_items:
+            self.viewer.removeItem(item)
+        self.odometry_items = list()
+        if not show:
+            return
+
+        robot = self.second_robot if self.second_robot.is_selected() else self.main_robot
+        file = QtWidgets.QFileDialog.getOpenFileName(self, self.init_data.get_run('odometry_dialog_title'),
+                                                     self.save_data.get_window('directory'),
+                                                     self.init_data.get_run('odometry_extension'))[0]
+        if not file or not robot.visible():
+            self._uncheck(self.odometry_action)
+            return
+
+        def error(err):
+            self._uncheck(self.odometry_action)
+            QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
+                                  self.init_data.get_window('error_open_file_title'),
+                                  self.init_data.get_window('error_open_file_message').format(filename=file)).exec()
+
+        self.loader.start(functions.odometry.read, (file,), lambda log: self._show_odometry(robot, log), error,
+                          lambda: self._uncheck(self.odometry_action))
+
+    def _show_odometry(self, robot: element.Robot, log: np.array):
+        """
+        Affiche le chemin prevu et le chemin reel, colore selon l'erreur de position.
+        :param robot: element.Robot: Robot dont la sequence est comparee
+        :param log: np.array: Journal renvoye par functions.odometry.read
+        :return: None
+        """
+        if not self.odometry_action.isChecked():  # Retiree pendant la lecture
+            return
+
+        header, records = data.program.compile_lines(robot.get_window().get_sequence_lines(), self.save_data,
+                                                     robot.get_speed(), robot.get_speed_rotation())
+        result = functions.odometry.compare(log, header, records)
+        height = self.init_data.get_run('odometry_height')
+
+        planned = np.zeros((len(records) + 1, 3))
+        planned[0, :2] = header['x'][0], header['y'][0]
+        planned[1:, 0], planned[1:, 1] = records['x'], records['y']
+        planned[:, 2] = height
+        actual = np.column_stack((log[:, 1], log[:, 2], np.full(len(log), height)))
+        colors = functions.odometry.color_ramp(result['position_error'], self.init_data.get_run('odometry_max_error'),
+                                               self.init_data.get_run('odometry_colors'))
+
+        self.odometry_items = [gl.GLLinePlotItem(pos=planned, color=self.init_data.get_run('odometry_planned_color'),
+                                                 width=self.init_data.get_run('odometry_width'), antialias=True),
+                               gl.GLLinePlotItem(pos=actual, color=colors,
+                                                 width=self.init_data.get_run('odometry_width'), antialias=True)]
+        for item in self.odometry_items:
+            self.viewer.addItem(item)
+
+        errors = result['command_position_error']
+        worst = int(np.nanargmax(errors)) + 1 if not np.all(np.isnan(errors)) else 0
+        self.status_bar.showMessage(self.init_data.get_run('odometry_status_message').format(
+            mean=float(np.mean(result['position_error'])), max=float(np.max(result['position_error'])),
+            heading=float(np.mean(np.abs(result['heading_error']))), worst=worst))
+
+    @staticmethod
+    def _uncheck(action: QtWidgets.QAction):
+        """
+        Decoche une action sans appeler son slot.
+        :param action: QtWidgets.QAction: Action
+        :return: None
+        """
+        action.blockSignals(True)
+        action.setChecked(False)
+        action.blockSignals(False)
+
+    def trace(self, recording: bool):
+        """
+        Slot pour commencer ou arreter l'enregistrement d'une trace des performances, puis l'enregistrer.
+        :param recording: bool: True pour commencer l'enregistrement
+        :return: None
+        """
+        if recording:
+            functions.perf.start_trace()
+            return
+
+        events = functions.perf.stop_trace()
+        file = QtWidgets.QFileDialog.getSaveFileName(self, self.init_data.get_window('trace_dialog_title'),
+                                                     self.save_data.get_window('directory') + '/' +
+                                                     self.init_data.get_window('trace_default_name'),
+                                                     self.init_data.get_window('trace_extension'))[0]
+        if not file:
+            return
+
+        try:
+            functions.perf.write_trace(file, events)
+        except OSError:
+            QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
+                                  self.init_data.get_window('error_open_file_title'),
+                                  self.init_data.get_window('error_open_file_message').format(filename=file)).exec()
+
+    def profile(self, profiling: bool):
+        """
+        Slot pour lancer ou arreter cProfile, puis enregistrer ses statistiques (lisibles avec pstats ou snakeviz).
+        :param profiling: bool: True pour lancer cProfile
+        :return: None
+        """
+        if profiling:
+            functions.perf.start_profiler()
+            return
+
+        profiler = functions.perf.stop_profiler()
+        if profiler is None:
+            return
+        file = QtWidgets.QFileDialog.getSaveFileName(self, self.init_data.get_window('profile_dialog_title'),
+                                                     self.save_data.get_window('directory') + '/' +
+                                                     self.init_data.get_window('profile_default_name'),
+                                                     self.init_data.get_window('profile_extension'))[0]
+        if not file:
+            return
+
+        try:
+            profiler.dump_stats(file)
+        except OSError:
+            QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
+                                  self.init_data.get_window('error_open_file_title'),
+                                  self.init_data.get_window('error_open_file_message').format(filename=file)).exec()
+
     def keys(self):
         """
         Slot pour gerer les touches qui permettent de deplacer le robot.
@@ -1264,6 +1492,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 key_[k] = val[2].get_key()
 
             self.save_data.set_gcrubs('keys', key_)
+            self.viewer.update_keys()
             close_()
 
         keys = list()
@@ -1300,25 +1529,110 @@ class MainWindow(QtWidgets.QMainWindow):
     def update_(self):
         """
         Fonction pour tout mettre a jour.
+        Les fichiers sont lus en parallele en arriere-plan, chaque element est mis a jour des qu'il est pret.
         :return: None
         """
         self.grid.update_()
-        self.board.update_()
-        self.vinyl.update_()
-        self.main_robot.update_()
-        self.second_robot.update_()
         self.z_coord_sys.update_()
         self.y_coord_sys.update_()
         self.x_coord_sys.update_()
 
-        if self.board.get_file() != "":
-            self.viewer.addItem(self.board)
-        if self.vinyl.get_file() != "":
-            self.viewer.addItem(self.vinyl)
-        if self.main_robot.get_file() != "":
-            self.viewer.addItem(self.main_robot)
-        if self.second_robot.get_file() != "":
-            self.viewer.addItem(self.second_robot)
+        elements = (self.board, self.vinyl, self.main_robot, self.second_robot)
+        files = (self.save_data.get_board('file'), self.save_data.get_vinyl('file'),
+                 self.save_data.get_main_robot('file'), self.save_data.get_second_robot('file'))
+        gcrubs_files = {self.main_robot: self.save_data.get_main_robot('gcrubs_file'),
+                        self.second_robot: self.save_data.get_second_robot('gcrubs_file')}
+        results = {robot: dict() for robot in gcrubs_files}  # Un robot attend son maillage et sa sequence
+
+        def attach(elem, ok: bool, gcrubs=None):
+            """
+            Met a jour un element des que ses fichiers sont lus et l'ajoute a la vue.
+            """
+            if elem not in (self.board, self.vinyl, self.main_robot, self.second_robot):  # Remplace entre-temps
+                return
+            if elem in gcrubs_files:
+                elem.update_(ok, gcrubs)
+            else:
+                elem.update_(ok)
+            if elem.get_file() != "":
+                self.viewer.addItem(elem)
+
+        def robot_ready(robot, key: str, value):
+            """
+            Enregistre un resultat de lecture d'un robot. Le met a jour une fois le maillage et la sequence lus.
+            """
+            if robot is not self.main_robot and robot is not self.second_robot:  # Remplace entre-temps
+                return
+            results[robot][key] = value
+            if len(results[robot]) == 2:
+                attach(robot, results[robot]['mesh'], results[robot]['gcrubs'])
+
+        # Toutes les lectures sont lancees en meme temps : le temps d'ouverture est celui du fichier le plus long
+        for elem, file in zip(elements, files):
+            if elem in gcrubs_files:
+                callback = (lambda ok, e=elem: robot_ready(e, 'mesh', ok))
+            else:
+                callback = (lambda ok, e=elem: attach(e, ok))
+
+            if elem.get_file() != '':  # Deja charge
+                callback(True)
+            else:
+                elem.set_file(file)
+                if elem is self.vinyl:
+                    functions.object.show_vinyl_async(elem, self.loader, callback)
+                else:
+                    functions.object.show_mesh_async(elem, self.loader, callback)
+
+        for robot, file in gcrubs_files.items():
+            if file == '':
+                robot_ready(robot, 'gcrubs', None)
+                continue
+
+            restored = self.restored_sequences.pop('main_robot' if robot.is_main_robot() else 'second_robot', None)
+            if isinstance(restored, str):  # Sequence non enregistree au moment de la sauvegarde automatique
+                robot_ready(robot, 'gcrubs', restored.split('\n'))
+            else:  # En cas d'erreur, None : le fichier est relu par import_gcrubs qui affiche le message d'erreur
+                self.loader.start(ui.Robot.read_gcrubs, (file,),
+                                  lambda lines, r=robot: robot_ready(r, 'gcrubs', lines),
+                                  lambda _, r=robot: robot_ready(r, 'gcrubs', None),
+                                  lambda r=robot: robot_ready(r, 'gcrubs', None))
+
+    def restore_autosave(self):
+        """
+        Propose de restaurer la sauvegarde automatique si l'application ne s'est pas fermee correctement,
+        puis lance les sauvegardes automatiques.
+        :return: None
+        """
+        file = self.autosave.get_file()
+        if os.path.isfile(file):
+            ans = QtWidgets.QMessageBox(self.init_data.get_window('autosave_restore_type'),
+                                        self.init_data.get_window('autosave_restore_title'),
+                                        self.init_data.get_window('autosave_restore_message'),
+                                        self.init_data.get_window('autosave_restore_buttons')).exec()
+
+            if ans == QtWidgets.QMessageBox.Yes:
+                sequences = self.autosave.sequences()
+                try:
+                    window = data.project.read(file).get('window', dict())
+                except (OSError, ValueError, SyntaxError):
+                    window = dict()
+
+                # Les sequences sans fichier sont remises directement, les autres le sont a la lecture du fichier
+                self.restored_sequences = sequences
+                if self.open_project(file):
+                    for robot, name in ((self.main_robot, 'main_robot'), (self.second_robot, 'second_robot')):
+                        sequence = self.restored_sequences.pop(name, None)
+                        if isinstance(sequence, str) and sequence:
+                            robot.get_window().set_sequence_text(sequence)
+                            robot.set_sequence(sequence)
+
+                    # Le projet garde son propre fichier, pas celui de la sauvegarde automatique
+                    self.save_data.set_window('project_file', window.get('project_file', ""))
+                    self.save_data.set_window('directory',
+                                              window.get('directory', self.save_data.get_window('directory')))
+                self.restored_sequences = dict()
+
+        self.autosave.start()
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
         """
@@ -1327,6 +1641,9 @@ class MainWindow(QtWidgets.QMainWindow):
         :return: None
         """
         self.save_data.set_settings('directory', self.save_data.get_window('directory'))
+        self.autosave.remove()  # Fermeture normale : rien a restaurer au prochain lancement
+        if self.robot_link is not None:
+            self.robot_link.stop()
         event.accept()
 
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:
@@ -1365,7 +1682,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if extension in self.init_data.get_extension('3d_file'):  # Si c'est un fichier 3D
             self.import_component(self.dropped_filename)
 
-        elif extension == self.init_data.get_extension('project'):  # Si c'est un fichier de projet
+        elif extension in (self.init_data.get_extension('project'),
+                           self.init_data.get_extension('bundle')):  # Si c'est un fichier de projet
             # On supprime tout
             self.grid.reset()
             self.board.remove(False)
@@ -1395,26 +1713,20 @@ class MainWindow(QtWidgets.QMainWindow):
 
         elif extension == self.init_data.get_extension('robot'):  # Si c'est un fichier de robot
             try:
-                with open(self.dropped_filename, 'r') as file:
-                    file.readline()
-                    param = file.readline()
-                    while param[:3] != '## ':
-                        param = file.readline()
-            except FileNotFoundError:
+                project = data.project.read(self.dropped_filename)
+            except (OSError, ValueError, SyntaxError):
                 QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                       self.init_data.get_window('error_open_file_title'),
                                       self.init_data.get_window('error_open_file_message').format(
                                           filename=self.dropped_filename)).exec()
                 return
 
-            if self.save_data.get_main_robot('file') == "" and \
-                    param.find(self.init_data.get_window('main_robot_first_line')[1:-1]) != -1:
+            if self.save_data.get_main_robot('file') == "" and 'main_robot' in project:
                 del self.main_robot
                 self.main_robot = element.Robot(self.save_data, self, True)
                 self.new_main_robot(False, self.dropped_filename)
 
-            elif self.save_data.get_second_robot('file') == "" and \
-                    param.find(self.init_data.get_window('second_robot_first_line')[1:-1]) != -1:
+            elif self.save_data.get_second_robot('file') == "" and 'second_robot' in project:
                 del self.second_robot
                 self.second_robot = element.Robot(self.save_data, self, False)
                 self.new_second_robot(False, self.dropped_filename)
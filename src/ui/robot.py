@@ -34,6 +34,8 @@ import pyqtgraph.opengl as gl
 import numpy as np
 from platform import system
 
+from src import data
+from src import functions
 from src import simulation
 from src import widget
 from src import element
@@ -58,7 +60,7 @@ class Robot:
         self.time = 0.
         self.track = list()
         self.convert = True
-        self.ccrubs = ""
+        self.waypoints = data.Waypoints()  # Points de passage du ccrubs
 
         self.window = QtWidgets.QDialog(self.parent)
         self.color_btn = QtWidgets.QPushButton(self.init_data.get_main_robot('color_name'), self.window)
@@ -96,6 +98,7 @@ class Robot:
 
         self.sequence_dialog = QtWidgets.QDialog(self.parent)
         self.sequence_text = QtWidgets.QTextEdit("", self.sequence_dialog)
+        self.sequence_model = data.Sequence(self.sequence_text.document())  # Lignes de la sequence
         self.sequence_layout = QtWidgets.QVBoxLayout()
         self.sequence_splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
         self.sequence_save_btn = QtWidgets.QPushButton(self.init_data.get_main_robot('sequence_save_btn_name'))
@@ -262,20 +265,37 @@ class Robot:
         """
         self.convert = self.convert_gcrubs_cb.isChecked()
 
-    def set_ccrubs(self, text: str):
+    def get_waypoints(self) -> data.Waypoints:
         """
-        Definit le contenu du ccrubs.
-        :param text: str: Texte
+        Renvoie les points de passage du ccrubs.
+        :return: data.Waypoints: waypoints
+        """
+        return self.waypoints
+
+    def add_waypoint(self, x: float, y: float):
+        """
+        Ajoute un point de passage, associe a la derniere ligne de la sequence.
+        :param x: float: Coordonnee x (mm)
+        :param y: float: Coordonnee y (mm)
         :return: None
         """
-        self.ccrubs = text
+        self.waypoints.append(x, y, len(self.sequence_model) - 1)
 
-    def get_ccrubs(self) -> str:
+    def replace_last_waypoint(self, x: float, y: float):
         """
-        Renvoie le contenu du ccrubs.
-        :return: str: contenu
+        Remplace le dernier point de passage.
+        :param x: float: Coordonnee x (mm)
+        :param y: float: Coordonnee y (mm)
+        :return: None
         """
-        return self.ccrubs
+        self.waypoints.replace_last(x, y)
+
+    def remove_last_waypoint(self):
+        """
+        Retire le dernier point de passage.
+        :return: None
+        """
+        self.waypoints.pop()
 
     def is_visible(self) -> bool:
         """
@@ -381,10 +401,11 @@ class Robot:
 
         self.window.close()
 
-    def import_gcrubs(self, file=''):
+    def import_gcrubs(self, file='', lines=None):
         """
         Fonction pour importer un fichier sequentiel.
         :param file: str: Chemin du fichier a ouvrir. Si file vaut '', une fenetre est ouverte pour choisir le fichier.
+        :param lines: list: Lignes du fichier deja lues par read_gcrubs. Si None, le fichier est lu ici.
         :return: None
         """
         if time() - self.time < 0.2:
@@ -397,29 +418,39 @@ class Robot:
                                                          self.init_data.get_main_robot('import_gcrubs_extension'))[0]
         if file:
             self.robot.set_gcrubs_file(file)
-            self.sequence_text.clear()
+            self.sequence_model.clear()
             self.track_visible(False)
             self.track.clear()
 
             try:
-                with open(file, 'r') as f:
-                    for line in f:
-                        self.sequence_text.append(line.replace('\n', '', 1))
+                if lines is None:
+                    lines = self.read_gcrubs(file)
+                self.sequence_model.set_lines(lines)
             except FileNotFoundError:
                 QtWidgets.QMessageBox(self.init_data.get_window('error_open_file_type'),
                                       self.init_data.get_window('error_open_file_title'),
                                       self.init_data.get_window('error_open_file_message').format(
                                           filename=file)).exec()
+            text = self.sequence_model.get_text()
             if self.robot.is_main_robot():
                 self.save_data.set_main_robot('gcrubs_file', file)
-                self.robot.set_sequence(self.sequence_text.document().toPlainText())
             else:
                 self.save_data.set_second_robot('gcrubs_file', file)
-                self.robot.set_sequence(self.sequence_text.document().toPlainText())
-            self.draw_track(self.sequence_text.document().toPlainText(), self.robot.is_main_robot())
+            self.robot.set_sequence(text)
+            self.draw_track(text, self.robot.is_main_robot())
 
         self.time = time()
 
+    @staticmethod
+    def read_gcrubs(file: str) -> list:
+        """
+        Lit un fichier sequentiel et renvoie ses lignes sans retour a la ligne.
+        Ne touche pas a l'interface graphique : peut etre executee dans un autre thread.
+        :param file: str: Chemin du fichier
+        :return: list: Lignes du fichier
+        """
+        return list(data.Sequence.read_file(file))
+
     def _remove(self):
         """
         Slot pour supprimer le robot.
@@ -697,7 +728,7 @@ class Robot:
             self.parent.sequence_dock.setWindowTitle(self.init_data.get_main_robot('sequence_dialog_title'))
         else:
             self.parent.sequence_dock.setWindowTitle(self.init_data.get_second_robot('sequence_dialog_title'))
-        self.sequence_text.setText(self.robot.get_sequence())
+        self.sequence_model.set_text(self.robot.get_sequence())
 
         self.parent.sequence_dock.setWidget(self.sequence_dialog)
         self.sequence_list_update()
@@ -760,9 +791,9 @@ class Robot:
         Slot pour annuler la sequence.
         :return: None
         """
-        self.robot.set_sequence(self.sequence_text.document().toPlainText()) \
+        self.robot.set_sequence(self.sequence_model.get_text()) \
             if self.robot.is_main_robot() \
-            else self.robot.set_sequence(self.sequence_text.document().toPlainText())
+            else self.robot.set_sequence(self.sequence_model.get_text())
 
         self.sequence_dialog.close()
         self.sequence_list.setVisible(False)
@@ -777,7 +808,7 @@ class Robot:
         self.track_visible(False)
         self.track.clear()
         self.robot.set_key(None)
-        self.sequence_text.clear()
+        self.sequence_model.clear()
         if self.robot.is_main_robot():
             self.save_data.set_main_robot('gcrubs_file', '')
         else:
@@ -842,21 +873,30 @@ class Robot:
                 filename = filename.split('.')[0] + self.init_data.get_extension('sequence')
 
             with open(filename, 'w') as file:
-                file.write(self.sequence_text.document().toPlainText())
+                file.write(self.sequence_model.get_text())
                 file.write('\n')
 
-            self.robot.set_sequence(self.sequence_text.document().toPlainText()) \
+            if self.init_data.get_main_robot('program_binary'):  # Programme pour la carte du robot
+                data.program.write(filename.split('.')[0] + self.init_data.get_extension('program'),
+                                   *data.program.compile_lines(self.sequence_model.get_lines(), self.save_data,
+                                                               self.robot.get_speed(),
+                                                               self.robot.get_speed_rotation()))
+
+            self.robot.set_sequence(self.sequence_model.get_text()) \
                 if self.robot.is_main_robot() \
-                else self.robot.set_sequence(self.sequence_text.document().toPlainText())
+                else self.robot.set_sequence(self.sequence_model.get_text())
 
             self.robot.set_gcrubs_file(filename)
 
-            if self.convert:
-                filename = filename.split('.')[0] + self.init_data.get_extension('coord_file')
-                with open(filename, 'w') as file:
-                    file.write(self.ccrubs)
+            if self.convert:  # Le texte n'est genere qu'ici
+                with open(filename.split('.')[0] + self.init_data.get_extension('coord_file'), 'w') as file:
+                    file.write(self.waypoints.to_text())
                     file.write('\n')
 
+                if self.init_data.get_main_robot('ccrubs_binary'):
+                    with open(filename.split('.')[0] + self.init_data.get_extension('coord_binary_file'), 'wb') as file:
+                        file.write(self.waypoints.to_bytes())
+
         self.time = time()
 
     def _set_sequence(self):
@@ -866,11 +906,11 @@ class Robot:
         """
         if time() - self.time < 0.2:
             return
-        self.sequence_text.append(self.save_data.get_gcrubs("cmd_name").get(
+        self.sequence_model.append(self.save_data.get_gcrubs("cmd_name").get(
             self.sequence_list.get_contents()[self.sequence_list.currentRow()]))
 
-        self.parent.do([self.robot, self.save_data.get_gcrubs("cmd_name").get(
-            self.sequence_list.get_contents()[self.sequence_list.currentRow()])])
+        self.parent.do(functions.history.CommandAction(self.robot, self.save_data.get_gcrubs("cmd_name").get(
+            self.sequence_list.get_contents()[self.sequence_list.currentRow()])))
         self.key = None
         self.time = time()
 
@@ -880,14 +920,36 @@ class Robot:
         :param text: Texte a ajouter
         :return: None
         """
-        self.sequence_text.append(text)
+        self.sequence_model.append(text)
+
+    def remove_last_sequence_line(self):
+        """
+        Retire la derniere ligne de la sequence, sans relire tout le texte.
+        :return: None
+        """
+        self.sequence_model.pop()
+
+    def replace_last_sequence_line(self, text: str):
+        """
+        Remplace la derniere ligne de la sequence, sans reecrire tout le texte.
+        :param text: str: Nouvelle ligne
+        :return: None
+        """
+        self.sequence_model.replace_last(text)
+
+    def get_sequence_lines(self) -> list:
+        """
+        Renvoie les lignes de la sequence actuelle, sans les copier.
+        :return: list: Lignes
+        """
+        return self.sequence_model.get_lines()
 
     def get_sequence_text(self) -> str:
         """
         Renvoie le text sequentiel actuel.
         :return: str: text
         """
-        return self.sequence_text.document().toPlainText()
+        return self.sequence_model.get_text()
 
     def set_sequence_text(self, text: str):
         """
@@ -895,7 +957,7 @@ class Robot:
         :param text: str: text
         :return: None
         """
-        self.sequence_text.setText(text)
+        self.sequence_model.set_text(text)
 
     def _set_origin(self):
         """
@@ -923,19 +985,19 @@ class Robot:
 
             if self.robot.is_main_robot():
                 if self.robot.get_sequence() == '':
-                    self.sequence_text.setText(self.init_data.get_main_robot('sequence_text').format(
+                    self.sequence_model.set_text(self.init_data.get_main_robot('sequence_text').format(
                         comment=self.save_data.get_gcrubs('cmd_name').get("Commentaire"),
                         date=QtCore.QDate.currentDate().toString(self.init_data.get_main_robot('date_format'))))
-                    self.sequence_text.append(self.init_data.get_main_robot('start_sequence_text').format(
+                    self.sequence_model.append(self.init_data.get_main_robot('start_sequence_text').format(
                         comment=self.save_data.get_gcrubs('cmd_name').get("Commentaire"),
                         x=round(self.robot.get_coord()[0]),
                         y=round(self.robot.get_coord()[1]),
                         angle=round(self.robot.get_angle())))
 
-                    self.ccrubs = str(round(self.robot.get_coord()[0])) + self.init_data.get_main_robot(
-                        'ccrubs_separator') + str(round(self.robot.get_coord()[1]))
+                    self.waypoints.clear()
+                    self.waypoints.append(*self.robot.get_coord()[:2], len(self.sequence_model) - 1)
                 else:
-                    self.sequence_text.setText(self.robot.get_sequence())
+                    self.sequence_model.set_text(self.robot.get_sequence())
                     for line in self.robot.get_sequence().split('\n'):
                         if self.init_data.get_main_robot('position_text') in line:
                             coord = simulation.Run.go_to_start(self.robot, line)
@@ -946,17 +1008,18 @@ class Robot:
 
             else:  # Second_robot
                 if self.robot.get_sequence() == '':
-                    self.sequence_text.setText(self.init_data.get_second_robot('sequence_text').format(
+                    self.sequence_model.set_text(self.init_data.get_second_robot('sequence_text').format(
                         comment=self.save_data.get_gcrubs('cmd_name').get("Commentaire"),
                         date=QtCore.QDate.currentDate().toString(self.init_data.get_main_robot('date_format'))))
-                    self.sequence_text.append(self.init_data.get_main_robot('start_sequence_text').format(
+                    self.sequence_model.append(self.init_data.get_main_robot('start_sequence_text').format(
                         comment=self.save_data.get_gcrubs('cmd_name').get("Commentaire"),
                         x=round(self.robot.get_coord()[0]),
                         y=round(self.robot.get_coord()[1]),
                         angle=round(self.robot.get_angle())))
-                    self.ccrubs = str(round(self.robot.get_coord()[0])) + ';;' + str(round(self.robot.get_coord()[1]))
+                    self.waypoints.clear()
+                    self.waypoints.append(*self.robot.get_coord()[:2], len(self.sequence_model) - 1)
                 else:
-                    self.sequence_text.setText(self.robot.get_sequence())
+                    self.sequence_model.set_text(self.robot.get_sequence())
                     for line in self.robot.get_sequence().split('\n'):
                         if self.init_data.get_main_robot('position_text') in line:
                             coord = simulation.Run.go_to_start(self.robot, line)
@@ -29,7 +29,6 @@ Fichier contenant la classe Run, partie graphique.
 """
 
 from PyQt5 import QtWidgets
-from src import data
 
 
 # Note : mr mean main robot and sr mean second robot
@@ -45,8 +44,8 @@ class Run:
         Constructeur de Run.
         :param parent: ui.MainWindow: Fenetre principale
         """
-        self.init_data = data.Init()
         self.parent = parent
+        self.init_data = self.parent.save_data.get_init_data()
 
         self.window = QtWidgets.QDialog(self.parent)
         self.cmd_mr_lbl = QtWidgets.QLabel(self.init_data.get_run('cmd_lbl_main').format(cmd=""))
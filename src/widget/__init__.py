@@ -29,6 +29,7 @@ from .label import Label
 from .keyDialog import KeyDialog
 from .listWidget import ListWidget
 from .lineEdit import LineEdit
+from .perfOverlay import PerfOverlay
 from .viewWidget import ViewWidget
 
 __all__ = [
@@ -37,5 +38,6 @@ __all__ = [
     "KeyDialog",
     "LineEdit",
     "ListWidget",
+    "PerfOverlay",
     "ViewWidget",
 ]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# © 2022 Tremaudant Axel
+# axel.tremaudant@gmail.com
+
+# This software is a computer program whose purpose is to easily and precisely generate sequential file for robots
+# used in the Coupe de France de robotique.
+
+# This software is governed by the CeCILL license under French law and abiding by the rules of distribution of free
+# software. You can use, modify and/ or redistribute the software under the terms of the CeCILL license as circulated
+# by CEA, CNRS and INRIA at the following URL "http://www.cecill.info".
+# As a counterpart to the access to the source code and rights to copy, modify and redistribute granted by the license,
+# users are provided only with a limited warranty and the software's author, the holder of the economic rights,
+# and the successive licensors have only limited liability.
+# In this respect, the user's attention is drawn to the risks associated with loading, using, modifying
+# and/or developing or reproducing the software by the user in light of its specific status of free software,
+# that may mean that it is complicated to manipulate, and that also
+# therefore means that it is reserved for developers and experienced professionals having in-depth computer knowledge.
+# Users are therefore encouraged to load and test the software's suitability as regards their requirements in conditions
+# enabling the security of their systems and/or data to be ensured and, more generally, to use and operate it
+# in the same conditions as regards security.
+# The fact that you are presently reading this means that you have had knowledge of the CeCILL license
+# and that you accept its terms.
+
+
+"""
+Fichier contenant la classe PerfOverlay.
+"""
+
+from PyQt5 import QtCore, QtWidgets
+import pyqtgraph.opengl as gl
+
+from src import functions
+
+
+class PerfOverlay(QtWidgets.QLabel):
+    """
+    Affichage des performances par-dessus la vue 3D : images par seconde, durees du dessin et de la simulation,
+    nombre d'elements 3D et de triangles.
+    """
+    def __init__(self, view, init_data):
+        """
+        Constructeur de PerfOverlay.
+        :param view: widget.ViewWidget: Vue 3D
+        :param init_data: data.Init: Donnees d'initialisation
+        """
+        super(PerfOverlay, self).__init__(view)
+        self.view = view
+        self.init_data = init_data
+        self.setStyleSheet(self.init_data.get_view('perf_style'))
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.move(*self.init_data.get_view('perf_position'))
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(self.init_data.get_view('perf_refresh'))
+        self.timer.timeout.connect(self.refresh)
+        self.setVisible(False)
+
+    def set_overlay(self, visible: bool):
+        """
+        Affiche ou non les performances.
+        :param visible: bool: True pour afficher
+        :return: None
+        """
+        functions.perf.set_overlay(visible)
+        self.setVisible(visible)
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        """
+        Met a jour le texte affiche.
+        :return: None
+        """
+        items, triangles = 0, 0
+        # Parcours des elements dessines, comme GLViewWidget.drawItemTree : les enfants (tuiles du tapis) sont aussi
+        # dans view.items, ils ne sont comptes que depuis leur parent, et pas si le parent est cache
+        stack = [item for item in self.view.items if item.parentItem() is None]
+        while stack:
+            item = stack.pop()
+            if not item.visible():
+                continue
+            stack.extend(item.childItems())
+            items += 1
+            if isinstance(item, gl.GLMeshItem) and item.opts.get('meshdata') is not None:
+                faces = item.opts['meshdata'].faces()
+                triangles += len(faces) if faces is not None else 0
+
+        self.setText(self.init_data.get_view('perf_text').format(fps=functions.perf.get_fps(),
+                                                                 paint=functions.perf.get_time('paint'),
+                                                                 tick=functions.perf.get_time('simulation'),
+                                                                 items=items, triangles=triangles))
+        self.adjustSize()
@@ -31,8 +31,11 @@ Fichier contenant la classe ViewWidget.
 from PyQt5 import QtCore, QtGui
 import pyqtgraph.opengl as gl
 import numpy as np
+from math import ceil, cos, sin, radians
 from platform import system
+from time import time
 
+from src import functions
 from src import widget
 
 
@@ -40,6 +43,7 @@ class ViewWidget(gl.GLViewWidget):
     """
     Classe qui gere les evenements dans la partie centrale.
     """
+    frame_timer = None  # Cree apres le constructeur de GLViewWidget, qui peut deja demander un rafraichissement
 
     def __init__(self, parent, save_data):
         """
@@ -58,12 +62,70 @@ class ViewWidget(gl.GLViewWidget):
         self.write_key = None
         self.dist = 0
         self.angle = 0
-        self.sequence_text = ""
-        self.ccrubs_text = ""
         self.view_changed = False
         self.view_position = np.zeros(shape=2)
         self.zoom = self.init_data.get_view('start_view_position_distance')
         self.first_click = False
+        self.key_table = dict()  # Code de la touche : (fonction de deplacement, nom de la commande)
+        self.update_keys()
+
+        self.held_key = None  # (code, robot, fonction de deplacement, nom de la commande) de la touche maintenue
+        self.held_time = 0.
+        self.held_steps = 0.
+        self.held_timer = QtCore.QTimer(self)
+        self.held_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.held_timer.setInterval(self.init_data.get_view('held_key_interval'))
+        self.held_timer.timeout.connect(self._held_move)
+
+        self.frame_time = 0.  # Debut du dernier dessin
+        self.frame_timer = QtCore.QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.frame_timer.timeout.connect(super(ViewWidget, self).update)
+
+        self.perf_overlay = widget.PerfOverlay(self, self.init_data)
+
+    def update(self):
+        """
+        Demande un rafraichissement de la vue. Les elements 3D appellent cette methode a chaque modification.
+        Les demandes sont regroupees : la vue est dessinee au plus une fois par image, et pas du tout si rien n'a change.
+        :return: None
+        """
+        if self.frame_timer is None:
+            super(ViewWidget, self).update()
+        elif not self.frame_timer.isActive():
+            delay = self.frame_time + self.init_data.get_view('frame_interval') / 1000 - time()
+            self.frame_timer.start(max(0, int(delay * 1000)))
+
+    def paintGL(self, *args, **kwargs):
+        """
+        Dessine la vue. Cette methode n'a pas a etre appelee.
+        :return: None
+        """
+        self.frame_time = time()
+        functions.perf.frame()
+        with functions.perf.measure('paint'):
+            super(ViewWidget, self).paintGL(*args, **kwargs)
+
+    def update_keys(self):
+        """
+        Reconstruit la table des touches a partir des touches de deplacement et des raccourcis des commandes.
+        A appeler quand les touches ou les commandes changent.
+        :return: None
+        """
+        commands = dict()
+        for name, code in self.save_data.get_gcrubs('cmd_key').items():
+            if code is not None:
+                commands.setdefault(code, name)  # En cas de doublon, la premiere commande est gardee
+
+        self.key_table = {code: (None, name) for code, name in commands.items()}
+
+        keys = self.save_data.get_gcrubs('keys')
+        handlers = (('go_right', self._go_right), ('go_left', self._go_left), ('go_down', self._go_down),
+                    ('go_up', self._go_up), ('turn_left', self._turn_left), ('turn_right', self._turn_right))
+        for direction, handler in reversed(handlers):  # En cas de doublon, le premier deplacement est garde
+            if keys.get(direction) is not None:
+                self.key_table[keys.get(direction)] = (handler, commands.get(keys.get(direction)))
 
     def wheelEvent(self, event):
         """
@@ -98,14 +160,36 @@ class ViewWidget(gl.GLViewWidget):
         else:
             return True
 
-        geom = (self.parent.center_widget.width(), self.parent.center_widget.height())
-        ratio = self.parent.screen().devicePixelRatio()
-        if ref in self.itemsAt((40, 40, (geom[0] - 40) * ratio, (geom[1] - 40) * ratio)):
+        if self.in_view(ref, self.init_data.get_view('pan_margin')):
             return True
         else:
             self.parent.start_view()
             return False
 
+    def in_view(self, item, margin=0) -> bool:
+        """
+        Indique si la boite englobante d'un element est dans la vue, en la projetant avec les matrices de la vue.
+        Bien plus rapide que itemsAt, qui fait un rendu OpenGL de selection a chaque appel.
+        :param item: any: Element qui a une methode get_min_max
+        :param margin: int: Marge (pixels) a retirer sur chaque bord de la vue
+        :return: bool: True si la boite englobante touche la vue privee de la marge, False sinon
+        """
+        min_max = item.get_min_max()
+        corners = np.ones(shape=(8, 4))
+        corners[:, :3] = [(x, y, z) for x in min_max[0] for y in min_max[1] for z in min_max[2]]
+
+        matrix = self.projectionMatrix() * self.viewMatrix() * item.transform()
+        clip = corners @ np.array(matrix.copyDataTo()).reshape((4, 4)).T
+        clip = clip[clip[:, 3] > 0]  # Les coins derriere la camera ne sont pas projetables
+        if len(clip) == 0:
+            return False
+
+        # Coordonnees normalisees [-1, 1] vers pixels, l'axe y de l'ecran etant vers le bas
+        x = (clip[:, 0] / clip[:, 3] + 1) / 2 * self.width()
+        y = (1 - clip[:, 1] / clip[:, 3]) / 2 * self.height()
+        return bool(x.max() > margin and x.min() < self.width() - margin and
+                    y.max() > margin and y.min() < self.height() - margin)
+
     def mouseMoveEvent(self, ev):
         """
         Lorsque la souris est deplacee, change la vue.
@@ -157,6 +241,8 @@ class ViewWidget(gl.GLViewWidget):
     def keyPressEvent(self, event: QtGui.QKeyEvent) -> None:
         """
         Fonction qui gere l'appui des touches.
+        Une touche de deplacement maintenue n'est pas repetee par le systeme : elle donne une vitesse au robot,
+        integree a chaque image par _held_move.
         :param event: QtGui.QKeyEvent: Evenement
         :return: None
         """
@@ -167,66 +253,140 @@ class ViewWidget(gl.GLViewWidget):
             self.key.setText(self.text + widget.KeyDialog.ret_key(event))
             self.write_key.set_key(event.key())
 
-        if self.parent.main_robot.is_selected():
-            elem = self.parent.main_robot
-            axis = self.save_data.get_main_robot('axis_rotation')
-            angle = self.save_data.get_main_robot('angle_rotation')
-        elif self.parent.second_robot.is_selected():
-            elem = self.parent.second_robot
-            axis = self.save_data.get_second_robot('axis_rotation')
-            angle = self.save_data.get_second_robot('angle_rotation')
-        else:
+        elem = self._selected_robot()
+        if elem is None:
             return
 
-        speed = self.save_data.get_grid('moving_speed')
-        mvt = elem.robot_movement(axis, angle)
-
-        for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                            self.save_data.get_gcrubs('cmd_key').values()):
-            # Si c'est une touche pour la sequence mais pas une touche de mouvement
-            if event.key() == cmd and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('go_right') and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('go_left') and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('go_down') and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('go_up') and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('turn_right') and \
-                    event.key() != self.save_data.get_gcrubs('keys').get('turn_left'):
-                elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-                elem.set_key(None)
+        handler, command = self.key_table.get(event.key(), (None, None))
+        if handler is not None:
+            if event.isAutoRepeat():  # Le deplacement est deja gere par la touche maintenue
                 return
+            self._move(elem, handler, command, event.key(), 1)
+            self.held_key = (event.key(), elem, handler, command)
+            self.held_time = time() + self.init_data.get_view('held_key_delay') / 1000
+            self.held_steps = 0.
+            self.held_timer.start()
+        elif command is not None:  # Touche d'une commande de la sequence qui n'est pas un mouvement
+            elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(command))
+            elem.set_key(None)
+
+    def keyReleaseEvent(self, event: QtGui.QKeyEvent) -> None:
+        """
+        Fonction qui gere le relachement des touches : arrete le robot si c'est la touche maintenue.
+        :param event: QtGui.QKeyEvent: Evenement
+        :return: None
+        """
+        if not event.isAutoRepeat() and self.held_key is not None and self.held_key[0] == event.key():
+            self.stop_held_key()
 
-        if event.key() == self.save_data.get_gcrubs('keys').get('go_right'):
-            self._go_right(event, elem, mvt, speed)
+    def focusOutEvent(self, event: QtGui.QFocusEvent) -> None:
+        """
+        Arrete le robot quand la vue perd le focus : le relachement de la touche ne serait pas recu.
+        :param event: QtGui.QFocusEvent: Evenement
+        :return: None
+        """
+        self.stop_held_key()
+        super(ViewWidget, self).focusOutEvent(event)
 
-        elif event.key() == self.save_data.get_gcrubs('keys').get('go_left'):
-            self._go_left(event, elem, mvt, speed)
+    def stop_held_key(self):
+        """
+        Arrete le deplacement de la touche maintenue.
+        :return: None
+        """
+        self.held_timer.stop()
+        self.held_key = None
 
-        elif event.key() == self.save_data.get_gcrubs('keys').get('go_down'):
-            self._go_down(event, elem, mvt, speed)
+    def _held_move(self):
+        """
+        Slot appele a chaque image tant qu'une touche de deplacement est maintenue.
+        Les pas accumules depuis la derniere image sont faits en un seul deplacement : un seul rafraichissement et une
+        seule mise a jour de la sequence par image, quelle que soit la vitesse de repetition du clavier.
+        :return: None
+        """
+        key, elem, handler, command = self.held_key
+        if self.parent.running.is_ongoing() or not elem.is_selected():
+            self.stop_held_key()
+            return
 
-        elif event.key() == self.save_data.get_gcrubs('keys').get('go_up'):
-            self._go_up(event, elem, mvt, speed)
+        now = time()
+        if now < self.held_time:  # Delai avant le deplacement continu, un appui court ne fait qu'un pas
+            return
+
+        self.held_steps += (now - self.held_time) * self.init_data.get_view('held_key_rate')
+        self.held_time = now
+        steps = int(self.held_steps)
+        if steps > 0:
+            self.held_steps -= steps
+            self._move(elem, handler, command, key, steps)
 
-        elif event.key() == self.save_data.get_gcrubs('keys').get('turn_left'):
-            self._turn_left(event, elem, mvt, speed)
+    def _selected_robot(self):
+        """
+        Renvoie le robot selectionne.
+        :return: element.Robot: Robot selectionne, None s'il n'y en a pas
+        """
+        if self.parent.main_robot.is_selected():
+            return self.parent.main_robot
+        elif self.parent.second_robot.is_selected():
+            return self.parent.second_robot
+        return None
+
+    def _move(self, elem, handler, command, key: int, steps: int):
+        """
+        Deplace le robot de plusieurs pas en une fois.
+        :param elem: element.Robot: Robot a deplacer
+        :param handler: any: Fonction de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
+        :param key: int: Code de la touche
+        :param steps: int: Nombre de pas
+        :return: None
+        """
+        if elem is self.parent.main_robot:
+            axis = self.save_data.get_main_robot('axis_rotation')
+            angle = self.save_data.get_main_robot('angle_rotation')
+        else:
+            axis = self.save_data.get_second_robot('axis_rotation')
+            angle = self.save_data.get_second_robot('angle_rotation')
 
-        elif event.key() == self.save_data.get_gcrubs('keys').get('turn_right'):
-            self._turn_right(event, elem, mvt, speed)
+        speed = self.save_data.get_grid('moving_speed') * steps
+        mvt = elem.robot_movement(axis, angle)
+        handler(key, elem, mvt, speed, command)
 
         self.parent.status_bar.showMessage(
             self.init_data.get_window('position_status_message').format(x=round(elem.get_coord()[0]),
                                                                         y=round(elem.get_coord()[1]),
                                                                         angle=round(elem.get_angle())))
 
-        elem.set_key(event.key()) if elem.is_ready_sequence() else elem.set_key(None)
+        elem.set_key(key) if elem.is_ready_sequence() else elem.set_key(None)
 
-    def _turn_right(self, event, elem, mvt: tuple, speed: int):
+    def _in_limits(self, elem, dx: int, dy: int, distance: int) -> int:
+        """
+        Renvoie la distance que le robot peut parcourir dans une direction sans sortir des limites du plateau.
+        Un deplacement de plusieurs pas (touche maintenue) s'arrete ainsi au bord au lieu d'etre refuse en entier.
+        :param elem: element.Robot: Robot qui doit avancer
+        :param dx: int: Direction selon x dans le repere du robot (-1, 0 ou 1)
+        :param dy: int: Direction selon y dans le repere du robot (-1, 0 ou 1)
+        :param distance: int: Distance demandee
+        :return: int: Distance possible, entre 0 et distance
+        """
+        # Direction dans le repere global, comme dans element.Robot.move
+        angle = radians(elem.get_angle())
+        direction = (dx * cos(angle) - dy * sin(angle), dx * sin(angle) + dy * cos(angle))
+        for coord, step, limit in zip(elem.get_coord(), direction, self.init_data.get_main_robot('out_limits')):
+            if abs(step) < 1e-9:  # Pas de deplacement selon cet axe
+                continue
+            bound = (limit if step > 0 else -limit) - coord
+            # Plus grande distance entiere qui reste strictement dans les limites
+            distance = min(distance, ceil(bound / step) - 1)
+        return max(distance, 0)
+
+    def _turn_right(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait tourner le robot sur la droite.
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit tourner
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
         if elem.is_origined():  # Si l'origine du robot a ete choisie, rotation autour du repere global
@@ -238,35 +398,34 @@ class ViewWidget(gl.GLViewWidget):
             elem.rotate(-speed, *mvt[2], local=True)
 
         elem.turn(-speed)
-        if elem.is_ready_sequence():  # Si on enregistre une sequence
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():
-                        self.angle = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.parent.do([elem, 0, 0, 0, "", None])
-
-                    self.angle += speed
-                    self.angle %= 360
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    try:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key).format(
-                            angle=self.angle))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-
-                    self.parent.updo([elem, 0, 0, self.angle, elem.get_window().get_sequence_text()])
-                    break
-
-    def _turn_left(self, event, elem, mvt: tuple, speed: int):
+        if elem.is_ready_sequence() and command is not None:  # Si on enregistre une sequence
+            new_command = elem.get_key() != key
+            if new_command:
+                self.angle = 0
+                self.parent.do(functions.history.MoveAction(elem))
+
+            self.angle += speed
+            self.angle %= 360
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(angle=self.angle)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+            else:  # Touche maintenue : seule la derniere ligne change
+                elem.get_window().replace_last_sequence_line(line)
+
+            self.parent.updo(0, 0, self.angle, line)
+
+    def _turn_left(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait tourner le robot sur la gauche.
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit tourner
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
         if elem.is_origined():  # Si l'origine du robot a ete choisie, rotation autour du repere global
@@ -278,225 +437,191 @@ class ViewWidget(gl.GLViewWidget):
             elem.rotate(speed, *mvt[2], local=True)
 
         elem.turn(speed)
-        if elem.is_ready_sequence():  # Si on enregistre une sequence
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():
-                        self.angle = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.parent.do([elem, 0, 0, 0, "", None])
-
-                    self.angle += speed
-                    self.angle %= 360
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    try:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key).format(
-                            angle=self.angle))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-                    self.parent.updo([elem, 0, 0, -self.angle, elem.get_window().get_sequence_text()])
-                    break
-
-    def _go_up(self, event, elem, mvt: tuple, speed: int):
+        if elem.is_ready_sequence() and command is not None:  # Si on enregistre une sequence
+            new_command = elem.get_key() != key
+            if new_command:
+                self.angle = 0
+                self.parent.do(functions.history.MoveAction(elem))
+
+            self.angle += speed
+            self.angle %= 360
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(angle=self.angle)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+            else:  # Touche maintenue : seule la derniere ligne change
+                elem.get_window().replace_last_sequence_line(line)
+            self.parent.updo(0, 0, -self.angle, line)
+
+    def _go_up(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait avancer le robot en haut.
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit avancer
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
+        speed = self._in_limits(elem, 0, 1, speed)  # Le robot s'arrete au bord du plateau
+        if speed == 0:
+            return
+
         elem.translate(*mvt[1] * speed, local=True)
         elem.move(0, speed)
 
-        # Si le robot est trop en dehors du plateau
-        if not -self.init_data.get_main_robot('out_limits')[0] < elem.get_coord()[0] < \
-                self.init_data.get_main_robot('out_limits')[0] or \
-                not -self.init_data.get_main_robot('out_limits')[1] < elem.get_coord()[1] < \
-                self.init_data.get_main_robot('out_limits')[1]:
-            elem.translate(*mvt[1] * -speed, local=True)
-            elem.move(0, -speed)
-            return
-
-        if elem.is_ready_sequence():  # Si on enregistre une sequence
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():  # Si la touche actuelle est differente de la precedente
-                        self.dist = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.ccrubs_text = elem.get_window().get_ccrubs()
-                        self.parent.do([elem, 0, 0, 0, "", elem.get_window().get_ccrubs()])
-                        elem.get_window().add_track(elem)
-
-                    self.dist += speed
-                    if len(elem.get_window().track) != 0:
-                        elem.get_window().update_last_track(speed, 0, self.dist)
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    elem.get_window().set_ccrubs(self.ccrubs_text + '\n' + str(round(elem.get_coord()[0]))
-                                                 + self.init_data.get_main_robot('ccrubs_separator')
-                                                 + str(round(elem.get_coord()[1])))
-                    try:
-                        elem.get_window().add_sequence_text(
-                            self.save_data.get_gcrubs('cmd_name').get(key).format(dist=self.dist))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-
-                    self.parent.updo([elem, 0, -self.dist, 0, elem.get_window().get_sequence_text(),
-                                      elem.get_window().get_ccrubs()])
-                    break
-
-    def _go_down(self, event, elem, mvt: tuple, speed: int):
+        if elem.is_ready_sequence() and command is not None:  # Si on enregistre une sequence
+            new_command = elem.get_key() != key
+            if new_command:  # Si la touche actuelle est differente de la precedente
+                self.dist = 0
+                self.parent.do(functions.history.MoveAction(elem))
+                elem.get_window().add_track(elem)
+
+            self.dist += speed
+            if len(elem.get_window().track) != 0:
+                elem.get_window().update_last_track(speed, 0, self.dist)
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(dist=self.dist)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            point = tuple(elem.get_coord()[:2])
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+                elem.get_window().add_waypoint(*point)
+            else:  # Touche maintenue : seule la derniere ligne et le dernier point changent
+                elem.get_window().replace_last_sequence_line(line)
+                elem.get_window().replace_last_waypoint(*point)
+
+            self.parent.updo(0, -self.dist, 0, line, point)
+
+    def _go_down(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait avancer le robot en bas
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit avancer
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
+        speed = self._in_limits(elem, 0, -1, speed)  # Le robot s'arrete au bord du plateau
+        if speed == 0:
+            return
+
         elem.translate(*mvt[1] * -speed, local=True)
         elem.move(0, -speed)
 
-        # Si le robot est trop en dehors du plateau
-        if not -self.init_data.get_main_robot('out_limits')[0] < elem.get_coord()[0] < \
-                self.init_data.get_main_robot('out_limits')[0] or \
-                not -self.init_data.get_main_robot('out_limits')[1] < elem.get_coord()[1] < \
-                self.init_data.get_main_robot('out_limits')[1]:
-            elem.translate(*mvt[1] * speed, local=True)
-            elem.move(0, speed)
-            return
-
-        if elem.is_ready_sequence():
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():
-                        self.dist = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.ccrubs_text = elem.get_window().get_ccrubs()
-                        self.parent.do([elem, 0, 0, 0, "", elem.get_window().get_ccrubs()])
-                        elem.get_window().add_track(elem)
-
-                    self.dist += speed
-                    if len(elem.get_window().track) != 0:
-                        elem.get_window().update_last_track(-speed, 0, self.dist)
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    elem.get_window().set_ccrubs(self.ccrubs_text + '\n' + str(round(elem.get_coord()[0]))
-                                                 + self.init_data.get_main_robot('ccrubs_separator')
-                                                 + str(round(elem.get_coord()[1])))
-                    try:
-                        elem.get_window().add_sequence_text(
-                            self.save_data.get_gcrubs('cmd_name').get(key).format(dist=self.dist))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-
-                    self.parent.updo([elem, 0, self.dist, 0, elem.get_window().get_sequence_text(),
-                                      elem.get_window().get_ccrubs()])
-                    break
-
-    def _go_left(self, event, elem, mvt: tuple, speed: int):
+        if elem.is_ready_sequence() and command is not None:
+            new_command = elem.get_key() != key
+            if new_command:
+                self.dist = 0
+                self.parent.do(functions.history.MoveAction(elem))
+                elem.get_window().add_track(elem)
+
+            self.dist += speed
+            if len(elem.get_window().track) != 0:
+                elem.get_window().update_last_track(-speed, 0, self.dist)
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(dist=self.dist)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            point = tuple(elem.get_coord()[:2])
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+                elem.get_window().add_waypoint(*point)
+            else:  # Touche maintenue : seule la derniere ligne et le dernier point changent
+                elem.get_window().replace_last_sequence_line(line)
+                elem.get_window().replace_last_waypoint(*point)
+
+            self.parent.updo(0, self.dist, 0, line, point)
+
+    def _go_left(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait avancer le robot vers la gauche
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit avancer
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
+        speed = self._in_limits(elem, -1, 0, speed)  # Le robot s'arrete au bord du plateau
+        if speed == 0:
+            return
+
         elem.translate(*mvt[0] * -speed, local=True)
         elem.move(-speed, 0)
 
-        # Si le robot est trop en dehors du plateau
-        if not -self.init_data.get_main_robot('out_limits')[0] < elem.get_coord()[0] < \
-                self.init_data.get_main_robot('out_limits')[0] or \
-                not -self.init_data.get_main_robot('out_limits')[1] < elem.get_coord()[1] < \
-                self.init_data.get_main_robot('out_limits')[1]:
-            elem.translate(*mvt[0] * speed, local=True)
-            elem.move(speed, 0)
-            return
-
-        if elem.is_ready_sequence():
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():
-                        self.dist = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.ccrubs_text = elem.get_window().get_ccrubs()
-                        self.parent.do([elem, 0, 0, 0, "", elem.get_window().get_ccrubs()])
-                        elem.get_window().add_track(elem)
-
-                    self.dist += speed
-                    if len(elem.get_window().track) != 0:
-                        elem.get_window().update_last_track(-speed, self.dist, 0)
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    elem.get_window().set_ccrubs(self.ccrubs_text + '\n' + str(round(elem.get_coord()[0]))
-                                                 + self.init_data.get_main_robot('ccrubs_separator')
-                                                 + str(round(elem.get_coord()[1])))
-                    try:
-                        elem.get_window().add_sequence_text(
-                            self.save_data.get_gcrubs('cmd_name').get(key).format(dist=self.dist))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-                    self.parent.updo([elem, self.dist, 0, 0, elem.get_window().get_sequence_text(),
-                                      elem.get_window().get_ccrubs()])
-                    break
-
-    def _go_right(self, event, elem, mvt: tuple, speed: int):
+        if elem.is_ready_sequence() and command is not None:
+            new_command = elem.get_key() != key
+            if new_command:
+                self.dist = 0
+                self.parent.do(functions.history.MoveAction(elem))
+                elem.get_window().add_track(elem)
+
+            self.dist += speed
+            if len(elem.get_window().track) != 0:
+                elem.get_window().update_last_track(-speed, self.dist, 0)
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(dist=self.dist)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            point = tuple(elem.get_coord()[:2])
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+                elem.get_window().add_waypoint(*point)
+            else:  # Touche maintenue : seule la derniere ligne et le dernier point changent
+                elem.get_window().replace_last_sequence_line(line)
+                elem.get_window().replace_last_waypoint(*point)
+            self.parent.updo(self.dist, 0, 0, line, point)
+
+    def _go_right(self, key: int, elem, mvt: tuple, speed: int, command=None):
         """
         Fait avancer le robot vers la droite
-        :param event: QtGui.QKeyEvent: Evenement
+        :param key: int: Code de la touche
         :param elem: element.Robot: Robot qui doit avancer
         :param mvt: Deplacements calcules
         :param speed: Vitesse de deplacement
+        :param command: str: Nom de la commande de la sequence associee a la touche, None s'il n'y en a pas
         :return: None
         """
+        speed = self._in_limits(elem, 1, 0, speed)  # Le robot s'arrete au bord du plateau
+        if speed == 0:
+            return
+
         elem.translate(*mvt[0] * speed, local=True)
         elem.move(speed, 0)
 
-        # Si le robot est trop en dehors du plateau
-        if not -self.init_data.get_main_robot('out_limits')[0] < elem.get_coord()[0] < \
-                self.init_data.get_main_robot('out_limits')[0] or \
-                not -self.init_data.get_main_robot('out_limits')[1] < elem.get_coord()[1] < \
-                self.init_data.get_main_robot('out_limits')[1]:
-            elem.translate(*mvt[0] * -speed, local=True)
-            elem.move(-speed, 0)
-            return
-
-        if elem.is_ready_sequence():
-            for key, cmd in zip(self.save_data.get_gcrubs('cmd_key').keys(),
-                                self.save_data.get_gcrubs('cmd_key').values()):
-                if cmd == event.key():
-                    if elem.get_key() != event.key():
-                        self.dist = 0
-                        self.sequence_text = elem.get_window().get_sequence_text()
-                        self.ccrubs_text = elem.get_window().get_ccrubs()
-                        self.parent.do([elem, 0, 0, 0, "", elem.get_window().get_ccrubs()])
-                        elem.get_window().add_track(elem)
-
-                    self.dist += speed
-                    if len(elem.get_window().track) != 0:
-                        elem.get_window().update_last_track(speed, self.dist, 0)
-
-                    elem.get_window().set_sequence_text(self.sequence_text)
-                    elem.get_window().set_ccrubs(self.ccrubs_text + '\n' + str(round(elem.get_coord()[0]))
-                                                 + self.init_data.get_main_robot('ccrubs_separator')
-                                                 + str(round(elem.get_coord()[1])))
-                    try:
-                        elem.get_window().add_sequence_text(
-                            self.save_data.get_gcrubs('cmd_name').get(key).format(dist=self.dist))
-                    except KeyError:
-                        elem.get_window().add_sequence_text(self.save_data.get_gcrubs('cmd_name').get(key))
-
-                    self.parent.updo([elem, self.dist, 0, 0, elem.get_window().get_sequence_text(),
-                                      elem.get_window().get_ccrubs()])
-                    break
+        if elem.is_ready_sequence() and command is not None:
+            new_command = elem.get_key() != key
+            if new_command:
+                self.dist = 0
+                self.parent.do(functions.history.MoveAction(elem))
+                elem.get_window().add_track(elem)
+
+            self.dist += speed
+            if len(elem.get_window().track) != 0:
+                elem.get_window().update_last_track(speed, self.dist, 0)
+
+            try:
+                line = self.save_data.get_gcrubs('cmd_name').get(command).format(dist=self.dist)
+            except KeyError:
+                line = self.save_data.get_gcrubs('cmd_name').get(command)
+            point = tuple(elem.get_coord()[:2])
+            if new_command:
+                elem.get_window().add_sequence_text(line)
+                elem.get_window().add_waypoint(*point)
+            else:  # Touche maintenue : seule la derniere ligne et le dernier point changent
+                elem.get_window().replace_last_sequence_line(line)
+                elem.get_window().replace_last_waypoint(*point)
+
+            self.parent.updo(self.dist, 0, 0, line, point)
 
     def mouseReleaseEvent(self, ev):
         """